@@ -1,5 +1,6 @@
 
 from game.card import ActionType, Card, CardType, GameZone, OperatorType, create_action_effect, create_card_effect, create_if_condition
+from game.catalogue import CardCatalogue
 
 # 卡牌数据集合 v0.0
 # 包含20张卡牌：12张普通卡，4张反击卡，4张连击卡
@@ -326,21 +327,22 @@ CARDS_V0 = [
     )
 ]
 
+# 只读卡牌目录（加载时建立索引并预编译效果）
+CATALOGUE = CardCatalogue("v0", CARDS_V0)
+CARDS_V0 = CATALOGUE.cards
+
 # 便捷函数
 def get_all_cards():
-    """获取所有卡牌"""
-    return CARDS_V0
+    """获取所有卡牌（只读元组，所有对局共享；新对局请使用 CATALOGUE.new_deck()）"""
+    return CATALOGUE.cards
 
 def get_cards_by_type(card_type: CardType):
     """根据类型获取卡牌"""
-    return [card for card in CARDS_V0 if card.card_type == card_type]
+    return list(CATALOGUE.by_type(card_type))
 
 def get_card_by_id(card_id: int):
     """根据ID获取卡牌"""
-    for card in CARDS_V0:
-        if card.id == card_id:
-            return card
-    return None
+    return CATALOGUE.get(card_id)
 
 def print_cards_summary():
     """打印卡牌统计信息"""
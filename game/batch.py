@@ -0,0 +1,590 @@
+import random
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError as exc:
+    raise ImportError("批量模拟需要 numpy：pip install numpy") from exc
+
+from game.card import ActionEffect, ActionType, Card, CardType, IfCondition, OperatorType
+from game.catalogue import CardCatalogue, get_catalogue
+from game.compact import A, H, P1, S1, S2, ZONE_CODES, CardTable, CompactState
+from game.rules import GameRoundManager
+from game.simulate import HeadlessJudge, RandomPolicy, play_game
+
+
+# ==========================
+# 区域、指令与比较表
+# ==========================
+
+# 区域编号沿用 CompactState，另加 T 表示已打出、尚未结算的卡牌
+T = 6
+N_ZONES = 7
+
+# 效果指令操作码；SELECT 暂不支持，与 ActionEffect 一致编译为 NOP
+NOP, IF, ORDER, RANDOM = range(4)
+
+_OP_CODES = {
+    OperatorType.GT: 0, OperatorType.GTE: 1, OperatorType.LT: 2,
+    OperatorType.LTE: 3, OperatorType.EQ: 4, OperatorType.NEQ: 5,
+}
+
+# 比较真值表：行为比较运算，列为 sign(a - b) + 1
+_COMPARE = np.array([
+    [False, False, True],    # GT
+    [False, True, True],     # GTE
+    [True, False, False],    # LT
+    [True, True, False],     # LTE
+    [False, True, False],    # EQ
+    [True, False, True],     # NEQ
+])
+
+END_REASONS = ("score", "deck_exhausted", "round_limit")
+
+# 随机抽样键生成器：(局下标, 候选掩码[n, N], 顺序键[n, N], 抽取张数[n]) -> 排序键[n, N]
+# 非候选卡牌的键必须为 inf，键最小的若干张按键从小到大依次被取出
+Sampler = Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+
+def _compile_programs(table: CardTable) -> Tuple[np.ndarray, np.ndarray]:
+    """将卡牌效果编译为定长数组
+
+    ops[card, chain, step] 为操作码；args[card, chain, step] 为参数：
+    IF 为 (a 是否区域, a, 比较运算, b 是否区域, b)，移动为 (源区域, 目标区域, 张数, 0, 0)。
+    """
+    n_chains = max((len(card.effects) for card in table.cards), default=0)
+    n_steps = max((len(chain.effects) for card in table.cards for chain in card.effects), default=0)
+    ops = np.zeros((len(table), max(n_chains, 1), max(n_steps, 1)), dtype=np.int8)
+    args = np.zeros(ops.shape + (5,), dtype=np.int64)
+
+    for i, card in enumerate(table.cards):
+        for c, chain in enumerate(card.effects):
+            for s, effect in enumerate(chain.effects):
+                if isinstance(effect, IfCondition):
+                    a, b = effect.operand_a, effect.operand_b
+                    a_zone, b_zone = not isinstance(a, int), not isinstance(b, int)
+                    ops[i, c, s] = IF
+                    args[i, c, s] = (a_zone, ZONE_CODES[a] if a_zone else a, _OP_CODES[effect.operator],
+                                     b_zone, ZONE_CODES[b] if b_zone else b)
+                elif isinstance(effect, ActionEffect) and effect.action_type != ActionType.SELECT:
+                    ops[i, c, s] = ORDER if effect.action_type == ActionType.ORDER else RANDOM
+                    args[i, c, s] = (ZONE_CODES[effect.from_zone], ZONE_CODES[effect.to_zone], effect.num, 0, 0)
+    return ops, args
+
+
+# ==========================
+# 批量游戏状态
+# ==========================
+
+class BatchState:
+    """以 NumPy 数组同时表示 K 局游戏
+
+    zone[k, c] 为第 k 局中卡牌 c（CardTable 下标）所在区域，order[k, c] 为区域内的
+    顺序键（越小越靠顶部，加入区域时取本局递增的新键），counts[k, z] 为各区域卡牌数。
+    所有规则操作都以“局下标数组”为参数，对其中每局各作用一次，语义与
+    GameRoundManager / CompactState 完全一致（包括效果中 P1/S1 始终指 player1）。
+    """
+
+    def __init__(self,
+                 table: CardTable,
+                 zone: np.ndarray,
+                 order: np.ndarray,
+                 current: np.ndarray,
+                 round_count: np.ndarray,
+                 rng: Optional[np.random.Generator] = None,
+                 sampler: Optional[Sampler] = None):
+        self.table = table
+        self.zone = zone
+        self.order = order
+        self.current = current
+        self.round_count = round_count
+        self.winner = np.full(len(zone), -1, dtype=np.int8)   # 结束时记录的胜者 0/1，-1 为未记录
+        self.counts = np.stack([(zone == z).sum(1) for z in range(N_ZONES)], axis=1)
+        self.next_key = order.max(1, initial=0) + 1
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.sampler = sampler or self._uniform_keys
+        self.ops, self.args = _compile_programs(table)
+        self.is_counter = np.array([t == CardType.COUNTER for t in table.types])
+        self.is_combo = np.array([t == CardType.COMBO for t in table.types])
+
+    # ---------- 构造与转换 ----------
+
+    @classmethod
+    def new_games(cls, table: CardTable, n_games: int,
+                  rng: Optional[np.random.Generator] = None,
+                  initial_cards: int = 5) -> 'BatchState':
+        """K 局新游戏：各自洗牌后发初始手牌"""
+        rng = rng if rng is not None else np.random.default_rng()
+        n = len(table)
+        order = rng.permuted(np.tile(np.arange(n, dtype=np.int64), (n_games, 1)), axis=1)
+        state = cls(table,
+                    np.full((n_games, n), H, dtype=np.int8),
+                    order,
+                    np.zeros(n_games, dtype=np.int8),
+                    np.ones(n_games, dtype=np.int64),
+                    rng)
+        games = np.arange(n_games)
+        for _ in range(initial_cards):
+            state.draw(games, np.zeros(n_games, dtype=np.int8))
+            state.draw(games, np.ones(n_games, dtype=np.int8))
+        return state
+
+    @classmethod
+    def from_compact(cls, table: CardTable, states: Sequence[CompactState],
+                     rng: Optional[np.random.Generator] = None,
+                     sampler: Optional[Sampler] = None) -> 'BatchState':
+        zone = np.full((len(states), len(table)), T, dtype=np.int8)
+        order = np.zeros((len(states), len(table)), dtype=np.int64)
+        for k, compact in enumerate(states):
+            key = 0
+            for z, cards in enumerate(compact.zones):
+                for card in cards:
+                    zone[k, card] = z
+                    order[k, card] = key
+                    key += 1
+        current = np.array([s.current for s in states], dtype=np.int8)
+        round_count = np.array([s.round_count for s in states], dtype=np.int64)
+        return cls(table, zone, order, current, round_count, rng, sampler)
+
+    def to_compact(self, k: int) -> CompactState:
+        """导出第 k 局为 CompactState，便于与其它引擎逐局比较"""
+        zones = []
+        for z in range(6):
+            cards = np.nonzero(self.zone[k] == z)[0]
+            zones.append(bytearray(cards[np.argsort(self.order[k, cards])].tolist()))
+        return CompactState(zones, int(self.current[k]), int(self.round_count[k]))
+
+    def __len__(self) -> int:
+        return len(self.zone)
+
+    # ---------- 查询 ----------
+
+    def hand_mask(self, games: np.ndarray, player: np.ndarray) -> np.ndarray:
+        return self.zone[games] == (P1 + player)[:, None]
+
+    def is_game_over(self, games: np.ndarray, max_score: int = 10) -> np.ndarray:
+        c = self.counts[games]
+        return (c[:, S1] >= max_score) | (c[:, S2] >= max_score) | (c[:, H] == 0)
+
+    def decide_winner(self, games: np.ndarray) -> np.ndarray:
+        """终局裁定，规则同 GameRoundManager.determine_winner"""
+        c = self.counts[games]
+        score = np.sign(c[:, S1] - c[:, S2])
+        hand = np.sign(c[:, P1] - c[:, P1 + 1])
+        tie = 1 - self.current[games]
+        return np.where(score != 0, (score < 0), np.where(hand != 0, (hand < 0), tie)).astype(np.int8)
+
+    # ---------- 规则 ----------
+
+    def draw(self, games: np.ndarray, player: np.ndarray):
+        """各局指定玩家从牌库顶抽一张牌（牌库为空则不抽）"""
+        n = len(games)
+        self._transfer(games, np.full(n, H), P1 + player, np.ones(n, dtype=np.int64), np.zeros(n, dtype=bool))
+
+    def switch_turn(self, games: np.ndarray):
+        self.current[games] ^= 1
+        self.round_count[games] += 1
+
+    def resolve(self, games: np.ndarray, cards: np.ndarray, scorer: np.ndarray, success: np.ndarray):
+        """结算：scorer 判定成功则得分，否则进入弃牌区并触发效果"""
+        self._move(games[success], cards[success], S1 + scorer[success])
+        failed = ~success
+        games, cards = games[failed], cards[failed]
+        self._move(games, cards, A)
+        self._run_effects(games, cards)
+
+    def check_end(self, games: np.ndarray):
+        """对已结束且尚未记录胜者的局记录胜者（同 GameRoundManager.check_end_conditions）"""
+        games = games[self.is_game_over(games) & (self.winner[games] < 0)]
+        self.winner[games] = self.decide_winner(games)
+
+    def run_one_turn(self, games: np.ndarray, main: np.ndarray, response: np.ndarray,
+                     combo: np.ndarray, verdicts: np.ndarray):
+        """完整回合：主攻/反击/连击结算 → 胜负判断 → 换人 → 准备阶段
+
+        卡牌为 -1 表示未出；main 为 -1 表示无牌可出，直接换人并抽牌。
+        verdicts[i] 依次为主攻与第二张牌（反击或连击）的判定结果；有反击时忽略连击。
+        """
+        acting = main >= 0
+        g = games[acting]
+        main, response, combo, verdicts = main[acting], response[acting], combo[acting], verdicts[acting]
+        attacker = self.current[g]
+        defender = attacker ^ 1
+
+        second = np.where(response >= 0, response, combo)
+        scorer = np.where(response >= 0, attacker, defender)
+        has_second = second >= 0
+        self._move(g, main, T)
+        self._move(g[has_second], second[has_second], T)
+
+        self.resolve(g, main, defender, verdicts[:, 0])
+        self.resolve(g[has_second], second[has_second], scorer[has_second], verdicts[has_second, 1])
+        self.check_end(g)
+
+        self.switch_turn(games)
+        self.draw(games, self.current[games])
+
+    def finish(self, max_score: int = 10) -> np.ndarray:
+        """补记未结束或结束后未裁定的局的胜者，返回各局终局原因（END_REASONS 下标）"""
+        games = np.arange(len(self))
+        unset = games[self.winner < 0]
+        self.winner[unset] = self.decide_winner(unset)
+        c = self.counts
+        scored = (c[:, S1] >= max_score) | (c[:, S2] >= max_score)
+        return np.where(scored, 0, np.where(self.is_game_over(games, max_score), 1, 2))
+
+    # ---------- 内部 ----------
+
+    def _move(self, games: np.ndarray, cards: np.ndarray, dst):
+        """把每局的一张牌放到目标区域底部（每局至多出现一次）"""
+        src = self.zone[games, cards]
+        self.counts[games, src] -= 1
+        self.counts[games, dst] += 1
+        self.zone[games, cards] = dst
+        self.order[games, cards] = self.next_key[games]
+        self.next_key[games] += 1
+
+    def _transfer(self, games: np.ndarray, src: np.ndarray, dst: np.ndarray,
+                  num: np.ndarray, random_mode: np.ndarray):
+        """各局从 src 取至多 num 张牌依次放到 dst 底部
+
+        ORDER 从顶部依次取；RANDOM 在卡牌多于 num 张时随机抽取 num 张，否则全部按顺序取出。
+        """
+        count = self.counts[games, src]
+        limit = np.minimum(num, count)
+        if not limit.any():
+            return
+        candidate = self.zone[games] == src[:, None]
+        order = self.order[games]
+        keys = np.where(candidate, order, np.inf)
+        sampled = random_mode & (count > num)
+        if sampled.any():
+            keys[sampled] = self.sampler(games[sampled], candidate[sampled], order[sampled], num[sampled])
+        for j in range(int(limit.max())):
+            rows = np.nonzero(limit > j)[0]
+            cards = keys[rows].argmin(1)
+            keys[rows, cards] = np.inf
+            self._move(games[rows], cards, dst[rows])
+
+    def _run_effects(self, games: np.ndarray, cards: np.ndarray):
+        if not len(games):
+            return
+        ops, args = self.ops[cards], self.args[cards]
+        for chain in range(ops.shape[1]):
+            if not ops[:, chain].any():
+                continue
+            alive = np.ones(len(games), dtype=bool)
+            for step in range(ops.shape[2]):
+                op, arg = ops[:, chain, step], args[:, chain, step]
+
+                rows = np.nonzero(alive & (op == IF))[0]
+                if len(rows):
+                    g, a = games[rows], arg[rows]
+                    va = np.where(a[:, 0] == 1, self.counts[g, np.where(a[:, 0] == 1, a[:, 1], 0)], a[:, 1])
+                    vb = np.where(a[:, 3] == 1, self.counts[g, np.where(a[:, 3] == 1, a[:, 4], 0)], a[:, 4])
+                    alive[rows] = _COMPARE[a[:, 2], np.sign(va - vb) + 1]
+
+                rows = np.nonzero(alive & (op >= ORDER))[0]
+                if len(rows):
+                    a = arg[rows]
+                    self._transfer(games[rows], a[:, 0], a[:, 1], a[:, 2], op[rows] == RANDOM)
+
+    def _uniform_keys(self, games: np.ndarray, candidate: np.ndarray,
+                      order: np.ndarray, num: np.ndarray) -> np.ndarray:
+        return np.where(candidate, self.rng.random(candidate.shape), np.inf)
+
+
+# ==========================
+# 批量策略
+# ==========================
+
+class BatchRandomPolicy:
+    """RandomPolicy 与 random_outcome 的批量版本，决策分布与之相同"""
+
+    def __init__(self,
+                 counter_rate: float = 0.5,
+                 combo_rate: float = 0.5,
+                 meaning_rate: float = 0.5,
+                 story_rate: float = 0.5):
+        self.counter_rate = counter_rate
+        self.combo_rate = combo_rate
+        self.meaning_rate = meaning_rate
+        self.story_rate = story_rate
+
+    def decide(self, state: BatchState, games: np.ndarray):
+        """返回 (main, response, combo, verdicts)，参数格式同 BatchState.run_one_turn"""
+        rng = state.rng
+        n = len(games)
+        attacker = state.current[games]
+        attacker_hand = state.hand_mask(games, attacker)
+        defender_hand = state.hand_mask(games, attacker ^ 1)
+
+        main = self._pick(attacker_hand, rng)
+        rows = np.nonzero(main >= 0)[0]
+        attacker_hand[rows, main[rows]] = False
+
+        counters = defender_hand & state.is_counter
+        want = rng.random(n) < self.counter_rate
+        response = np.where(want, self._pick(counters, rng), -1)
+
+        combos = attacker_hand & state.is_combo
+        want = (response < 0) & (rng.random(n) < self.combo_rate)
+        combo = np.where(want, self._pick(combos, rng), -1)
+
+        verdicts = (rng.random((n, 2)) < self.meaning_rate) & (rng.random((n, 2)) < self.story_rate)
+        return main, response, combo, verdicts
+
+    @staticmethod
+    def _pick(mask: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """每行在掩码内均匀随机选一张牌，没有可选时为 -1"""
+        keys = np.where(mask, rng.random(mask.shape), 2.0)
+        return np.where(mask.any(1), keys.argmin(1), -1)
+
+
+# ==========================
+# 批量对局与统计
+# ==========================
+
+@dataclass
+class BatchReport:
+    """批量模拟的汇总结果"""
+    games: int
+    winners: np.ndarray                 # 每局胜者 0/1
+    rounds: np.ndarray                  # 每局结束时的回合数
+    end_reasons: Counter = field(default_factory=Counter)
+    elapsed: float = 0.0
+
+    def win_rate(self, player_id: str) -> float:
+        player = 0 if player_id == "player1" else 1
+        return float(np.mean(self.winners == player)) if self.games else 0.0
+
+    def mean_rounds(self) -> float:
+        return float(self.rounds.mean()) if self.games else 0.0
+
+    def rounds_histogram(self) -> Dict[int, int]:
+        """回合数 -> 局数"""
+        values, counts = np.unique(self.rounds, return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+    def summary(self) -> str:
+        p50, p90, p99 = np.percentile(self.rounds, (50, 90, 99)) if self.games else (0, 0, 0)
+        return (
+            f"对局数: {self.games}，耗时: {self.elapsed:.2f}s\n"
+            f"胜率: player1 {self.win_rate('player1'):.1%}，player2 {self.win_rate('player2'):.1%}\n"
+            f"终局原因: {dict(self.end_reasons)}\n"
+            f"回合数: 平均 {self.mean_rounds():.1f}，P50 {p50:.0f}，P90 {p90:.0f}，P99 {p99:.0f}，"
+            f"最长 {self.rounds.max() if self.games else 0}"
+        )
+
+
+def play_batch(state: BatchState, policy: BatchRandomPolicy, max_rounds: int = 500) -> BatchReport:
+    """推进 state 中全部对局直到终局，流程同 simulate.play_game"""
+    started = time.perf_counter()
+    live = np.arange(len(state))
+    while True:
+        live = live[~state.is_game_over(live) & (state.round_count[live] <= max_rounds)]
+        if not len(live):
+            break
+        state.run_one_turn(live, *policy.decide(state, live))
+    reasons = state.finish()
+    return BatchReport(
+        games=len(state),
+        winners=state.winner.copy(),
+        rounds=state.round_count.copy(),
+        end_reasons=Counter(END_REASONS[r] for r in reasons.tolist()),
+        elapsed=time.perf_counter() - started,
+    )
+
+
+def simulate_batch(card_set: str = "v1",
+                   n_games: int = 100000,
+                   seed: Optional[int] = None,
+                   counter_rate: float = 0.5,
+                   combo_rate: float = 0.5,
+                   meaning_rate: float = 0.5,
+                   story_rate: float = 0.5,
+                   max_rounds: int = 500) -> BatchReport:
+    """以随机策略批量模拟 n_games 局，参数含义同 simulate.simulate_game"""
+    table = CardTable(get_catalogue(card_set).cards)
+    started = time.perf_counter()
+    state = BatchState.new_games(table, n_games, np.random.default_rng(seed))
+    report = play_batch(state, BatchRandomPolicy(counter_rate, combo_rate, meaning_rate, story_rate), max_rounds)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+# ==========================
+# 与 GameRoundManager 交叉校验
+# ==========================
+
+class _RecordingRandom(random.Random):
+    """记录每次 sample 抽出的位置（Zone.sample 通过它抽取随机效果的卡牌）"""
+
+    def __init__(self, seed: Optional[int] = None):
+        super().__init__(seed)
+        self.samples: List[List[int]] = []
+
+    def sample(self, population, k, **kwargs):
+        picked = super().sample(population, k, **kwargs)
+        self.samples.append(picked)
+        return picked
+
+
+@dataclass
+class _Turn:
+    main: int
+    response: int
+    combo: int
+    verdicts: Tuple[bool, bool]
+    samples: List[List[int]]
+    after: CompactState
+
+
+class _RecordingManager(GameRoundManager):
+    """记录每回合的出牌、裁定、随机抽样与回合结束后的状态"""
+
+    def __init__(self, catalogue: CardCatalogue, table: CardTable, seed: int,
+                 meaning_rate: float, story_rate: float):
+        super().__init__(catalogue, verbose=False, seed=seed)
+        rng = self.state.rng = _RecordingRandom(seed)
+        self.table = table
+        self.verdicts: List[bool] = []
+        self.turns: List[_Turn] = []
+        self.initial: Optional[CompactState] = None
+        self._played: Tuple[Optional[Card], ...] = ()
+        self.policy = RandomPolicy(rng=rng)
+        rates = {"meaning": meaning_rate, "story": story_rate}
+
+        def outcome(card: Card, player_id: str, field_name: str) -> bool:
+            result = rng.random() < rates[field_name]
+            self.verdicts.append(result)
+            return result
+        self.judge = HeadlessJudge(outcome)
+
+    def deal_phase(self, initial_cards: int = 5):
+        super().deal_phase(initial_cards)
+        self.initial = CompactState.from_game_state(self.state, self.table)
+
+    def action_phase(self, main_card, response_card=None, combo_card=None):
+        self._played = (main_card, response_card, combo_card)
+        super().action_phase(main_card, response_card, combo_card)
+
+    def prepare_phase(self):
+        super().prepare_phase()
+        index = self.table.index
+        main, response, combo = self._played or (None, None, None)
+        v = self.verdicts
+        verdicts = tuple(v[i] and v[i + 1] for i in range(0, len(v), 2)) + (False, False)
+        self.turns.append(_Turn(
+            index[main.id] if main else -1,
+            index[response.id] if response else -1,
+            index[combo.id] if combo else -1,
+            verdicts[:2],
+            self.state.rng.samples,
+            CompactState.from_game_state(self.state, self.table),
+        ))
+        self._played = ()
+        self.verdicts = []
+        self.state.rng.samples = []
+
+
+def cross_check(card_set: str = "v1", n_games: int = 2000, base_seed: int = 0,
+                meaning_rate: float = 0.5, story_rate: float = 0.5, max_rounds: int = 500) -> int:
+    """与 GameRoundManager 交叉校验，返回不一致的局数
+
+    1. 逐回合对拍：用 simulate_game 相同的种子跑 GameRoundManager，记录每回合的决策、
+       裁定与随机效果的抽样位置，批量引擎按相同输入推进，比较每回合结束后的完整状态
+       以及终局胜者、回合数与终局原因。
+    2. 统计对比：批量引擎自身的随机策略与 simulate_game 的胜率和平均回合数。
+    """
+    catalogue = get_catalogue(card_set)
+    table = CardTable(catalogue.cards)
+    seeds = range(base_seed, base_seed + n_games)
+
+    managers = []
+    results = []
+    for seed in seeds:
+        manager = _RecordingManager(catalogue, table, seed, meaning_rate, story_rate)
+        results.append(play_game(manager, (manager.policy, manager.policy), max_rounds=max_rounds))
+        managers.append(manager)
+
+    queues: List[Deque[List[int]]] = [deque() for _ in managers]
+
+    def replay_sampler(games, candidate, order, num):
+        keys = np.full(candidate.shape, np.inf)
+        for row, k in enumerate(games.tolist()):
+            ranked = np.argsort(np.where(candidate[row], order[row], np.iinfo(np.int64).max))
+            for j, position in enumerate(queues[k].popleft()):
+                keys[row, ranked[position]] = j
+        return keys
+
+    state = BatchState.from_compact(table, [m.initial for m in managers], sampler=replay_sampler)
+    bad = set()
+    for turn in range(max(len(m.turns) for m in managers)):
+        games = np.array([k for k, m in enumerate(managers) if len(m.turns) > turn], dtype=np.int64)
+        records = [managers[k].turns[turn] for k in games.tolist()]
+        for k, record in zip(games.tolist(), records):
+            queues[k].extend(record.samples)
+        state.run_one_turn(
+            games,
+            np.array([r.main for r in records]),
+            np.array([r.response for r in records]),
+            np.array([r.combo for r in records]),
+            np.array([r.verdicts for r in records], dtype=bool),
+        )
+        for k, record in zip(games.tolist(), records):
+            if state.to_compact(k) != record.after:
+                bad.add(k)
+    reasons = state.finish()
+    for k, result in enumerate(results):
+        if (("player1", "player2")[state.winner[k]] != result.winner
+                or state.round_count[k] != result.rounds
+                or END_REASONS[reasons[k]] != result.end_reason):
+            bad.add(k)
+
+    print(f"=== 批量引擎交叉校验 ({card_set}, {n_games} 局) ===")
+    print(f"逐回合对拍: 不一致 {len(bad)} 局")
+
+    # 记录的对局与 simulate_game 相同种子的对局完全相同，直接用作逐局统计
+    batch = simulate_batch(card_set, n_games * 10, seed=base_seed,
+                           meaning_rate=meaning_rate, story_rate=story_rate, max_rounds=max_rounds)
+    scalar_rate = sum(r.winner == "player1" for r in results) / n_games
+    scalar_rounds = sum(r.rounds for r in results) / n_games
+    print(f"统计对比: player1 胜率 批量 {batch.win_rate('player1'):.2%} / 逐局 {scalar_rate:.2%}，"
+          f"平均回合数 批量 {batch.mean_rounds():.2f} / 逐局 {scalar_rounds:.2f}")
+    return len(bad)
+
+
+def benchmark(n_games: int = 100000, card_set: str = "v1"):
+    """吞吐量基准：批量引擎与逐局 simulate_game 对比"""
+    from game.simulate import simulate_game
+
+    report = simulate_batch(card_set, n_games, seed=0)
+    scalar_games = max(1, n_games // 50)
+    started = time.perf_counter()
+    for seed in range(scalar_games):
+        simulate_game(card_set, seed)
+    scalar_rate = scalar_games / (time.perf_counter() - started)
+
+    rate = report.games / report.elapsed
+    print(f"=== 批量模拟基准 ({card_set}) ===")
+    print(report.summary())
+    print(f"吞吐: 批量 {rate:,.0f} 局/秒，逐局 {scalar_rate:,.0f} 局/秒（{rate / scalar_rate:.1f}x）")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="NumPy 批量模拟")
+    parser.add_argument("-n", "--games", type=int, default=100000)
+    parser.add_argument("--card-set", default="v1")
+    parser.add_argument("--check", type=int, default=0, help="与 GameRoundManager 交叉校验的局数")
+    args = parser.parse_args()
+
+    if args.check:
+        cross_check(args.card_set, args.check)
+    else:
+        benchmark(args.games, args.card_set)
@@ -1,8 +1,9 @@
 from enum import Enum
-from typing import List, Union, Optional,TYPE_CHECKING
+from typing import List, Sequence, Tuple, Union, Optional,TYPE_CHECKING
 from dataclasses import dataclass
 if TYPE_CHECKING:
     from game.game_state import GameState
+    from game.zone import Zone
 
 
 # ==========================
@@ -43,7 +44,7 @@ class ActionType(Enum):
 # 效果组件：IF 条件与 ACTION 动作
 # ==========================
 
-@dataclass
+@dataclass(frozen=True)
 class IfCondition:
     operand_a: Union[GameZone, int]
     operator: OperatorType
@@ -76,7 +77,7 @@ class IfCondition:
         return 0
 
 
-@dataclass
+@dataclass(frozen=True)
 class ActionEffect:
     from_zone: GameZone
     to_zone: GameZone
@@ -85,38 +86,35 @@ class ActionEffect:
 
     def execute(self, game_state: 'GameState') -> 'GameState':
         """执行动作效果，直接修改 GameState 对象"""
-        # 获取源区域和目标区域的卡牌列表引用
+        # 获取源区域的卡牌容器引用
         from_cards = self._get_zone_cards(game_state, self.from_zone)
         if not from_cards:
             return game_state
 
-        # 根据动作类型选择卡牌
-        cards_to_move = []
+        # 根据动作类型从源区域取出卡牌
         match self.action_type:
             case ActionType.ORDER:
                 # 从顶部开始取指定数量
-                cards_to_move = from_cards[:min(self.num, len(from_cards))]
+                cards_to_move = from_cards.take_top(self.num)
             case ActionType.RANDOM:
                 # 随机选择指定数量
                 if len(from_cards) > self.num:
-                    cards_to_move = random.sample(from_cards, self.num)
+                    cards_to_move = from_cards.sample(game_state.rng, self.num)
+                    for card in cards_to_move:
+                        from_cards.remove(card.id)
                 else:
-                    cards_to_move = from_cards.copy()
+                    cards_to_move = from_cards.clear()
             case ActionType.SELECT:
                 # 暂不支持指定选取
                 return game_state
 
-        # 从源区域移除卡牌
-        for card in cards_to_move:
-            from_cards.remove(card)
-
         # 将卡牌添加到目标区域
         self._add_to_zone(game_state, self.to_zone, cards_to_move)
 
         return game_state
 
-    def _get_zone_cards(self, game_state: 'GameState', zone: GameZone) -> List['Card']:
-        """获取指定区域的卡牌列表引用"""
+    def _get_zone_cards(self, game_state: 'GameState', zone: GameZone) -> 'Zone':
+        """获取指定区域的卡牌容器引用"""
         match zone:
             case GameZone.H: return game_state.deck
             case GameZone.P1: return game_state.player1.hand
@@ -145,9 +143,13 @@ class ActionEffect:
             case GameZone.A: game_state.discard_pile.extend(cards)
 
 
-@dataclass
+@dataclass(frozen=True)
 class CardEffect:
-    effects: List[Union[IfCondition, ActionEffect]]
+    effects: Tuple[Union[IfCondition, ActionEffect], ...]
+
+    def __post_init__(self):
+        # 效果链只读，列表转为元组
+        object.__setattr__(self, "effects", tuple(self.effects))
 
     def execute(self, game_state: 'GameState') -> 'GameState':
         """顺序执行效果链"""
@@ -164,19 +166,30 @@ class CardEffect:
 # 卡牌类定义
 # ==========================
 
-@dataclass
+@dataclass(frozen=True)
 class Card:
+    """卡牌（不可变），同一张卡牌对象由卡牌目录在所有对局间共享"""
     id: int
     name: str
     meaning: str
     story: str
     card_type: CardType
     effect_description: str
-    effects: Optional[List[CardEffect]] = None
+    effects: Optional[Sequence[CardEffect]] = None
 
     def __post_init__(self):
-        if self.effects is None:
-            self.effects = []
+        object.__setattr__(self, "effects", tuple(self.effects or ()))
+
+    def to_dict(self) -> dict:
+        """卡牌目录中的一项（效果以 effect_description 描述，不含效果对象）"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "meaning": self.meaning,
+            "story": self.story,
+            "card_type": self.card_type.value,
+            "effect_description": self.effect_description,
+        }
 
     def is_normal_card(self) -> bool:
         return self.card_type == CardType.NORMAL
@@ -223,5 +236,5 @@ def create_action_effect(from_zone: GameZone,
     return ActionEffect(from_zone, to_zone, num, action_type)
 
 
-def create_card_effect(effects: List[Union[IfCondition, ActionEffect]]) -> CardEffect:
+def create_card_effect(effects: Sequence[Union[IfCondition, ActionEffect]]) -> CardEffect:
     return CardEffect(effects)
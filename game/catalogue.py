@@ -0,0 +1,89 @@
+import hashlib
+import importlib
+import json
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from game.card import Card, CardType
+from game.effect_compiler import compile_card_set
+from game.zone import Zone
+
+
+# 已发布的卡牌集，名称即 data 包下的模块名
+CARD_SETS: Tuple[str, ...] = ("v0", "v1")
+
+
+# ==========================
+# 卡牌目录
+# ==========================
+
+class CardCatalogue:
+    """只读卡牌目录：卡牌集加载一次，按 ID 与类型建立索引
+
+    卡牌本身不可变，所有对局共享同一批卡牌对象；每局只持有自己的牌库
+    （按 ID 索引的 Zone，元素是共享卡牌的引用），互不影响。
+    """
+
+    def __init__(self, name: str, cards: Sequence[Card]):
+        self.name = name
+        self.cards: Tuple[Card, ...] = tuple(cards)
+        self._by_id: Dict[int, Card] = {}
+        for card in self.cards:
+            if card.id in self._by_id:
+                raise ValueError(f"卡牌集 {name} 中卡牌 ID {card.id} 重复")
+            self._by_id[card.id] = card
+        self._by_type: Dict[CardType, Tuple[Card, ...]] = {
+            card_type: tuple(card for card in self.cards if card.card_type == card_type)
+            for card_type in CardType
+        }
+        # 牌库模板：新对局直接复制，无需逐张建索引
+        self._deck = Zone(self.cards)
+        # 加载时预编译卡牌效果
+        compile_card_set(self.cards)
+        self._encoded: Optional[Tuple[bytes, str]] = None
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def __iter__(self) -> Iterator[Card]:
+        return iter(self.cards)
+
+    def __contains__(self, card_id: int) -> bool:
+        return card_id in self._by_id
+
+    def __repr__(self) -> str:
+        return f"CardCatalogue({self.name!r}, {len(self.cards)} 张)"
+
+    def get(self, card_id: int) -> Optional[Card]:
+        """按 ID 获取卡牌，O(1)"""
+        return self._by_id.get(card_id)
+
+    def by_type(self, card_type: CardType) -> Tuple[Card, ...]:
+        """获取某一类型的全部卡牌"""
+        return self._by_type[card_type]
+
+    def ids(self) -> Tuple[int, ...]:
+        return tuple(self._by_id)
+
+    def encoded(self) -> Tuple[bytes, str]:
+        """目录的 JSON 编码与强 ETag（内容哈希），首次调用时计算
+
+        对局状态中只发送卡牌 ID，客户端据此目录还原卡牌内容。
+        """
+        if self._encoded is None:
+            body = json.dumps(
+                {"card_set": self.name, "cards": [card.to_dict() for card in self.cards]},
+                ensure_ascii=False, separators=(",", ":"),
+            ).encode("utf-8")
+            self._encoded = (body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+        return self._encoded
+
+    def new_deck(self) -> Zone:
+        """为一局新游戏生成独立的牌库（未洗牌），O(牌库大小)"""
+        return self._deck.copy()
+
+
+def get_catalogue(name: str) -> CardCatalogue:
+    """按名称获取已发布的卡牌目录（首次访问时加载对应的数据模块）"""
+    if name not in CARD_SETS:
+        raise KeyError(f"未知的卡牌集: {name}")
+    return importlib.import_module(f"data.{name}").CATALOGUE
@@ -0,0 +1,265 @@
+import copy
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from game.card import ActionEffect, ActionType, Card, CardType, GameZone, IfCondition, OperatorType
+from game.game_state import GameState
+from game.player import Player
+
+
+# ==========================
+# 区域编号与效果指令
+# ==========================
+
+# 紧凑表示中每个区域对应一个 bytearray，下标即区域编号
+H, P1, P2, S1, S2, A = range(6)
+ZONE_CODES: Dict[GameZone, int] = {
+    GameZone.H: H, GameZone.P1: P1, GameZone.P2: P2,
+    GameZone.S1: S1, GameZone.S2: S2, GameZone.A: A,
+}
+
+_OPS = {
+    OperatorType.GT: lambda a, b: a > b,
+    OperatorType.GTE: lambda a, b: a >= b,
+    OperatorType.LT: lambda a, b: a < b,
+    OperatorType.LTE: lambda a, b: a <= b,
+    OperatorType.EQ: lambda a, b: a == b,
+    OperatorType.NEQ: lambda a, b: a != b,
+}
+
+# 指令格式：
+#   ("if", a_is_zone, a, op, b_is_zone, b)
+#   ("move", from_code, to_code, num, action_type)
+Instruction = tuple
+
+
+def _operand(operand: Union[GameZone, int]) -> Tuple[bool, int]:
+    if isinstance(operand, GameZone):
+        return True, ZONE_CODES[operand]
+    return False, operand
+
+
+def _compile_chain(effects: Sequence[Union[IfCondition, ActionEffect]]) -> Tuple[Instruction, ...]:
+    program = []
+    for effect in effects:
+        if isinstance(effect, IfCondition):
+            program.append(("if", *_operand(effect.operand_a), _OPS[effect.operator], *_operand(effect.operand_b)))
+        elif isinstance(effect, ActionEffect):
+            program.append(("move", ZONE_CODES[effect.from_zone], ZONE_CODES[effect.to_zone],
+                            effect.num, effect.action_type))
+    return tuple(program)
+
+
+# ==========================
+# 卡牌索引表
+# ==========================
+
+class CardTable:
+    """卡牌集索引：卡牌 ID 与 0..n-1 的小整数下标互相转换，并缓存效果指令"""
+
+    def __init__(self, cards: Sequence[Card]):
+        self.cards: List[Card] = sorted(cards, key=lambda card: card.id)
+        if len(self.cards) > 255:
+            raise ValueError("紧凑表示最多支持 255 张卡牌")
+        self.index: Dict[int, int] = {card.id: i for i, card in enumerate(self.cards)}
+        self.types: List[CardType] = [card.card_type for card in self.cards]
+        self.programs: List[Tuple[Tuple[Instruction, ...], ...]] = [
+            tuple(_compile_chain(chain.effects) for chain in card.effects) for card in self.cards
+        ]
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def encode(self, cards: Sequence[Card]) -> bytearray:
+        return bytearray(self.index[card.id] for card in cards)
+
+    def decode(self, indices: Sequence[int]) -> List[Card]:
+        return [self.cards[i] for i in indices]
+
+
+# ==========================
+# 紧凑游戏状态
+# ==========================
+
+class CompactState:
+    """以 bytearray 保存各区域卡牌下标的游戏状态
+
+    玩家用下标 0/1 表示（对应 player1/player2）。clone 只复制 6 个小缓冲区，
+    适合搜索与模拟中大量分支。规则与 GameRoundManager 完全一致，
+    包括效果中的 P1/S1 始终指 player1 的区域。
+    """
+    __slots__ = ("zones", "current", "round_count")
+
+    def __init__(self, zones: List[bytearray], current: int = 0, round_count: int = 1):
+        self.zones = zones
+        self.current = current
+        self.round_count = round_count
+
+    # ---------- 转换 ----------
+
+    @classmethod
+    def from_game_state(cls, state: GameState, table: CardTable) -> 'CompactState':
+        zones = [
+            table.encode(state.deck),
+            table.encode(state.player1.hand),
+            table.encode(state.player2.hand),
+            table.encode(state.player1.score_zone),
+            table.encode(state.player2.score_zone),
+            table.encode(state.discard_pile),
+        ]
+        return cls(zones, 0 if state.current_player_id == "player1" else 1, state.round_count)
+
+    def to_game_state(self, table: CardTable, rng: Optional[random.Random] = None) -> GameState:
+        zones = self.zones
+        return GameState(
+            deck=table.decode(zones[H]),
+            discard_pile=table.decode(zones[A]),
+            player1=Player("player1", table.decode(zones[P1]), table.decode(zones[S1])),
+            player2=Player("player2", table.decode(zones[P2]), table.decode(zones[S2])),
+            current_player_id="player1" if self.current == 0 else "player2",
+            round_count=self.round_count,
+            rng=rng or random.Random(),
+        )
+
+    def clone(self) -> 'CompactState':
+        z = self.zones
+        return CompactState([z[0][:], z[1][:], z[2][:], z[3][:], z[4][:], z[5][:]],
+                            self.current, self.round_count)
+
+    def key(self) -> bytes:
+        """状态的字节串键，可用于比较与哈希"""
+        z = self.zones
+        return bytes((self.current, 255)) + b"\xff".join(z) + self.round_count.to_bytes(4, "little")
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, CompactState) and self.zones == other.zones
+                and self.current == other.current and self.round_count == other.round_count)
+
+    # ---------- 查询 ----------
+
+    def hand(self, player: int) -> bytearray:
+        return self.zones[P1 + player]
+
+    def score(self, player: int) -> int:
+        return len(self.zones[S1 + player])
+
+    def is_game_over(self, max_score: int = 10) -> bool:
+        z = self.zones
+        return len(z[S1]) >= max_score or len(z[S2]) >= max_score or not z[H]
+
+    def winner(self) -> int:
+        """终局裁定，规则同 GameRoundManager.determine_winner"""
+        z = self.zones
+        for a, b in ((len(z[S1]), len(z[S2])), (len(z[P1]), len(z[P2]))):
+            if a != b:
+                return 0 if a > b else 1
+        return 1 - self.current
+
+    # ---------- 规则 ----------
+
+    def draw(self, player: int) -> int:
+        """从牌库顶抽一张牌，牌库为空时返回 -1"""
+        deck = self.zones[H]
+        if not deck:
+            return -1
+        card = deck.pop(0)
+        self.zones[P1 + player].append(card)
+        return card
+
+    def play(self, player: int, card: int) -> bool:
+        """从手牌中打出一张牌（下标）"""
+        hand = self.zones[P1 + player]
+        pos = hand.find(card)
+        if pos < 0:
+            return False
+        del hand[pos]
+        return True
+
+    def switch_turn(self):
+        self.current ^= 1
+        self.round_count += 1
+
+    def resolve(self, table: CardTable, card: int, defender: int, success: bool, rng: random.Random):
+        """结算一张牌：defender 判定成功则得分，否则进入弃牌区并触发效果"""
+        zones = self.zones
+        if success:
+            zones[S1 + defender].append(card)
+            return
+        zones[A].append(card)
+        for program in table.programs[card]:
+            self._run(program, rng)
+
+    def run_one_turn(self, table: CardTable, main: int, response: int = -1, combo: int = -1,
+                     verdicts: Sequence[bool] = (), rng: Optional[random.Random] = None):
+        """完整回合：主攻/反击/连击结算 → 换人 → 准备阶段
+
+        卡牌为 -1 表示未出；verdicts 依次为每张打出卡牌的判定结果（释义与典故均正确为 True）。
+        """
+        rng = rng or random
+        attacker = self.current
+        defender = attacker ^ 1
+        verdicts = iter(verdicts)
+        self.resolve(table, main, defender, next(verdicts), rng)
+        if response >= 0:
+            self.resolve(table, response, attacker, next(verdicts), rng)
+        elif combo >= 0:
+            self.resolve(table, combo, defender, next(verdicts), rng)
+        self.switch_turn()
+        self.draw(self.current)
+
+    def _run(self, program: Tuple[Instruction, ...], rng: random.Random):
+        zones = self.zones
+        for ins in program:
+            if ins[0] == "if":
+                _, a_zone, a, op, b_zone, b = ins
+                if not op(len(zones[a]) if a_zone else a, len(zones[b]) if b_zone else b):
+                    return
+                continue
+            _, src, dst, num, action_type = ins
+            from_cards = zones[src]
+            if not from_cards:
+                continue
+            if action_type is ActionType.ORDER:
+                moved = from_cards[:num]
+                del from_cards[:num]
+            elif action_type is ActionType.RANDOM:
+                moved = bytes(rng.sample(from_cards, num)) if len(from_cards) > num else bytes(from_cards)
+                for card in moved:
+                    del from_cards[from_cards.find(card)]
+            else:
+                # SELECT 暂不支持，与 ActionEffect 一致跳过该动作
+                continue
+            zones[dst] += moved
+
+
+def benchmark(n: int = 100000):
+    """克隆开销对比：CompactState.clone 与 copy.deepcopy(GameState)"""
+    from data.v1 import get_all_cards
+
+    state = GameState(deck=list(get_all_cards()), rng=random.Random(0))
+    state.shuffle_deck()
+    for _ in range(5):
+        state.draw_card(state.player1)
+        state.draw_card(state.player2)
+    table = CardTable(get_all_cards())
+    compact = CompactState.from_game_state(state, table)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        compact.clone()
+    clone_cost = (time.perf_counter() - start) / n
+
+    rounds = max(1, n // 100)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        copy.deepcopy(state)
+    deepcopy_cost = (time.perf_counter() - start) / rounds
+
+    print("=== 状态克隆基准 ===")
+    print(f"CompactState.clone: {clone_cost * 1e6:8.2f} µs")
+    print(f"deepcopy(GameState): {deepcopy_cost * 1e6:8.2f} µs  ({deepcopy_cost / clone_cost:.0f}x)")
+
+
+if __name__ == "__main__":
+    benchmark()
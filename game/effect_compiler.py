@@ -0,0 +1,214 @@
+import operator
+import random
+import time
+from typing import Callable, Dict, Sequence, Tuple, Union
+
+from game.card import ActionEffect, ActionType, Card, CardEffect, GameZone, IfCondition, OperatorType
+from game.game_state import GameState
+from game.zone import Zone
+
+
+# 编译后的效果：接收并返回 GameState，语义与逐条解释执行 card.effects 完全一致
+CompiledEffect = Callable[[GameState], GameState]
+# 效果链中的一步：返回 False 表示 IF 条件不成立，中断当前效果链
+Step = Callable[[GameState], bool]
+
+
+# ==========================
+# 区域访问器
+# ==========================
+
+_ZONE_CARDS: Dict[GameZone, Callable[[GameState], Zone]] = {
+    GameZone.H: lambda s: s.deck,
+    GameZone.P1: lambda s: s.player1.hand,
+    GameZone.P2: lambda s: s.player2.hand,
+    GameZone.S1: lambda s: s.player1.score_zone,
+    GameZone.S2: lambda s: s.player2.score_zone,
+    GameZone.A: lambda s: s.discard_pile,
+}
+
+_ZONE_COUNT: Dict[GameZone, Callable[[GameState], int]] = {
+    zone: (lambda get: lambda s: len(get(s)))(get) for zone, get in _ZONE_CARDS.items()
+}
+
+_OPERATORS = {
+    OperatorType.GT: operator.gt,
+    OperatorType.GTE: operator.ge,
+    OperatorType.LT: operator.lt,
+    OperatorType.LTE: operator.le,
+    OperatorType.EQ: operator.eq,
+    OperatorType.NEQ: operator.ne,
+}
+
+
+# ==========================
+# 单条效果编译
+# ==========================
+
+def _compile_if(condition: IfCondition) -> Step:
+    op = _OPERATORS[condition.operator]
+    a, b = condition.operand_a, condition.operand_b
+    if isinstance(a, int) and isinstance(b, int):
+        result = op(a, b)
+        return lambda s: result
+    if isinstance(b, int):
+        count_a = _ZONE_COUNT[a]
+        return lambda s: op(count_a(s), b)
+    if isinstance(a, int):
+        count_b = _ZONE_COUNT[b]
+        return lambda s: op(a, count_b(s))
+    count_a, count_b = _ZONE_COUNT[a], _ZONE_COUNT[b]
+    return lambda s: op(count_a(s), count_b(s))
+
+
+def _compile_action(action: ActionEffect) -> Union[Step, None]:
+    """编译 ACTION；SELECT 暂不支持，编译为空（与 ActionEffect.execute 一致）"""
+    source = _ZONE_CARDS[action.from_zone]
+    target = _ZONE_CARDS[action.to_zone]
+    num = action.num
+
+    if action.action_type == ActionType.ORDER:
+        def step(s: GameState) -> bool:
+            from_cards = source(s)
+            if from_cards:
+                target(s).extend(from_cards.take_top(num))
+            return True
+        return step
+
+    if action.action_type == ActionType.RANDOM:
+        def step(s: GameState) -> bool:
+            from_cards = source(s)
+            if from_cards:
+                if len(from_cards) > num:
+                    moved = from_cards.sample(s.rng, num)
+                    for card in moved:
+                        from_cards.remove(card.id)
+                else:
+                    moved = from_cards.clear()
+                target(s).extend(moved)
+            return True
+        return step
+
+    return None
+
+
+def compile_chain(chain: CardEffect) -> Tuple[Step, ...]:
+    """将一条效果链编译为步骤序列"""
+    steps = []
+    is_condition = []
+    for effect in chain.effects:
+        if isinstance(effect, IfCondition):
+            steps.append(_compile_if(effect))
+            is_condition.append(True)
+        elif isinstance(effect, ActionEffect):
+            step = _compile_action(effect)
+            if step is not None:
+                steps.append(step)
+                is_condition.append(False)
+    # 末尾的 IF 之后已没有动作，条件无副作用，可以省略
+    while is_condition and is_condition[-1]:
+        steps.pop()
+        is_condition.pop()
+    return tuple(steps)
+
+
+def compile_effects(effects: Sequence[CardEffect]) -> CompiledEffect:
+    """将一张卡牌的全部效果链编译为单个可调用对象"""
+    chains = tuple(steps for steps in map(compile_chain, effects) if steps)
+
+    if not chains:
+        return lambda s: s
+
+    if len(chains) == 1:
+        (steps,) = chains
+
+        def run_single(s: GameState) -> GameState:
+            for step in steps:
+                if not step(s):
+                    break
+            return s
+        return run_single
+
+    def run_all(s: GameState) -> GameState:
+        for steps in chains:
+            for step in steps:
+                if not step(s):
+                    break
+        return s
+    return run_all
+
+
+# ==========================
+# 卡牌集编译缓存
+# ==========================
+
+# 卡牌 ID -> (编译时的 effects 列表, 编译结果)；effects 对象变化时重新编译
+_COMPILED: Dict[int, Tuple[Sequence[CardEffect], CompiledEffect]] = {}
+
+
+def compile_card_set(cards: Sequence[Card]):
+    """卡牌集加载时调用，预先编译所有卡牌的效果"""
+    for card in cards:
+        _COMPILED[card.id] = (card.effects, compile_effects(card.effects))
+
+
+def get_compiled(card: Card) -> CompiledEffect:
+    entry = _COMPILED.get(card.id)
+    if entry is None or entry[0] is not card.effects:
+        entry = _COMPILED[card.id] = (card.effects, compile_effects(card.effects))
+    return entry[1]
+
+
+def execute_card_effects(card: Card, game_state: GameState) -> GameState:
+    """执行卡牌效果（使用编译结果）"""
+    return get_compiled(card)(game_state)
+
+
+# ==========================
+# 基准测试
+# ==========================
+
+def _interpret(card: Card, game_state: GameState) -> GameState:
+    for effect in card.effects:
+        game_state = effect.execute(game_state)
+    return game_state
+
+
+def benchmark(rounds: int = 2000):
+    """对比解释执行与编译执行每张卡牌效果的耗时，并校验两者结果一致"""
+    from data import v0, v1
+    from game.compact import CardTable, CompactState
+    from game.rules import GameRoundManager
+
+    print("=== 效果编译基准（每次执行耗时） ===")
+    for name, module in (("v0", v0), ("v1", v1)):
+        cards = module.get_all_cards()
+        table = CardTable(cards)
+        starts = []
+        for seed in range(rounds):
+            manager = GameRoundManager(cards, verbose=False, seed=seed)
+            manager.initialize_game_state()
+            manager.deal_phase(seed % 7 + 1)
+            starts.append(CompactState.from_game_state(manager.state, table))
+
+        costs = {"interpreted": 0.0, "compiled": 0.0}
+        mismatches = 0
+        for card in cards:
+            outputs = []
+            for label, run in (("interpreted", lambda s: _interpret(card, s)), ("compiled", get_compiled(card))):
+                # 两种方式使用相同的初始状态与随机种子
+                states = [c.to_game_state(table, random.Random(i)) for i, c in enumerate(starts)]
+                begin = time.perf_counter()
+                for state in states:
+                    run(state)
+                costs[label] += (time.perf_counter() - begin) / rounds
+                outputs.append([CompactState.from_game_state(s, table) for s in states])
+            mismatches += sum(a != b for a, b in zip(*outputs))
+
+        interpreted, compiled = costs["interpreted"] / len(cards), costs["compiled"] / len(cards)
+        print(f"{name}: 解释 {interpreted * 1e6:6.2f} µs，编译 {compiled * 1e6:6.2f} µs，"
+              f"加速 {interpreted / compiled:.2f}x，结果不一致 {mismatches} 次")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,285 @@
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import IO, TYPE_CHECKING, Callable, ClassVar, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from game.card import Card
+from game.zone import Zone, ZoneListener
+
+if TYPE_CHECKING:
+    from game.game_state import GameState
+
+
+# 区域代号，顺序同 GameState.zones()
+ZONE_NAMES = ("H", "P1", "P2", "S1", "S2", "A")
+
+
+# ==========================
+# 事件类型
+# ==========================
+
+@dataclass(frozen=True)
+class GameEvent:
+    """游戏事件基类；round 为事件发生时的回合数"""
+    kind: ClassVar[str] = "event"
+    round: int
+
+    def to_dict(self) -> dict:
+        """可 JSON 序列化的字典，卡牌只保留 ID"""
+        data = {"kind": self.kind}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            data[f.name] = value.id if isinstance(value, Card) else value
+        return data
+
+
+@dataclass(frozen=True)
+class DealEvent(GameEvent):
+    """发牌完成"""
+    kind: ClassVar[str] = "deal"
+    initial_cards: int
+    hand_counts: Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class DrawEvent(GameEvent):
+    """准备阶段抽牌；牌库为空时 card 为 None"""
+    kind: ClassVar[str] = "draw"
+    player_id: str
+    card: Optional[Card]
+
+
+@dataclass(frozen=True)
+class PlayEvent(GameEvent):
+    """打出卡牌，role 为 main / counter / combo"""
+    kind: ClassVar[str] = "play"
+    player_id: str
+    card: Card
+    role: str
+
+
+@dataclass(frozen=True)
+class VerdictEvent(GameEvent):
+    """player_id 对 card 的释义/典故裁定结果"""
+    kind: ClassVar[str] = "verdict"
+    player_id: str
+    card: Card
+    meaning_ok: bool
+    story_ok: bool
+
+    @property
+    def success(self) -> bool:
+        return self.meaning_ok and self.story_ok
+
+
+@dataclass(frozen=True)
+class EffectEvent(GameEvent):
+    """卡牌进入弃牌区并触发效果"""
+    kind: ClassVar[str] = "effect"
+    card: Card
+
+
+@dataclass(frozen=True)
+class ZoneMoveEvent(GameEvent):
+    """卡牌移入某区域；source 为移出时所在区域（打出的牌为手牌区），未跟踪到移出时为 None"""
+    kind: ClassVar[str] = "zone_move"
+    card: Card
+    source: Optional[str]
+    target: str
+
+
+@dataclass(frozen=True)
+class GameOverEvent(GameEvent):
+    """游戏结束"""
+    kind: ClassVar[str] = "game_over"
+    winner: str
+    scores: Tuple[int, int]
+
+
+Handler = Callable[[GameEvent], None]
+
+
+# ==========================
+# 事件总线
+# ==========================
+
+class EventBus:
+    """游戏事件分发
+
+    没有订阅者时 active 为 False，规则代码据此跳过事件对象的创建，开销只有一次属性判断。
+    订阅时可用 kinds 只接收部分事件；区域移动事件只有在有订阅者需要时才会产生。
+    """
+
+    def __init__(self):
+        self._handlers: List[Tuple[Handler, Optional[FrozenSet[str]]]] = []
+        self.active = False
+
+    def subscribe(self, handler: Handler, kinds: Optional[Iterable[str]] = None) -> Handler:
+        self._handlers.append((handler, frozenset(kinds) if kinds is not None else None))
+        self.active = True
+        return handler
+
+    def unsubscribe(self, handler: Handler):
+        self._handlers = [(h, kinds) for h, kinds in self._handlers if h is not handler]
+        self.active = bool(self._handlers)
+
+    def wants(self, kind: str) -> bool:
+        return any(kinds is None or kind in kinds for _, kinds in self._handlers)
+
+    def emit(self, event: GameEvent):
+        kind = event.kind
+        for handler, kinds in self._handlers:
+            if kinds is None or kind in kinds:
+                handler(event)
+
+
+class ZoneMoveTracker:
+    """把区域监听器的插入/移除配对成 ZoneMoveEvent，通过 GameState.start_zone_events() 挂上"""
+
+    def __init__(self, bus: EventBus, state: 'GameState'):
+        self.bus = bus
+        self.state = state
+        self._in_flight: Dict[int, str] = {}   # 已移出、尚未进入新区域的卡牌 ID -> 来源区域
+        self.listeners = [_ZoneMoveListener(self, name) for name in ZONE_NAMES]
+
+
+class _ZoneMoveListener(ZoneListener):
+    __slots__ = ("tracker", "name")
+
+    def __init__(self, tracker: ZoneMoveTracker, name: str):
+        self.tracker = tracker
+        self.name = name
+
+    def on_insert(self, zone: Zone, card: Card, index: int):
+        tracker = self.tracker
+        source = tracker._in_flight.pop(card.id, None)
+        tracker.bus.emit(ZoneMoveEvent(tracker.state.round_count, card, source, self.name))
+
+    def on_remove(self, zone: Zone, card: Card, index: int):
+        self.tracker._in_flight[card.id] = self.name
+
+
+# ==========================
+# 订阅者
+# ==========================
+
+class ConsolePrinter:
+    """在控制台输出流程信息（即原先 verbose 模式的输出）"""
+
+    def __init__(self, stream: Optional[IO[str]] = None):
+        self.stream = stream
+
+    def __call__(self, event: GameEvent):
+        text = self.format(event)
+        if text is not None:
+            print(text, file=self.stream)
+
+    @staticmethod
+    def format(event: GameEvent) -> Optional[str]:
+        if isinstance(event, DrawEvent):
+            return f"\n[准备阶段] {event.player_id} 抽牌：{event.card}"
+        if isinstance(event, PlayEvent):
+            if event.role == "counter":
+                return f"[反击] {event.player_id} 使用 🛡️ {event.card.name} 进行反击"
+            if event.role == "combo":
+                return f"[连击] {event.player_id} 追加 ⚡ {event.card.name}"
+            return f"\n[主攻] {event.player_id} 打出 📄 {event.card.name}"
+        if isinstance(event, VerdictEvent):
+            if event.success:
+                return f"[判定✅] {event.card.name} 完全正确 → {event.player_id}得分"
+            return f"[判定❌] {'释义' if not event.meaning_ok else '典故'}错误 → {event.card.name} 进入弃牌区并触发效果"
+        if isinstance(event, EffectEvent):
+            return f"[效果🎯] {event.card.effect_description}"
+        if isinstance(event, DealEvent):
+            return (f"\n[发牌阶段] 每位玩家抽取{event.initial_cards}张初始手牌\n"
+                    f"[发牌完成] 玩家1手牌数：{event.hand_counts[0]}\n"
+                    f"[发牌完成] 玩家2手牌数：{event.hand_counts[1]}")
+        if isinstance(event, GameOverEvent):
+            return f"\n🎯 游戏结束！胜负判定中...\n🏆 胜者为：{event.winner}"
+        return None
+
+
+class RingBuffer:
+    """在内存中保留最近 maxlen 条事件"""
+
+    def __init__(self, maxlen: int = 1024):
+        self.events: deque = deque(maxlen=maxlen)
+
+    def __call__(self, event: GameEvent):
+        self.events.append(event)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def clear(self):
+        self.events.clear()
+
+
+class FileSink:
+    """以 JSON Lines 格式把事件写入文件"""
+
+    def __init__(self, file: Union[str, IO[str]]):
+        self._owns = isinstance(file, str)
+        self.file = open(file, "a", encoding="utf-8") if self._owns else file
+
+    def __call__(self, event: GameEvent):
+        self.file.write(json.dumps(event.to_dict(), ensure_ascii=False))
+        self.file.write("\n")
+
+    def close(self):
+        if self._owns:
+            self.file.close()
+
+
+# ==========================
+# 基准测试
+# ==========================
+
+def benchmark(n_games: int = 2000, card_set: str = "v1"):
+    """无订阅者 / 内存环形缓冲 / 含区域移动 / 控制台输出（重定向）四种情况下的模拟速度"""
+    import io
+    import random
+    from contextlib import redirect_stdout
+    # 以 python -m 运行时本模块是 __main__，需使用规则代码所用的同一份事件类型
+    from game import events
+    from game.catalogue import get_catalogue
+    from game.rules import GameRoundManager
+    from game.simulate import HeadlessJudge, RandomPolicy, play_game, random_outcome
+
+    catalogue = get_catalogue(card_set)
+
+    def run(setup: Callable[[GameRoundManager], None], games: int) -> float:
+        begin = time.perf_counter()
+        for seed in range(games):
+            rng = random.Random(seed)
+            manager = GameRoundManager(catalogue, HeadlessJudge(random_outcome(rng=rng)), verbose=False, seed=seed)
+            setup(manager)
+            play_game(manager, (RandomPolicy(rng=rng), RandomPolicy(rng=rng)))
+        return games / (time.perf_counter() - begin)
+
+    buffer = events.RingBuffer(256)
+    moves = events.RingBuffer(256)
+    sink = io.StringIO()
+    cases = [
+        ("无订阅者", lambda m: None, n_games),
+        ("环形缓冲", lambda m: m.subscribe(buffer, kinds=("draw", "play", "verdict", "effect", "game_over")), n_games),
+        ("环形缓冲 + 区域移动", lambda m: m.subscribe(moves), n_games),
+        ("控制台输出", lambda m: m.subscribe(events.ConsolePrinter(sink)), n_games),
+    ]
+    print(f"=== 游戏事件流 ({card_set}, {n_games} 局) ===")
+    base = None
+    for label, setup, games in cases:
+        with redirect_stdout(io.StringIO()):
+            rate = run(setup, games)
+        base = base or rate
+        print(f"{label:<16} {rate:9,.0f} 局/秒 ({rate / base:.0%})")
+    sample = [e.to_dict() for e in moves if isinstance(e, events.ZoneMoveEvent)][-3:]
+    print(f"最近的区域移动事件: {sample}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,20 +1,34 @@
 from dataclasses import dataclass, field
 import random
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from game.card import Card
+from game.events import EventBus, ZoneMoveTracker
+from game.journal import UndoJournal
 from game.player import Player
+from game.zobrist import DEFAULT_KEYS, ZobristHash, ZobristKeys
+from game.zone import ListenerGroup, Zone
 
 
 @dataclass
 class GameState:
     """游戏状态类，维护全局信息"""
-    deck: List[Card]                     # 牌库区
-    discard_pile: List[Card] = field(default_factory=list)
+    deck: Zone                           # 牌库区
+    discard_pile: Zone = field(default_factory=Zone)
     player1: Player = field(default_factory=lambda: Player("player1"))
     player2: Player = field(default_factory=lambda: Player("player2"))
     current_player_id: str = "player1"  # 当前轮到谁
     round_count: int = 1                # 当前回合数
+    rng: random.Random = field(default_factory=random.Random, repr=False, compare=False)  # 本局专用随机数生成器
+    journal: Optional[UndoJournal] = field(default=None, repr=False, compare=False)      # 撤销日志，未开启时为 None
+    zobrist: Optional[ZobristHash] = field(default=None, repr=False, compare=False)      # 局面哈希，未开启时为 None
+    moves: Optional[ZoneMoveTracker] = field(default=None, repr=False, compare=False)    # 区域移动事件，未开启时为 None
+
+    def __post_init__(self):
+        if not isinstance(self.deck, Zone):
+            self.deck = Zone(self.deck)
+        if not isinstance(self.discard_pile, Zone):
+            self.discard_pile = Zone(self.discard_pile)
 
     def reset(self, new_deck: Optional[List[Card]] = None):
         """重置游戏状态
@@ -23,8 +37,8 @@ class GameState:
             new_deck: 可选的新牌库，如果不提供则保持当前牌库
         """
         if new_deck is not None:
-            self.deck = new_deck
-        self.discard_pile = []
+            self.deck = Zone(new_deck)
+        self.discard_pile = Zone()
         self.player1 = Player("player1")
         self.player2 = Player("player2")
         self.current_player_id = "player1"
@@ -41,13 +55,79 @@ class GameState:
         """轮换玩家"""
         self.current_player_id = "player2" if self.current_player_id == "player1" else "player1"
         self.round_count += 1
+        if self.zobrist is not None:
+            self.zobrist.on_turn(self.round_count - 1, self.round_count)
+        if self.journal is not None:
+            self.journal.record(self._unswitch_turn)
+
+    def _unswitch_turn(self):
+        self.current_player_id = "player2" if self.current_player_id == "player1" else "player1"
+        self.round_count -= 1
+        if self.zobrist is not None:
+            self.zobrist.on_turn(self.round_count + 1, self.round_count)
+
+    def zones(self) -> Tuple[Zone, ...]:
+        """全部区域，顺序同 GameZone：牌库、双方手牌、双方得分区、弃牌区"""
+        return (self.deck, self.player1.hand, self.player2.hand,
+                self.player1.score_zone, self.player2.score_zone, self.discard_pile)
+
+    def start_journal(self) -> UndoJournal:
+        """开启撤销日志：之后的卡牌移动与换人都可以撤销（reset 会替换区域，需重新开启）"""
+        if self.journal is None:
+            self.journal = UndoJournal()
+            self._track_zones()
+        return self.journal
+
+    def stop_journal(self):
+        self.journal = None
+        self._track_zones()
+
+    def start_hashing(self, keys: ZobristKeys = DEFAULT_KEYS, include_round: bool = False) -> ZobristHash:
+        """开启增量局面哈希，当前值为 self.zobrist.value（reset 会替换区域，需重新开启）"""
+        if self.zobrist is None:
+            self.zobrist = ZobristHash(keys, include_round)
+            self.zobrist.reset(self)
+            self._track_zones()
+        return self.zobrist
+
+    def stop_hashing(self):
+        self.zobrist = None
+        self._track_zones()
+
+    def start_zone_events(self, bus: EventBus) -> ZoneMoveTracker:
+        """开始向 bus 发送区域移动事件（reset 会替换区域，需重新开启）"""
+        if self.moves is None or self.moves.bus is not bus:
+            self.moves = ZoneMoveTracker(bus, self)
+            self._track_zones()
+        return self.moves
+
+    def stop_zone_events(self):
+        self.moves = None
+        self._track_zones()
+
+    def _track_zones(self):
+        """按当前开启的撤销日志、局面哈希与区域事件重新设置各区域的监听器"""
+        for code, zone in enumerate(self.zones()):
+            listeners = []
+            if self.journal is not None:
+                listeners.append(self.journal)
+            if self.zobrist is not None:
+                listeners.append(self.zobrist.listeners[code])
+            if self.moves is not None:
+                listeners.append(self.moves.listeners[code])
+            if not listeners:
+                zone.untrack()
+            elif len(listeners) == 1:
+                zone.track(listeners[0])
+            else:
+                zone.track(ListenerGroup(listeners))
 
     def draw_card(self, player: Player) -> Optional[Card]:
         """从牌库抽一张牌到指定玩家手牌"""
-        if not self.deck:
+        card = self.deck.pop_top()
+        if card is None:
             return None
-        card = self.deck.pop(0)
-        player.draw_card(card)
+        player.hand.append(card)
         return card
 
     def move_to_discard(self, card: Card):
@@ -56,10 +136,11 @@ class GameState:
 
     def is_game_over(self, max_score: int = 10) -> bool:
         """判断是否达到胜利条件或牌库耗尽"""
+        # 热点路径：直接取区域长度，不经 Player.score_count()
         return (
-            self.player1.score_count() >= max_score
-            or self.player2.score_count() >= max_score
-            or len(self.deck) == 0
+            len(self.player1.score_zone) >= max_score
+            or len(self.player2.score_zone) >= max_score
+            or not self.deck
         )
 
     def get_zone_counts(self) -> Dict[str, int]:
@@ -75,7 +156,7 @@ class GameState:
 
     def shuffle_deck(self):
         """洗牌"""
-        random.shuffle(self.deck)
+        self.deck.shuffle(self.rng)
 
     def summary(self) -> str:
         """当前状态简报"""
@@ -87,11 +168,11 @@ class GameState:
         )
 
     def to_dict(self) -> dict:
-        """将游戏状态转换为字典格式"""
+        """将游戏状态转换为字典格式（卡牌只给出 ID，内容见卡牌目录）"""
         return {
             "deck_count": len(self.deck),
             "discard_count": len(self.discard_pile),
-            "discard_pile": [card.__dict__ for card in self.discard_pile],
+            "discard_pile": self.discard_pile.ids(),
             "turn_count": self.round_count,
             "current_player_id": self.current_player_id,
             "player1": self.player1.to_dict(),
@@ -0,0 +1,156 @@
+import copy
+import random
+import time
+from typing import TYPE_CHECKING, Callable, List, Tuple
+
+from game.zone import Zone, ZoneListener
+
+if TYPE_CHECKING:
+    from game.card import Card
+
+
+# ==========================
+# 撤销日志
+# ==========================
+
+class UndoJournal(ZoneListener):
+    """撤销日志：记录每次状态变化的逆操作，按相反顺序执行即可回到之前的局面
+
+    通过 GameState.start_journal() 挂到一局游戏上后，所有区域的卡牌移动
+    （抽牌、出牌、弃牌、得分、卡牌效果、洗牌）以及 switch_turn 都会被记录。
+    撤销的耗时与期间移动过的卡牌数成正比，与整局状态的大小无关。
+
+    随机数生成器的状态不在撤销范围内：撤销恢复的是局面，而不是随机数序列。
+
+    用法：
+        mark = journal.mark()
+        manager.run_one_turn(...)
+        journal.undo(mark)
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple] = []
+        self._undoing = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def mark(self) -> int:
+        """当前位置，之后可用 undo(mark) 撤销到这里"""
+        return len(self._entries)
+
+    def record(self, undo: Callable, *args):
+        """记录一条逆操作：撤销时调用 undo(*args)"""
+        if not self._undoing:
+            self._entries.append((undo, *args))
+
+    def undo(self, mark: int = 0):
+        """撤销到 mark 位置（默认撤销全部）"""
+        entries = self._entries
+        self._undoing = True
+        try:
+            while len(entries) > mark:
+                entry = entries.pop()
+                entry[0](*entry[1:])
+        finally:
+            self._undoing = False
+
+    def commit(self):
+        """丢弃已记录的内容（之后无法再撤销到此前的位置）"""
+        self._entries.clear()
+
+    # ---------- 区域监听 ----------
+
+    def on_insert(self, zone: Zone, card: 'Card', index: int):
+        if not self._undoing:
+            self._entries.append((zone.remove, card.id))
+
+    def on_remove(self, zone: Zone, card: 'Card', index: int):
+        if not self._undoing:
+            self._entries.append((zone.insert, index, card))
+
+    def on_reorder(self, zone: Zone, previous: List['Card']):
+        if not self._undoing:
+            self._entries.append((zone.reorder, previous))
+
+
+# ==========================
+# 基准测试
+# ==========================
+
+def benchmark(n_states: int = 2000, card_set: str = "v1"):
+    """典型回合的“执行 + 撤销”与“deepcopy + 执行”耗时对比，并校验撤销后局面完全复原"""
+    from game.catalogue import get_catalogue
+    from game.compact import CardTable, CompactState
+    from game.rules import GameRoundManager
+    from game.simulate import HeadlessJudge, RandomPolicy, random_outcome
+
+    catalogue = get_catalogue(card_set)
+    table = CardTable(catalogue.cards)
+
+    # 准备若干处于不同进度的对局及其下一回合的出牌
+    setups = []
+    for seed in range(n_states):
+        rng = random.Random(seed)
+        manager = GameRoundManager(catalogue, HeadlessJudge(random_outcome(rng=rng)), verbose=False, seed=seed)
+        manager.initialize_game_state()
+        manager.deal_phase()
+        policy = RandomPolicy(rng=rng)
+        for _ in range(seed % 4):
+            state = manager.state
+            main = policy.choose_main(state, state.get_current_player())
+            if main is None or state.is_game_over():
+                break
+            state.get_current_player().play_card(main.id)
+            manager.run_one_turn(main)
+        state = manager.state
+        if state.is_game_over():
+            continue
+        attacker, defender = state.get_current_player(), state.get_opponent_player()
+        main = policy.choose_main(state, attacker)
+        counters = defender.get_counter_cards()
+        response = counters[0] if counters else None
+        combo = next((c for c in attacker.hand if c.has_combo_effect() and c is not main), None)
+        setups.append((manager, main, response, None if response else combo))
+
+    def play(manager, main, response, combo):
+        state = manager.state
+        state.get_current_player().play_card(main.id)
+        if response:
+            state.get_opponent_player().play_card(response.id)
+        if combo:
+            state.get_current_player().play_card(combo.id)
+        manager.run_one_turn(main, response, combo)
+
+    # deepcopy：复制整局状态后在副本上执行
+    begin = time.perf_counter()
+    for manager, main, response, combo in setups:
+        original = manager.state
+        manager.state = copy.deepcopy(original)
+        play(manager, main, response, combo)
+        manager.state, manager.winner = original, None
+    deepcopy_cost = (time.perf_counter() - begin) / len(setups)
+
+    # 撤销日志：原地执行后撤销
+    before = [CompactState.from_game_state(m.state, table) for m, *_ in setups]
+    journals = [m.state.start_journal() for m, *_ in setups]
+    touched = 0
+    begin = time.perf_counter()
+    for (manager, main, response, combo), journal in zip(setups, journals):
+        mark = journal.mark()
+        play(manager, main, response, combo)
+        touched += len(journal) - mark
+        journal.undo(mark)
+    journal_cost = (time.perf_counter() - begin) / len(setups)
+    mismatches = sum(CompactState.from_game_state(m.state, table) != b or m.winner is not None
+                     for (m, *_), b in zip(setups, before))
+
+    print(f"=== 撤销日志基准 ({card_set}, {len(setups)} 个局面) ===")
+    print(f"deepcopy + 执行: {deepcopy_cost * 1e6:8.1f} µs/回合")
+    print(f"执行 + 撤销:     {journal_cost * 1e6:8.1f} µs/回合  "
+          f"({deepcopy_cost / journal_cost:.1f}x，平均每回合 {touched / len(setups):.1f} 条日志)")
+    print(f"撤销后局面不一致: {mismatches}")
+
+
+if __name__ == "__main__":
+    benchmark()
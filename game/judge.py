@@ -1,15 +1,38 @@
-from difflib import SequenceMatcher
+import random
+import time
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
 from  game.card import Card
+from game.matching import DEFAULT_CACHE, DEFAULT_ENGINE, VerdictCache, normalize_answer, normalize_target, score_group
+
+if TYPE_CHECKING:
+    from game.catalogue import CardCatalogue
+
+# 批量裁定时每个任务最多包含的作答数（大组拆开以便分到多个进程）
+BATCH_CHUNK = 256
+
+
+def match_score(user_input: str, target: str) -> float:
+    """作答与标准文本的相似度（0~1，同 difflib.SequenceMatcher.ratio），可在线程池或进程池中调用"""
+    return DEFAULT_ENGINE.score(user_input, target)
+
+
+def match_answer(user_input: str, target: str, threshold: float = 0.6) -> tuple[bool, float]:
+    """判断作答是否达到 threshold，返回 (是否通过, 精确得分)；得分可直接展示给玩家"""
+    return DEFAULT_ENGINE.match(user_input, target, threshold)
 
 
 class Judge:
     """裁定器：判断玩家描述是否符合成语释义/典故"""
 
-    def __init__(self, mode: str = "cli"):
+    def __init__(self, mode: str = "cli", cache: Optional[VerdictCache] = DEFAULT_CACHE):
         """
         mode: 'cli' 表示从命令行输入判断；'auto' 可接入 AI 判断或全自动模式。
+        cache: 裁定缓存，默认进程内共用；传入 None 则每次重新打分
         """
         self.mode = mode
+        self.cache = cache
 
     def judge_meaning(self, card: Card, player_id: str) -> bool:
         """
@@ -19,7 +42,7 @@ class Judge:
         """
         if self.mode == "cli":
             answer = input(f"🧠 [{player_id}] 请口述成语『{card.name}』的释义: ").strip()
-            return self._fuzzy_match(answer, card.meaning)
+            return self._judge_answer(card, "meaning", answer, card.meaning)
         elif self.mode == "auto":
             return True  # 后续可接 AI 模型判断
         else:
@@ -31,16 +54,155 @@ class Judge:
         """
         if self.mode == "cli":
             answer = input(f"📚 [{player_id}] 请简述『{card.name}』的典故: ").strip()
-            return self._fuzzy_match(answer, card.story)
+            return self._judge_answer(card, "story", answer, card.story)
         elif self.mode == "auto":
             return True
         else:
             raise ValueError("未知 Judge 模式")
 
+    def _judge_answer(self, card: Card, field: str, answer: str, target: str,
+                      threshold: float = 0.6) -> bool:
+        """
+        先查裁定缓存（按归一化作答），未命中再模糊匹配
+        """
+        if self.cache is None:
+            return self._fuzzy_match(answer, target, threshold)
+        ok, score = self.cache.lookup(card.id, field, answer, target, threshold)
+        print(f"🔍 匹配度: {score:.2f}")
+        return ok
+
     def _fuzzy_match(self, user_input: str, target: str, threshold: float = 0.6) -> bool:
         """
-        使用 difflib 进行模糊匹配
+        模糊匹配，结果与 difflib.SequenceMatcher 一致（见 game/matching.py）
         """
-        score = SequenceMatcher(None, user_input, target).ratio()
+        ok, score = match_answer(user_input, target, threshold)
         print(f"🔍 匹配度: {score:.2f}")
-        return score >= threshold
+        return ok
+
+    def judge_batch(self,
+                    items: Sequence[Tuple[int, str]],
+                    field: str = "meaning",
+                    threshold: float = 0.6,
+                    catalogue: Optional['CardCatalogue'] = None,
+                    executor: Optional[Executor] = None,
+                    exact: bool = True) -> List[Tuple[bool, Optional[float]]]:
+        """
+        批量裁定：items 为 (卡牌 ID, 作答) 序列，按输入顺序返回 (是否通过, 得分)
+        作答按卡牌分组，每组的标准文本只预处理一次，相同作答只打分一次；
+        传入 executor 时各组（大组拆成 BATCH_CHUNK 条一份）分发到线程池/进程池。
+        得分为精确相似度；exact=False 时被上界淘汰的作答不做完整匹配，得分为 None
+        （错误作答居多时更快，作答大多接近标准文本时上界反而是额外开销）。
+        启用缓存时与 _judge_answer 一样按归一化作答打分并读写缓存，缓存中只存精确得分。
+        """
+        if field not in ("meaning", "story"):
+            raise ValueError(f"未知字段: {field}")
+        if catalogue is None:
+            from game.catalogue import get_catalogue
+            catalogue = get_catalogue("v1")
+        cache = self.cache
+
+        results: List[Optional[Tuple[bool, float]]] = [None] * len(items)
+        # 卡牌 ID -> 作答 -> 所在下标
+        groups: Dict[int, Dict[str, List[int]]] = {}
+        for i, (card_id, answer) in enumerate(items):
+            if card_id not in catalogue:
+                raise ValueError(f"未知卡牌: {card_id}")
+            if cache is not None:
+                answer = normalize_answer(answer)
+            groups.setdefault(card_id, {}).setdefault(answer, []).append(i)
+
+        tasks = []
+        for card_id, answers in groups.items():
+            target = getattr(catalogue.get(card_id), field)
+            if cache is not None:
+                target = normalize_target(target)
+            pending = []
+            for answer, indices in answers.items():
+                value = cache.get((card_id, field, answer, threshold)) if cache is not None else None
+                if value is None:
+                    pending.append(answer)
+                else:
+                    for i in indices:
+                        results[i] = value
+            for start in range(0, len(pending), BATCH_CHUNK):
+                tasks.append((card_id, target, pending[start:start + BATCH_CHUNK]))
+
+        if executor is None:
+            scored = [score_group(target, answers, threshold, exact) for _, target, answers in tasks]
+        else:
+            futures = [executor.submit(score_group, target, answers, threshold, exact)
+                       for _, target, answers in tasks]
+            scored = [future.result() for future in futures]
+
+        for (card_id, _, answers), values in zip(tasks, scored):
+            for answer, value in zip(answers, values):
+                if cache is not None and value[1] is not None:
+                    cache.put((card_id, field, answer, threshold), value)
+                for i in groups[card_id][answer]:
+                    results[i] = value
+        return results
+
+
+# ==========================
+# 基准测试
+# ==========================
+
+def benchmark(students: int = 40, card_set: str = "v1"):
+    """全班对每张卡牌作答：逐条调用模糊匹配 vs 批量裁定（单进程 / 进程池）"""
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from game.catalogue import get_catalogue
+    from game.matching import VerdictCache
+
+    catalogue = get_catalogue(card_set)
+    rng = random.Random(0)
+    items = []
+    for card in catalogue:
+        for _ in range(students):
+            text = card.meaning
+            cut = rng.randrange(len(text) // 2, len(text) + 1)
+            items.append((card.id, text[rng.randrange(0, 4):cut] + rng.choice(["", "。", "的意思"])))
+    rng.shuffle(items)
+
+    begin = time.perf_counter()
+    serial = [match_answer(answer, catalogue.get(card_id).meaning) for card_id, answer in items]
+    serial_cost = time.perf_counter() - begin
+
+    judge = Judge(mode="auto", cache=None)
+    begin = time.perf_counter()
+    batch = judge.judge_batch(items, catalogue=catalogue)
+    batch_cost = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    verdicts = judge.judge_batch(items, catalogue=catalogue, exact=False)
+    verdict_cost = time.perf_counter() - begin
+
+    cached = Judge(mode="auto", cache=VerdictCache())
+    begin = time.perf_counter()
+    cached.judge_batch(items, catalogue=catalogue)
+    cached_cost = time.perf_counter() - begin
+
+    workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool:
+        pool.submit(score_group, "", []).result()
+        begin = time.perf_counter()
+        pooled = judge.judge_batch(items, catalogue=catalogue, executor=pool)
+        pool_cost = time.perf_counter() - begin
+
+    print(f"=== 批量裁定 ({len(catalogue)} 张卡牌 x {students} 名学生 = {len(items)} 条作答) ===")
+    print(f"逐条模糊匹配:         {serial_cost * 1e3:7.1f} ms")
+    print(f"批量（无缓存）:       {batch_cost * 1e3:7.1f} ms  结果一致: {batch == serial}")
+    print(f"批量（只判定）:       {verdict_cost * 1e3:7.1f} ms  结果一致: {_agrees(verdicts, serial)}，"
+          f"上界淘汰 {sum(score is None for _, score in verdicts)} 条")
+    print(f"批量（归一化 + 缓存）: {cached_cost * 1e3:7.1f} ms")
+    print(f"批量 + 进程池 x{workers}:    {pool_cost * 1e3:7.1f} ms  结果一致: {pooled == serial}")
+
+
+def _agrees(batch: List[Tuple[bool, Optional[float]]], exact: List[Tuple[bool, float]]) -> bool:
+    """判定结果全部相同，且给出的得分都是精确得分（被淘汰的作答得分为 None）"""
+    return all(ok == expected_ok and (score is None or score == expected)
+               for (ok, score), (expected_ok, expected) in zip(batch, exact))
+
+
+if __name__ == "__main__":
+    benchmark()
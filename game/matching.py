@@ -0,0 +1,377 @@
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# ==========================
+# 标准文本预处理
+# ==========================
+
+class TargetProfile:
+    """一条标准文本（释义或典故）的预处理结果，建立一次后反复使用
+
+    得分与 SequenceMatcher(None, answer, target).ratio() 完全一致：
+    相似度 = 2M / (len(answer) + len(target))，M 为匹配的字符数。
+    打分前依次用三个上界提前淘汰：
+    1. 长度上界：M <= min(两者长度)
+    2. 字符计数上界：M <= 两者字符多重集交集的大小
+    3. 最长公共子序列上界：匹配块构成公共子序列，故 M <= LCS，
+       LCS 用预先建好的每字符位掩码按位并行计算，每个作答字符只需几次整数运算
+    只有通过上界的作答才做完整匹配；完整匹配复用目标字符索引（b2j）：每个线程为每条标准文本
+    保留一个 SequenceMatcher，set_seq2 只调用一次，之后每个作答只调用 set_seq1。
+    """
+    __slots__ = ("text", "length", "counts", "masks", "_full", "_local")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.length = len(text)
+        self.counts: Dict[str, int] = Counter(text)
+        self.masks: Dict[str, int] = {}
+        for i, ch in enumerate(text):
+            self.masks[ch] = self.masks.get(ch, 0) | (1 << i)
+        self._full = (1 << self.length) - 1
+        # SequenceMatcher 打分时会修改自身，判题线程池中的线程各用各的
+        self._local = threading.local()
+
+    def _matcher(self, answer: str) -> SequenceMatcher:
+        matcher = getattr(self._local, "matcher", None)
+        if matcher is None:
+            matcher = self._local.matcher = SequenceMatcher(None, answer, self.text)
+        else:
+            matcher.set_seq1(answer)
+        return matcher
+
+    def lcs(self, answer: str) -> int:
+        """与标准文本的最长公共子序列长度（Allison-Dix 位并行算法）"""
+        full = self._full
+        masks = self.masks
+        v = full
+        for ch in answer:
+            m = masks.get(ch)
+            if m:
+                u = v & m
+                v = ((v + u) | (v - u)) & full
+        return self.length - v.bit_count()
+
+    def score(self, answer: str) -> float:
+        """精确相似度"""
+        total = len(answer) + self.length
+        if not total:
+            return 1.0
+        if answer == self.text:
+            return 1.0
+        return self._matcher(answer).ratio()
+
+    def upper_bound(self, answer: str, threshold: float = 1.0) -> float:
+        """相似度上界；逐级收紧，某一级已低于 threshold 时立即返回"""
+        total = len(answer) + self.length
+        if not total:
+            return 1.0
+        bound = 2.0 * min(len(answer), self.length) / total
+        if bound < threshold:
+            return bound
+        counts = self.counts
+        common = 0
+        for ch, n in Counter(answer).items():
+            m = counts.get(ch)
+            if m:
+                common += n if n < m else m
+        bound = 2.0 * common / total
+        if bound < threshold:
+            return bound
+        return 2.0 * self.lcs(answer) / total
+
+    def match(self, answer: str, threshold: float = 0.6, exact: bool = True) -> Tuple[bool, Optional[float]]:
+        """判断相似度是否达到 threshold，返回 (是否通过, 得分)
+
+        exact=True 时得分总是精确相似度，可直接展示给玩家；只需要判定结果时传 exact=False，
+        被上界淘汰的作答不做完整匹配，得分为 None（上界不是相似度，不作为得分返回）。
+        """
+        if answer == self.text:
+            return True, 1.0
+        if not exact and self.upper_bound(answer, threshold) < threshold:
+            return False, None
+        score = self._matcher(answer).ratio()
+        return score >= threshold, score
+
+
+class MatchEngine:
+    """按标准文本缓存 TargetProfile 的打分引擎，同一进程内共用一个即可"""
+
+    def __init__(self):
+        self._profiles: Dict[str, TargetProfile] = {}
+
+    def profile(self, target: str) -> TargetProfile:
+        profile = self._profiles.get(target)
+        if profile is None:
+            profile = self._profiles[target] = TargetProfile(target)
+        return profile
+
+    def prepare(self, cards) -> int:
+        """为一组卡牌的释义与典故预先建立 profile，返回 profile 数"""
+        for card in cards:
+            self.profile(card.meaning)
+            self.profile(card.story)
+        return len(self._profiles)
+
+    def score(self, answer: str, target: str) -> float:
+        return self.profile(target).score(answer)
+
+    def match(self, answer: str, target: str, threshold: float = 0.6,
+              exact: bool = True) -> Tuple[bool, Optional[float]]:
+        return self.profile(target).match(answer, threshold, exact)
+
+
+DEFAULT_ENGINE = MatchEngine()
+
+
+def score_group(target: str, answers: List[str], threshold: float = 0.6,
+                exact: bool = True) -> List[Tuple[bool, Optional[float]]]:
+    """同一标准文本的一组作答批量打分（profile 只取一次），可提交到进程池
+
+    exact=False 时只保证判定结果，被上界淘汰的作答得分为 None（同 TargetProfile.match）。
+    """
+    profile = DEFAULT_ENGINE.profile(target)
+    return [profile.match(answer, threshold, exact) if answer else (False, 0.0) for answer in answers]
+
+
+# ==========================
+# 裁定缓存
+# ==========================
+
+# 空白、标点及其他非文字字符
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_answer(text: str) -> str:
+    """作答归一化：全角转半角（NFKC），去掉空白与标点符号"""
+    return _NON_WORD.sub("", unicodedata.normalize("NFKC", text))
+
+
+@lru_cache(maxsize=1024)
+def normalize_target(text: str) -> str:
+    """标准文本的归一化结果（卡牌数量有限，直接缓存）"""
+    return normalize_answer(text)
+
+
+class VerdictCache:
+    """有界 LRU 裁定缓存：(卡牌 ID, 字段, 归一化作答, 阈值) -> (是否通过, 得分)
+
+    命中时作答无需重新打分。缓存的结果是归一化后的作答与归一化后的标准文本
+    的匹配结果，因此只在空白、标点或全角/半角上不同的作答得到相同裁定。
+    可在多线程中共用；同一进程内所有房间共用 DEFAULT_CACHE。
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[Tuple, Tuple[bool, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(card_id: int, field: str, answer: str, threshold: float = 0.6) -> Tuple:
+        return card_id, field, normalize_answer(answer), threshold
+
+    def get(self, key: Tuple) -> Optional[Tuple[bool, float]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple, value: Tuple[bool, float]):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def lookup(self, card_id: int, field: str, answer: str, target: str,
+               threshold: float = 0.6,
+               match: Optional[Callable[[str, str, float], Tuple[bool, float]]] = None) -> Tuple[bool, float]:
+        """查缓存，未命中时用 match（默认 DEFAULT_ENGINE.match）为归一化后的作答打分并写入"""
+        key = self.key(card_id, field, answer, threshold)
+        value = self.get(key)
+        if value is None:
+            normalized = key[2]
+            if normalized:
+                value = (match or DEFAULT_ENGINE.match)(normalized, normalize_target(target), threshold)
+            else:
+                value = (False, 0.0)
+            self.put(key, value)
+        return value
+
+    def resize(self, maxsize: int):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _evict(self):
+        entries = self._entries
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+
+DEFAULT_CACHE = VerdictCache()
+
+
+# ==========================
+# 一致性与基准测试
+# ==========================
+
+def _answers(cards, rng: random.Random) -> List[Tuple[str, str]]:
+    """为每张卡牌生成各类典型作答：原文、截断、删改、打乱、换卡、空白、冗长"""
+    samples = []
+    for card in cards:
+        for target in (card.meaning, card.story):
+            chars = list(target)
+            other = rng.choice(cards)
+            samples.append((target, target))
+            samples.append((target[: max(1, len(target) * 2 // 3)], target))
+            samples.append((target[: max(1, len(target) // 3)], target))
+            samples.append(("".join(c for c in chars if rng.random() > 0.3), target))
+            samples.append(("".join(c if rng.random() > 0.2 else "的" for c in chars), target))
+            shuffled = chars[:]
+            rng.shuffle(shuffled)
+            samples.append(("".join(shuffled), target))
+            samples.append((other.meaning, target))
+            samples.append((other.story + card.name, target))
+            samples.append(("", target))
+            samples.append((card.name + "，" + target + "。" + other.story * 3, target))
+    return samples
+
+
+def benchmark(repeat: int = 20, threshold: float = 0.6):
+    """与 difflib 原始打分对比：判定一致性与单次打分延迟（v0 + v1 全部卡牌）"""
+    from data import v0, v1
+
+    cards = list(v0.CATALOGUE.cards) + list(v1.CATALOGUE.cards)
+    samples = _answers(cards, random.Random(0))
+
+    engine = MatchEngine()
+    begin = time.perf_counter()
+    profiles = engine.prepare(cards)
+    prepare_cost = time.perf_counter() - begin
+
+    verdict_diff = score_diff = pruned = 0
+    for answer, target in samples:
+        expected = SequenceMatcher(None, answer, target).ratio()
+        ok, score = engine.match(answer, target, threshold)
+        verdict_diff += ok != (expected >= threshold)
+        score_diff += score != expected
+        fast_ok, fast_score = engine.match(answer, target, threshold, exact=False)
+        verdict_diff += fast_ok != ok
+        score_diff += fast_score is not None and fast_score != expected
+        pruned += fast_score is None
+        score_diff += engine.score(answer, target) != expected
+
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        for answer, target in samples:
+            SequenceMatcher(None, answer, target).ratio() >= threshold
+    baseline = (time.perf_counter() - begin) / (repeat * len(samples))
+
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        for answer, target in samples:
+            engine.match(answer, target, threshold)
+    exact = (time.perf_counter() - begin) / (repeat * len(samples))
+
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        for answer, target in samples:
+            engine.match(answer, target, threshold, exact=False)
+    fast = (time.perf_counter() - begin) / (repeat * len(samples))
+
+    print(f"=== 模糊匹配 ({len(cards)} 张卡牌，{profiles} 条标准文本，{len(samples)} 条作答) ===")
+    print(f"预处理耗时: {prepare_cost * 1e3:.2f} ms")
+    print(f"判定不一致: {verdict_diff}，精确得分不一致: {score_diff}")
+    print(f"difflib 原始打分: {baseline * 1e6:7.1f} µs/次")
+    print(f"预处理 + 精确得分: {exact * 1e6:7.1f} µs/次 （{baseline / exact:.1f}x）")
+    print(f"预处理 + 上界淘汰（只判定）: {fast * 1e6:7.1f} µs/次 （{baseline / fast:.1f}x，"
+          f"上界淘汰 {pruned / len(samples):.0%}）")
+
+
+def _classroom(cards, students: int, rng: random.Random) -> List[Tuple[object, str, str, str]]:
+    """课堂场景：每张卡牌有少数几种常见说法，学生提交时只在空白、标点、全角上有差异"""
+    half = {chr(c): chr(c + 0xFEE0) for c in range(0x21, 0x7F)}
+    submissions = []
+    for card in cards:
+        for field, target in (("meaning", card.meaning), ("story", card.story)):
+            phrasings = [target, target[: len(target) * 2 // 3], target[len(target) // 4:], card.name]
+            for _ in range(students):
+                text = list(rng.choice(phrasings))
+                if rng.random() < 0.3:
+                    text.insert(rng.randrange(len(text) + 1), rng.choice(" ，。！"))
+                if rng.random() < 0.3:
+                    text = [half.get(ch, ch) if ch.isascii() else ch for ch in text]
+                submissions.append((card, field, "".join(text), target))
+    rng.shuffle(submissions)
+    return submissions
+
+
+def cache_benchmark(students: int = 30, maxsize: int = 4096):
+    """课堂场景下裁定缓存的命中率与平均每次裁定耗时"""
+    from data import v1
+
+    cards = list(v1.CATALOGUE.cards)
+    submissions = _classroom(cards, students, random.Random(0))
+    engine = MatchEngine()
+    engine.prepare(cards)
+
+    begin = time.perf_counter()
+    for card, field, answer, target in submissions:
+        engine.match(answer, target)
+    uncached = (time.perf_counter() - begin) / len(submissions)
+
+    cache = VerdictCache(maxsize)
+    begin = time.perf_counter()
+    for card, field, answer, target in submissions:
+        cache.lookup(card.id, field, answer, target, match=engine.match)
+    cached = (time.perf_counter() - begin) / len(submissions)
+
+    small = VerdictCache(64)
+    for card, field, answer, target in submissions:
+        small.lookup(card.id, field, answer, target, match=engine.match)
+
+    stats = cache.stats()
+    print(f"=== 裁定缓存 ({len(cards)} 张卡牌 x 2 字段 x {students} 名学生 = {len(submissions)} 次作答) ===")
+    print(f"无缓存: {uncached * 1e6:7.1f} µs/次")
+    print(f"有缓存: {cached * 1e6:7.1f} µs/次 ({uncached / cached:.1f}x)  "
+          f"命中 {stats['hits']} / 未命中 {stats['misses']} (命中率 {stats['hit_rate']:.1%})，条目 {stats['size']}")
+    print(f"容量 64 时: 命中率 {small.stats()['hit_rate']:.1%}，淘汰 {small.evictions}")
+
+
+if __name__ == "__main__":
+    benchmark()
+    cache_benchmark()
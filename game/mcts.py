@@ -0,0 +1,411 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from game.card import Card, CardType
+from game.compact import H, P1, CardTable, CompactState
+from game.game_state import GameState
+from game.judge import Judge
+from game.player import Player
+from game.simulate import Policy
+
+
+# 决策类型
+MAIN, COUNTER, COMBO = "main", "counter", "combo"
+# 动作 -1：不出牌（放弃反击/连击，或无牌可出）
+PASS = -1
+
+
+# ==========================
+# 配置与统计
+# ==========================
+
+@dataclass(frozen=True)
+class MCTSConfig:
+    """搜索参数，rollouts 与 time_limit 至少设置一个，先达到者停止
+
+    裁定正确率与反击/连击概率用于模拟双方的后续行为。
+    """
+    rollouts: Optional[int] = 1000
+    time_limit: Optional[float] = None      # 秒
+    exploration: float = 0.7
+    meaning_rate: float = 0.5
+    story_rate: float = 0.5
+    counter_rate: float = 0.5
+    combo_rate: float = 0.5
+    max_rounds: int = 500
+
+    def __post_init__(self):
+        # 两者都未设置时搜索不会停止
+        if self.rollouts is None and self.time_limit is None:
+            raise ValueError("rollouts 与 time_limit 至少设置一个")
+        if self.rollouts is not None and self.rollouts <= 0:
+            raise ValueError(f"rollouts 必须为正数: {self.rollouts}")
+        if self.time_limit is not None and self.time_limit <= 0:
+            raise ValueError(f"time_limit 必须为正数: {self.time_limit}")
+
+
+@dataclass
+class DecisionStats:
+    """最近一次决策的搜索统计"""
+    kind: str
+    rollouts: int
+    elapsed: float
+    children: Dict[int, Tuple[int, int]] = field(default_factory=dict)   # 卡牌 ID（-1 为放弃）-> (访问次数, 胜局)
+
+    def rollouts_per_second(self) -> float:
+        return self.rollouts / self.elapsed if self.elapsed else 0.0
+
+
+# ==========================
+# 搜索树（单观察者 ISMCTS）
+# ==========================
+
+class _Node:
+    """搜索树节点；player 为走出这一步的玩家，胜负按其视角统计"""
+    __slots__ = ("player", "children", "visits", "wins", "avails")
+
+    def __init__(self, player: int):
+        self.player = player
+        self.children: Dict[int, '_Node'] = {}
+        self.visits = 0
+        self.wins = 0
+        self.avails = 1
+
+
+class _Search:
+    """在 CompactState 上进行的一次搜索
+
+    每次迭代先为观察者重新抽样不可见信息（对手手牌与牌库顺序），再沿树选择、
+    扩展一步，之后用随机策略模拟到终局。树的每一层是某一方的主攻选择，
+    子节点按“在本次抽样中是否可选”统计可用次数（ISMCTS 的 UCB 变体）。
+    """
+
+    def __init__(self, table: CardTable, config: MCTSConfig, rng: random.Random):
+        self.table = table
+        self.config = config
+        self.rng = rng
+        self.success_rate = config.meaning_rate * config.story_rate
+        self.is_counter = [t == CardType.COUNTER for t in table.types]
+        self.is_combo = [t == CardType.COMBO for t in table.types]
+
+    def run(self, root_state: CompactState, observer: int, kind: str,
+            actions: Sequence[int], main: int = PASS) -> Tuple[Dict[int, Tuple[int, int]], int]:
+        config = self.config
+        deadline = time.perf_counter() + config.time_limit if config.time_limit else None
+        root = _Node(observer ^ 1)
+        iterations = 0
+        while True:
+            if config.rollouts is not None and iterations >= config.rollouts:
+                break
+            if deadline is not None and iterations and time.perf_counter() >= deadline:
+                break
+            self._iterate(root, root_state, observer, kind, actions, main)
+            iterations += 1
+        return {action: (child.visits, child.wins) for action, child in root.children.items()}, iterations
+
+    def _iterate(self, root: _Node, root_state: CompactState, observer: int, kind: str,
+                 actions: Sequence[int], main: int):
+        state = self._determinize(root_state, observer)
+        action, node, expanded = self._select(root, actions, observer)
+        path = [node]
+        if kind == MAIN:
+            self._play_turn(state, action)
+        elif kind == COUNTER:
+            self._finish_turn(state, main, response=action)
+        else:
+            self._finish_turn(state, main, response=PASS, combo=action)
+
+        max_rounds = self.config.max_rounds
+        while not expanded and not state.is_game_over() and state.round_count <= max_rounds:
+            player = state.current
+            legal = sorted(set(state.hand(player))) or [PASS]
+            action, node, expanded = self._select(node, legal, player)
+            path.append(node)
+            self._play_turn(state, action)
+
+        while not state.is_game_over() and state.round_count <= max_rounds:
+            hand = state.hand(state.current)
+            self._play_turn(state, hand[self.rng.randrange(len(hand))] if hand else PASS)
+
+        winner = state.winner()
+        root.visits += 1
+        for node in path:
+            node.visits += 1
+            if node.player == winner:
+                node.wins += 1
+
+    def _select(self, node: _Node, legal: Sequence[int], player: int) -> Tuple[int, _Node, bool]:
+        """返回 (动作, 子节点, 是否新扩展)"""
+        children = node.children
+        untried = [action for action in legal if action not in children]
+        for action in legal:
+            child = children.get(action)
+            if child is not None:
+                child.avails += 1
+        if untried:
+            action = untried[self.rng.randrange(len(untried))]
+            child = children[action] = _Node(player)
+            return action, child, True
+
+        c = self.config.exploration
+        best, best_score = None, -1.0
+        for action in legal:
+            child = children[action]
+            score = child.wins / child.visits + c * math.sqrt(math.log(child.avails) / child.visits)
+            if score > best_score:
+                best, best_score = action, score
+        return best, children[best], False
+
+    def _determinize(self, root_state: CompactState, observer: int) -> CompactState:
+        """重新抽样观察者看不到的信息：对手手牌与牌库顺序"""
+        state = root_state.clone()
+        zones = state.zones
+        opponent = P1 + (observer ^ 1)
+        hidden = list(zones[opponent] + zones[H])
+        self.rng.shuffle(hidden)
+        n = len(zones[opponent])
+        zones[opponent] = bytearray(hidden[:n])
+        zones[H] = bytearray(hidden[n:])
+        return state
+
+    # ---------- 模拟 ----------
+
+    def _play_turn(self, state: CompactState, main: int):
+        """当前玩家打出 main（-1 表示无牌可出，直接换人抽牌）并完成本回合"""
+        if main < 0:
+            state.switch_turn()
+            state.draw(state.current)
+            return
+        state.play(state.current, main)
+        self._finish_turn(state, main)
+
+    def _finish_turn(self, state: CompactState, main: int,
+                     response: Optional[int] = None, combo: Optional[int] = None):
+        """主攻已打出后完成本回合；response/combo 为 None 时按模拟策略决定"""
+        rng, config = self.rng, self.config
+        attacker = state.current
+        defender = attacker ^ 1
+        if response is None:
+            response = self._maybe_pick(state.hand(defender), self.is_counter, config.counter_rate)
+        if response >= 0:
+            state.play(defender, response)
+            combo = PASS
+        else:
+            if combo is None:
+                combo = self._maybe_pick(state.hand(attacker), self.is_combo, config.combo_rate)
+            if combo >= 0:
+                state.play(attacker, combo)
+        rate = self.success_rate
+        verdicts = (rng.random() < rate, rng.random() < rate)
+        state.run_one_turn(self.table, main, response, combo, verdicts, rng)
+
+    def _maybe_pick(self, hand: bytearray, allowed: List[bool], rate: float) -> int:
+        options = [card for card in hand if allowed[card]]
+        if not options or self.rng.random() >= rate:
+            return PASS
+        return options[self.rng.randrange(len(options))]
+
+
+# 工作进程内按卡牌集缓存 CardTable
+_TABLES: Dict[Tuple[int, ...], CardTable] = {}
+
+
+def _table_for(cards: Sequence[Card]) -> CardTable:
+    key = tuple(card.id for card in cards)
+    table = _TABLES.get(key)
+    if table is None:
+        table = _TABLES[key] = CardTable(cards)
+    return table
+
+
+def _search_task(cards: Sequence[Card], root: CompactState, observer: int, kind: str,
+                 actions: Sequence[int], main: int, config: MCTSConfig,
+                 seed: int) -> Tuple[Dict[int, Tuple[int, int]], int]:
+    """线程/进程池任务：独立建树搜索，返回根节点各动作的统计"""
+    search = _Search(_table_for(cards), config, random.Random(seed))
+    return search.run(root, observer, kind, actions, main)
+
+
+# ==========================
+# 自动玩家
+# ==========================
+
+class MCTSPlayer(Policy):
+    """蒙特卡洛树搜索自动玩家，可作为 simulate.Policy 使用
+
+    executor: 可选的线程池或进程池；设置后把搜索预算分成 workers 份并行建树，
+    再合并根节点统计（根并行）。进程池才能绕过 GIL 真正并行。
+    """
+
+    def __init__(self,
+                 config: MCTSConfig = MCTSConfig(),
+                 rng: Optional[random.Random] = None,
+                 executor: Optional[Executor] = None,
+                 workers: int = 1):
+        self.config = config
+        self.rng = rng or random.Random()
+        self.executor = executor
+        self.workers = max(1, workers)
+        self.last_stats: Optional[DecisionStats] = None
+        self._main: Optional[Card] = None
+
+    def choose_main(self, state: GameState, player: Player) -> Optional[Card]:
+        cards = list(player.hand)
+        self._main = None
+        if not cards:
+            return None
+        card = self._decide(state, player, MAIN, cards) if len(cards) > 1 else cards[0]
+        self._main = card
+        return card
+
+    def choose_counter(self, state: GameState, player: Player, attack_card: Card) -> Optional[Card]:
+        counters = player.get_counter_cards()
+        if not counters:
+            return None
+        return self._decide(state, player, COUNTER, counters, attack_card)
+
+    def choose_combo(self, state: GameState, player: Player) -> Optional[Card]:
+        combos = player.get_combo_cards()
+        if not combos or self._main is None:
+            return None
+        return self._decide(state, player, COMBO, combos, self._main)
+
+    def _decide(self, state: GameState, player: Player, kind: str,
+                options: List[Card], main: Optional[Card] = None) -> Optional[Card]:
+        started = time.perf_counter()
+        cards = {card.id: card for zone in state.zones() for card in zone}
+        if main is not None:
+            cards[main.id] = main
+        table = _table_for(sorted(cards.values(), key=lambda card: card.id))
+        root = CompactState.from_game_state(state, table)
+        observer = 0 if player.player_id == "player1" else 1
+        actions = [table.index[card.id] for card in options]
+        if kind != MAIN:
+            actions.insert(0, PASS)
+        main_index = table.index[main.id] if main is not None else PASS
+
+        children: Dict[int, Tuple[int, int]] = {}
+        total = 0
+        for result, iterations in self._run(table, root, observer, kind, actions, main_index):
+            total += iterations
+            for action, (visits, wins) in result.items():
+                v, w = children.get(action, (0, 0))
+                children[action] = (v + visits, w + wins)
+
+        best = max(actions, key=lambda a: (children.get(a, (0, 0))[0], children.get(a, (0, 1))[1]))
+        self.last_stats = DecisionStats(
+            kind, total, time.perf_counter() - started,
+            {(table.cards[a].id if a >= 0 else PASS): stats for a, stats in children.items()},
+        )
+        return table.cards[best] if best >= 0 else None
+
+    def _run(self, table: CardTable, root: CompactState, observer: int, kind: str,
+             actions: List[int], main: int):
+        seeds = [self.rng.getrandbits(32) for _ in range(self.workers)]
+        if self.executor is None or self.workers == 1:
+            return [_search_task(table.cards, root, observer, kind, actions, main, self.config, seeds[0])]
+        config = self.config
+        if config.rollouts is not None:
+            config = replace(config, rollouts=-(-config.rollouts // self.workers))
+        futures = [
+            self.executor.submit(_search_task, table.cards, root, observer, kind, actions, main, config, seed)
+            for seed in seeds
+        ]
+        return [future.result() for future in futures]
+
+
+class BotJudge(Judge):
+    """人机混战用的裁定器：人类玩家照常（命令行）作答，电脑玩家按设定的正确率随机作答
+
+    verbose=True 时在控制台打印电脑玩家的作答（命令行对局用）；服务器等场景保持关闭，
+    作答结果由调用方通过裁定事件（VerdictEvent）获得。
+    """
+
+    def __init__(self, bots: Set[str], meaning_rate: float = 0.5, story_rate: float = 0.5,
+                 mode: str = "cli", rng: Optional[random.Random] = None, verbose: bool = False):
+        super().__init__(mode=mode)
+        self.bots = bots
+        self.rates = {"meaning": meaning_rate, "story": story_rate}
+        self.rng = rng or random.Random()
+        self.verbose = verbose
+
+    def judge_meaning(self, card: Card, player_id: str) -> bool:
+        if player_id in self.bots:
+            return self._bot_answer(card, player_id, "meaning")
+        return super().judge_meaning(card, player_id)
+
+    def judge_story(self, card: Card, player_id: str) -> bool:
+        if player_id in self.bots:
+            return self._bot_answer(card, player_id, "story")
+        return super().judge_story(card, player_id)
+
+    def _bot_answer(self, card: Card, player_id: str, field: str) -> bool:
+        correct = self.rng.random() < self.rates[field]
+        if self.verbose:
+            label = "释义" if field == "meaning" else "典故"
+            print(f"🤖 [{player_id}] 作答『{card.name}』的{label}: {'正确' if correct else '错误'}")
+        return correct
+
+
+# ==========================
+# 基准测试
+# ==========================
+
+def benchmark(card_set: str = "v1", positions: int = 30, games: int = 100):
+    """rollout 吞吐、决策延迟（单进程/进程池）与对随机策略的胜率"""
+    from game.catalogue import get_catalogue
+    from game.rules import GameRoundManager
+    from game.simulate import HeadlessJudge, RandomPolicy, play_game, random_outcome
+
+    catalogue = get_catalogue(card_set)
+    states = []
+    for seed in range(positions):
+        manager = GameRoundManager(catalogue, verbose=False, seed=seed)
+        manager.initialize_game_state()
+        manager.deal_phase()
+        states.append(manager.state)
+
+    def measure(label: str, player: MCTSPlayer):
+        latencies, rollouts = [], 0
+        for state in states:
+            player.choose_main(state, state.get_current_player())
+            latencies.append(player.last_stats.elapsed)
+            rollouts += player.last_stats.rollouts
+        latencies.sort()
+        total = sum(latencies)
+        print(f"{label:<28} {rollouts / total:9,.0f} rollout/秒  "
+              f"延迟 P50 {latencies[len(latencies) // 2] * 1e3:7.1f} ms  最大 {latencies[-1] * 1e3:7.1f} ms")
+
+    print(f"=== MCTS 基准 ({card_set}, {positions} 个开局局面) ===")
+    measure("单进程 1000 rollouts", MCTSPlayer(MCTSConfig(rollouts=1000), random.Random(0)))
+    measure("单进程 限时 50 ms", MCTSPlayer(MCTSConfig(rollouts=None, time_limit=0.05), random.Random(0)))
+    workers = os.cpu_count() or 1
+    if workers > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            measure(f"线程池 x{workers} 1000 rollouts",
+                    MCTSPlayer(MCTSConfig(rollouts=1000), random.Random(0), pool, workers))
+        with ProcessPoolExecutor(workers) as pool:
+            player = MCTSPlayer(MCTSConfig(rollouts=4000), random.Random(0), pool, workers)
+            player.choose_main(states[0], states[0].get_current_player())   # 预热工作进程
+            measure(f"进程池 x{workers} 4000 rollouts", player)
+
+    wins = 0
+    for seed in range(games):
+        manager = GameRoundManager(catalogue, verbose=False, seed=seed)
+        rng = manager.state.rng
+        manager.judge = HeadlessJudge(random_outcome(rng=rng))
+        bot = MCTSPlayer(MCTSConfig(rollouts=200), random.Random(seed))
+        seat = seed % 2
+        policies = (bot, RandomPolicy(rng=rng)) if seat == 0 else (RandomPolicy(rng=rng), bot)
+        result = play_game(manager, policies)
+        wins += result.winner == f"player{seat + 1}"
+    print(f"MCTS(200 rollouts) 对随机策略（轮换先后手）{games} 局胜率: {wins / games:.1%}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -2,14 +2,24 @@ from typing import List, Optional
 from dataclasses import dataclass, field
 
 from game.card import Card, CardType
+from game.zone import Zone
+
+# 手牌类型判断在模拟热点路径上，直接比较 card_type，不逐张调用 Card 方法
+COUNTER, COMBO = CardType.COUNTER, CardType.COMBO
 
 
 @dataclass
 class Player:
     """玩家类"""
     player_id: str # 玩家ID，用于区分（如 "player1", "player2"）
-    hand: List[Card] = field(default_factory=list)
-    score_zone: List[Card] = field(default_factory=list)
+    hand: Zone = field(default_factory=Zone)
+    score_zone: Zone = field(default_factory=Zone)
+
+    def __post_init__(self):
+        if not isinstance(self.hand, Zone):
+            self.hand = Zone(self.hand)
+        if not isinstance(self.score_zone, Zone):
+            self.score_zone = Zone(self.score_zone)
 
     def draw_card(self, card: Card) -> None:
         """从牌库抽一张牌加入手牌"""
@@ -20,10 +30,7 @@ class Player:
         出牌：根据卡牌ID从手牌中移除并返回
         如果未找到该卡牌，则返回 None
         """
-        for i, card in enumerate(self.hand):
-            if card.id == card_id:
-                return self.hand.pop(i)
-        return None
+        return self.hand.remove(card_id)
 
     def add_to_score_zone(self, card: Card) -> None:
         """将卡牌加入得分区"""
@@ -31,26 +38,33 @@ class Player:
 
     def discard_card(self, card_id: int) -> Optional[Card]:
         """将某张卡牌从手牌移除（如释义错误时丢弃）"""
-        for i, card in enumerate(self.hand):
-            if card.id == card_id:
-                return self.hand.pop(i)
-        return None
+        return self.hand.remove(card_id)
+
+    def has_card_id(self, card_id: int) -> bool:
+        """手牌中是否有该 ID 的卡牌"""
+        return self.hand.has(card_id)
 
     def has_counter_card(self) -> bool:
         """是否拥有可以反击的卡牌（🛡️）"""
-        return any(card.has_counter_effect() for card in self.hand)
+        for card in self.hand:
+            if card.card_type is COUNTER:
+                return True
+        return False
 
     def has_combo_card(self) -> bool:
         """是否拥有可以连击的卡牌（⚡）"""
-        return any(card.has_combo_effect() for card in self.hand)
+        for card in self.hand:
+            if card.card_type is COMBO:
+                return True
+        return False
 
     def get_counter_cards(self) -> List[Card]:
         """获取所有反击卡牌"""
-        return [card for card in self.hand if card.has_counter_effect()]
+        return [card for card in self.hand if card.card_type is COUNTER]
 
     def get_combo_cards(self) -> List[Card]:
         """获取所有连击卡牌"""
-        return [card for card in self.hand if card.has_combo_effect()]
+        return [card for card in self.hand if card.card_type is COMBO]
 
     def get_normal_cards(self) -> List[Card]:
         """获取所有普通卡牌"""
@@ -77,11 +91,11 @@ class Player:
         return f"[{self.player_id}] 🖐️ 手牌:{hand_cards} | 🏆 得分区: {len(self.score_zone)} 张"
 
     def to_dict(self) -> dict:
-        """将玩家状态转换为字典格式"""
+        """将玩家状态转换为字典格式（卡牌只给出 ID，内容见卡牌目录）"""
         return {
             "player_id": self.player_id,
             "hand_count": self.hand_count(),
             "score_count": self.score_count(),
-            "hand": [card.__dict__ for card in self.hand],
-            "score_zone": [card.__dict__ for card in self.score_zone]
+            "hand": self.hand.ids(),
+            "score_zone": self.score_zone.ids()
         }
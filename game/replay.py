@@ -0,0 +1,518 @@
+import random
+import time
+from dataclasses import dataclass, field
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from game.card import Card
+from game.events import GameEvent
+from game.game_state import GameState
+from game.player import Player
+from game.rules import GameRoundManager
+from game.selfplay import SelfPlayReport
+from game.simulate import (CARD_SETS, POLICIES, GameResult, HeadlessJudge, Policy, PolicySpec, play_game,
+                           random_outcome, simulate_game)
+
+
+# 录像文件头：魔数 + 格式版本
+MAGIC = b"SQRP"
+FORMAT_VERSION = 2
+
+PLAYERS = ("player1", "player2")
+END_REASONS = ("score", "deck_exhausted", "round_limit")
+
+# 回合标志位：bit0 攻方为 player2，bit1~3 表示对应的卡牌是否出现，高 4 位为本回合的裁定次数
+_PLAYER2, _MAIN, _COUNTER, _COMBO = 1, 2, 4, 8
+_JUDGED_SHIFT = 4
+# 裁定次数达到该值时高 4 位存该值，实际次数以变长整数跟在卡牌 ID 之后
+_JUDGED_ESCAPE = 15
+
+
+# ==========================
+# 变长整数
+# ==========================
+
+def _put_varint(out: bytearray, value: int):
+    """LEB128 无符号变长整数，小于 128 的值只占 1 字节"""
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    """有符号整数映射为无符号（0, -1, 1, -2 … → 0, 1, 2, 3 …）"""
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+# ==========================
+# 录像格式
+# ==========================
+
+@dataclass
+class Turn:
+    """一个回合的决策：攻方（0 为 player1）与主攻/反击/连击的卡牌 ID，main 为 None 表示无牌可出跳过
+
+    judged 为本回合的裁定次数（每次结算释义、典故各一次），重放时逐回合核对，
+    规则修改使裁定次数变化时报告分歧，而不是让之后的裁定错位到别的回合。
+    """
+    player: int
+    main: Optional[int]
+    counter: Optional[int] = None
+    combo: Optional[int] = None
+    judged: int = 0
+
+
+@dataclass
+class Replay:
+    """一局对局的录像
+
+    只保存复现对局所需的输入：卡牌集、种子（决定洗牌与随机效果）、每回合的出牌与裁定次数，
+    以及按调用顺序排列的裁定结果（每次结算依次为释义、典故）。终局结果一并保存，
+    规则修改后重放即可比较结果的变化。
+    """
+    card_set: str
+    seed: int
+    turns: List[Turn]
+    verdicts: List[bool]
+    result: GameResult
+    initial_cards: int = 5
+    max_rounds: int = 500
+
+    def encode(self) -> bytes:
+        """紧凑二进制编码
+
+        布局：卡牌集名称（1 字节长度 + ASCII）、种子（zigzag 变长整数）、初始手牌数、回合上限、
+        回合数，每回合 1 字节标志位（含裁定次数）+ 出现的卡牌 ID（变长整数），裁定数 + 按位打包的裁定，
+        最后是终局结果（胜者与终局原因合为 1 字节，其余为变长整数）。
+        """
+        out = bytearray()
+        name = self.card_set.encode("ascii")
+        out.append(len(name))
+        out += name
+        _put_varint(out, _zigzag(self.seed))
+        _put_varint(out, self.initial_cards)
+        _put_varint(out, self.max_rounds)
+
+        _put_varint(out, len(self.turns))
+        for turn in self.turns:
+            flags = turn.player | min(turn.judged, _JUDGED_ESCAPE) << _JUDGED_SHIFT
+            cards = []
+            for bit, card in ((_MAIN, turn.main), (_COUNTER, turn.counter), (_COMBO, turn.combo)):
+                if card is not None:
+                    flags |= bit
+                    cards.append(card)
+            out.append(flags)
+            for card in cards:
+                _put_varint(out, card)
+            if turn.judged >= _JUDGED_ESCAPE:
+                _put_varint(out, turn.judged)
+
+        verdicts = self.verdicts
+        _put_varint(out, len(verdicts))
+        for start in range(0, len(verdicts), 8):
+            byte = 0
+            for bit, ok in enumerate(verdicts[start:start + 8]):
+                byte |= ok << bit
+            out.append(byte)
+
+        result = self.result
+        out.append(PLAYERS.index(result.winner) | END_REASONS.index(result.end_reason) << 1)
+        for value in (result.rounds, result.player1_score, result.player2_score, result.player1_hand,
+                      result.player2_hand, result.deck_left, result.discard_count):
+            _put_varint(out, value)
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'Replay':
+        size = data[0]
+        card_set = data[1:1 + size].decode("ascii")
+        pos = 1 + size
+        seed, pos = _get_varint(data, pos)
+        seed = _unzigzag(seed)
+        initial_cards, pos = _get_varint(data, pos)
+        max_rounds, pos = _get_varint(data, pos)
+
+        count, pos = _get_varint(data, pos)
+        turns = []
+        for _ in range(count):
+            flags = data[pos]
+            pos += 1
+            cards = []
+            for bit in (_MAIN, _COUNTER, _COMBO):
+                if flags & bit:
+                    card, pos = _get_varint(data, pos)
+                    cards.append(card)
+                else:
+                    cards.append(None)
+            judged = flags >> _JUDGED_SHIFT
+            if judged == _JUDGED_ESCAPE:
+                judged, pos = _get_varint(data, pos)
+            turns.append(Turn(flags & _PLAYER2, *cards, judged))
+
+        count, pos = _get_varint(data, pos)
+        packed = data[pos:pos + (count + 7) // 8]
+        pos += len(packed)
+        verdicts = [bool(packed[i >> 3] >> (i & 7) & 1) for i in range(count)]
+
+        flags = data[pos]
+        pos += 1
+        values = []
+        for _ in range(7):
+            value, pos = _get_varint(data, pos)
+            values.append(value)
+        result = GameResult(PLAYERS[flags & 1], END_REASONS[flags >> 1], *values, seed=seed)
+        return cls(card_set, seed, turns, verdicts, result, initial_cards, max_rounds)
+
+
+# ==========================
+# 录制
+# ==========================
+
+class GameRecorder:
+    """对局录制器：订阅出牌、裁定与抽牌事件，对局结束后由 finish() 整理为 Replay
+
+    重放只重新执行规则引擎，因此被录制的对局中 state.rng 只能供规则引擎（洗牌、随机效果）
+    使用；策略与裁定的随机数须来自另外的生成器，见 record_game。
+    """
+
+    def __init__(self, manager: GameRoundManager, initial_cards: int = 5, max_rounds: int = 500):
+        if manager.card_set is None or manager.seed is None:
+            raise ValueError("录像需要卡牌集名称与随机种子")
+        self.manager = manager
+        self.initial_cards = initial_cards
+        self.max_rounds = max_rounds
+        self.turns: List[Turn] = []
+        self.verdicts: List[bool] = []
+        self._turn: Optional[Turn] = None
+        self._judged = 0
+        manager.subscribe(self, kinds=("play", "verdict", "draw"))
+
+    def __call__(self, event: GameEvent):
+        kind = event.kind
+        if kind == "verdict":
+            self.verdicts.append(event.meaning_ok)
+            self.verdicts.append(event.story_ok)
+            self._judged += 2
+        elif kind == "play":
+            if event.role == "main":
+                self._turn = Turn(PLAYERS.index(event.player_id), event.card.id)
+            elif event.role == "counter":
+                self._turn.counter = event.card.id
+            else:
+                self._turn.combo = event.card.id
+        else:
+            # 每回合以准备阶段的抽牌结束；没有出牌即为跳过，抽牌的是下一位玩家
+            if self._turn is None:
+                self._turn = Turn(1 - PLAYERS.index(event.player_id), None)
+            self._turn.judged = self._judged
+            self.turns.append(self._turn)
+            self._turn = None
+            self._judged = 0
+
+    def finish(self, result: GameResult) -> Replay:
+        self.manager.unsubscribe(self)
+        return Replay(self.manager.card_set, self.manager.seed, self.turns, self.verdicts, result,
+                      self.initial_cards, self.max_rounds)
+
+
+def record_game(card_set: str = "v1",
+                seed: int = 0,
+                policies: Tuple[PolicySpec, PolicySpec] = ("random", "random"),
+                meaning_rate: float = 0.5,
+                story_rate: float = 0.5,
+                max_rounds: int = 500) -> Tuple[GameResult, Replay]:
+    """模拟并录制一局，参数含义同 simulate.simulate_game
+
+    与 simulate_game 不同，策略与随机裁定使用由 seed 派生的另一个随机数生成器，
+    规则引擎独占 state.rng，重放时不调用策略也能得到相同的洗牌与随机效果。
+    """
+    manager = GameRoundManager(cards=CARD_SETS[card_set], verbose=False, seed=seed)
+    rng = random.Random(f"{seed}/decisions")
+    manager.judge = HeadlessJudge(random_outcome(meaning_rate, story_rate, rng))
+    players = tuple(POLICIES[p](rng) if isinstance(p, str) else p for p in policies)
+    recorder = GameRecorder(manager, max_rounds=max_rounds)
+    result = play_game(manager, players, max_rounds=max_rounds)
+    return result, recorder.finish(result)
+
+
+# ==========================
+# 重放
+# ==========================
+
+class ReplayDivergence(Exception):
+    """录像中的决策无法在当前规则下执行（卡牌不在手中、攻方不符、某回合的裁定次数与录像不同等）"""
+
+
+class _ScriptedPolicy(Policy):
+    """按录像给出双方的决策与裁定；记录的反击/连击没有被询问到、或某回合的裁定次数与录像不同时视为分歧"""
+
+    def __init__(self, turns: List[Turn], verdicts: List[bool]):
+        self.turns = turns
+        self.verdicts = verdicts
+        self.played = 0
+        self.turn: Optional[Turn] = None
+        self.owed = 0
+        self.judged = 0         # 下一个裁定在 verdicts 中的位置
+        self.judged_end = 0     # 当前回合的裁定在 verdicts 中的结束位置
+
+    def choose_main(self, state: GameState, player: Player) -> Optional[Card]:
+        self.check_owed()
+        if self.played >= len(self.turns):
+            raise ReplayDivergence("录像已结束，对局仍未终局")
+        turn = self.turn = self.turns[self.played]
+        self.played += 1
+        if PLAYERS[turn.player] != player.player_id:
+            raise ReplayDivergence(f"第 {self.played} 回合攻方应为 {PLAYERS[turn.player]}")
+        self.owed = (turn.counter is not None) + (turn.combo is not None)
+        self.judged_end = self.judged + turn.judged
+        return None if turn.main is None else self._take(player, turn.main)
+
+    def verdict(self) -> bool:
+        """当前回合的下一个裁定结果"""
+        if self.judged >= self.judged_end:
+            raise ReplayDivergence(f"第 {self.played} 回合的裁定次数多于录像")
+        ok = self.verdicts[self.judged]
+        self.judged += 1
+        return ok
+
+    def choose_counter(self, state: GameState, player: Player, attack_card: Card) -> Optional[Card]:
+        return self._optional(player, self.turn.counter)
+
+    def choose_combo(self, state: GameState, player: Player) -> Optional[Card]:
+        return self._optional(player, self.turn.combo)
+
+    def check_owed(self):
+        if self.owed:
+            raise ReplayDivergence(f"第 {self.played} 回合记录的反击/连击未能打出")
+        if self.judged < self.judged_end:
+            raise ReplayDivergence(f"第 {self.played} 回合的裁定次数少于录像")
+
+    def _optional(self, player: Player, card_id: Optional[int]) -> Optional[Card]:
+        if card_id is None:
+            return None
+        self.owed -= 1
+        return self._take(player, card_id)
+
+    def _take(self, player: Player, card_id: int) -> Card:
+        for card in player.hand:
+            if card.id == card_id:
+                return card
+        raise ReplayDivergence(f"第 {self.played} 回合 {player.player_id} 手中没有卡牌 {card_id}")
+
+
+@dataclass
+class ReplayOutcome:
+    """一次重放的结果：result 为当前规则下的终局结果，发生分歧时为 None"""
+    replay: Replay
+    result: Optional[GameResult]
+    turns_played: int
+    divergence: Optional[str] = None
+
+    @property
+    def changed(self) -> bool:
+        """终局结果与录制时是否不同（分歧也算）"""
+        return self.result != self.replay.result
+
+
+def replay_game(replay: Replay) -> ReplayOutcome:
+    """按录像在当前规则引擎下重新执行一局（无控制台输出）
+
+    规则未改变时得到与录制时完全相同的结果；规则改变后对局可能提前或推迟结束，
+    记录的决策无法执行时停止并给出分歧原因。
+    """
+    manager = GameRoundManager(cards=CARD_SETS[replay.card_set], verbose=False, seed=replay.seed)
+    script = _ScriptedPolicy(replay.turns, replay.verdicts)
+    manager.judge = HeadlessJudge(lambda card, player_id, field_name: script.verdict())
+    try:
+        result = play_game(manager, (script, script), replay.initial_cards, replay.max_rounds)
+        script.check_owed()
+    except ReplayDivergence as e:
+        return ReplayOutcome(replay, None, script.played, str(e))
+    return ReplayOutcome(replay, result, script.played)
+
+
+# ==========================
+# 录像文件（多局连续存放，可流式读取）
+# ==========================
+
+class ReplayWriter:
+    """向文件追加录像：文件头之后每局为 变长整数长度 + 录像编码"""
+
+    def __init__(self, file: Union[str, IO[bytes]]):
+        self._owned = isinstance(file, str)
+        self.file = open(file, "wb") if self._owned else file
+        self.file.write(MAGIC + bytes([FORMAT_VERSION]))
+        self.count = 0
+        self.size = len(MAGIC) + 1
+
+    def write(self, replay: Replay):
+        data = replay.encode()
+        header = bytearray()
+        _put_varint(header, len(data))
+        self.file.write(header + data)
+        self.count += 1
+        self.size += len(header) + len(data)
+
+    def write_all(self, replays: Iterable[Replay]):
+        for replay in replays:
+            self.write(replay)
+
+    def close(self):
+        if self._owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self) -> 'ReplayWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_replays(file: Union[str, IO[bytes]], chunk_size: int = 1 << 20) -> Iterator[Replay]:
+    """逐局读取录像文件，按块读入，内存占用与文件大小无关"""
+    stream = open(file, "rb") if isinstance(file, str) else file
+    try:
+        header = stream.read(len(MAGIC) + 1)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError("不是录像文件")
+        if header[len(MAGIC)] != FORMAT_VERSION:
+            raise ValueError(f"不支持的录像格式版本 {header[len(MAGIC)]}")
+        buffer = b""
+        pos = 0
+        while True:
+            # 缓冲区中凑不出完整的一局时再读入一块
+            try:
+                size, start = _get_varint(buffer, pos)
+                complete = start + size <= len(buffer)
+            except IndexError:
+                complete = False
+            if not complete:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    if pos < len(buffer):
+                        raise ValueError("录像文件不完整")
+                    return
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield Replay.decode(buffer[start:start + size])
+            pos = start + size
+    finally:
+        if isinstance(file, str):
+            stream.close()
+
+
+@dataclass
+class Reanalysis:
+    """批量重放的汇总：录制时与当前规则下的统计对比"""
+    recorded: SelfPlayReport = field(default_factory=SelfPlayReport)
+    replayed: SelfPlayReport = field(default_factory=SelfPlayReport)
+    changed: int = 0
+    winner_changed: int = 0
+    diverged: int = 0
+    divergences: List[Tuple[int, str]] = field(default_factory=list)   # (种子, 原因)，只保留前若干条
+
+    def add(self, outcome: ReplayOutcome, keep_divergences: int = 10):
+        self.recorded.add(outcome.replay.result)
+        if outcome.result is None:
+            self.diverged += 1
+            if len(self.divergences) < keep_divergences:
+                self.divergences.append((outcome.replay.seed, outcome.divergence))
+        else:
+            self.replayed.add(outcome.result)
+        if outcome.changed:
+            self.changed += 1
+            if outcome.result is None or outcome.result.winner != outcome.replay.result.winner:
+                self.winner_changed += 1
+
+    def summary(self) -> str:
+        games = self.recorded.games
+        lines = [
+            f"重放 {games} 局，耗时 {self.replayed.elapsed:.2f}s（{games / max(self.replayed.elapsed, 1e-9):,.0f} 局/秒）",
+            f"结果改变: {self.changed}（胜者改变 {self.winner_changed}），无法重放: {self.diverged}",
+            "--- 录制时 ---",
+            self.recorded.summary(),
+            "--- 当前规则 ---",
+            self.replayed.summary(),
+        ]
+        lines += [f"分歧 seed={seed}: {reason}" for seed, reason in self.divergences]
+        return "\n".join(lines)
+
+
+def reanalyse(replays: Iterable[Replay]) -> Reanalysis:
+    """在当前规则下重放一批录像（如 iter_replays(path)），汇总结果变化"""
+    report = Reanalysis()
+    start = time.perf_counter()
+    for replay in replays:
+        report.add(replay_game(replay))
+    report.replayed.elapsed = time.perf_counter() - start
+    return report
+
+
+# ==========================
+# 基准测试
+# ==========================
+
+def benchmark(n_games: int = 10000, card_set: str = "v1", path: str = "replays.sqr"):
+    """录制 n_games 局写入一个文件：每局字节数、录制与重放吞吐，并校验重放结果与录制一致"""
+    import os
+
+    start = time.perf_counter()
+    with ReplayWriter(path) as writer:
+        for seed in range(n_games):
+            writer.write(record_game(card_set, seed)[1])
+    record_time = time.perf_counter() - start
+
+    report = reanalyse(iter_replays(path))
+    size = os.path.getsize(path)
+
+    start = time.perf_counter()
+    for seed in range(n_games):
+        simulate_game(card_set, seed)
+    simulate_time = time.perf_counter() - start
+
+    print(f"=== 对局录像 ({card_set}, {n_games} 局) ===")
+    print(f"文件 {size:,} B，平均 {size / n_games:.0f} B/局")
+    print(f"无头模拟: {n_games / simulate_time:,.0f} 局/秒；录制: {n_games / record_time:,.0f} 局/秒；"
+          f"重放（含流式读取与解码）: {n_games / report.replayed.elapsed:,.0f} 局/秒")
+    print(f"与录制结果不一致: {report.changed} 局，无法重放: {report.diverged} 局")
+    os.remove(path)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="对局录像：record 录制到文件，replay 按当前规则重放并对比，bench 运行基准")
+    parser.add_argument("mode", choices=("record", "replay", "bench"))
+    parser.add_argument("path", nargs="?", default="replays.sqr")
+    parser.add_argument("-n", "--games", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0, help="record 模式的起始种子")
+    parser.add_argument("--card-set", choices=sorted(CARD_SETS), default="v1")
+    args = parser.parse_args()
+    if args.mode == "record":
+        with ReplayWriter(args.path) as writer:
+            for seed in range(args.seed, args.seed + args.games):
+                writer.write(record_game(args.card_set, seed)[1])
+        print(f"录制 {writer.count} 局到 {args.path}（{writer.size:,} B，平均 {writer.size / writer.count:.0f} B/局）")
+    elif args.mode == "replay":
+        print(reanalyse(iter_replays(args.path)).summary())
+    else:
+        benchmark(args.games, args.card_set, args.path)
@@ -1,21 +1,72 @@
-from typing import Optional
+import random
+from typing import Optional, Sequence, Union
 from game.card import Card
+from game.catalogue import CardCatalogue
+from game.effect_compiler import execute_card_effects
+from game.events import (ConsolePrinter, DealEvent, DrawEvent, EffectEvent, EventBus, GameOverEvent, Handler,
+                         PlayEvent, VerdictEvent)
 from game.judge import Judge
 from game.player import Player
 from game.game_state import GameState
-from data.v1 import get_all_cards
+from game.zone import Zone
+from data.v1 import CATALOGUE as DEFAULT_CATALOGUE
 
 
 class GameRoundManager:
     """管理一轮完整流程"""
-    def __init__(self):
-        cards=get_all_cards()
-        self.state = GameState(deck=cards)
-        self.judge = Judge(mode="cli")
-    
+    def __init__(self,
+                 cards: Union[CardCatalogue, Sequence[Card], None] = None,
+                 judge: Optional[Judge] = None,
+                 verbose: bool = True,
+                 seed: Optional[int] = None):
+        """
+        cards: 卡牌目录或卡牌序列，默认使用 v1 卡牌目录；本局牌库总是独立的一份
+        judge: 裁定器，任何提供 judge_meaning/judge_story 的对象均可，默认命令行裁定
+        verbose: 是否向控制台输出流程信息（订阅 ConsolePrinter），无人值守模拟时应关闭
+        seed: 本局随机种子，洗牌与随机效果均由它决定，相同种子可复现整局
+
+        流程信息以结构化事件发布到 self.events，可用 subscribe() 接入其他订阅者。
+        """
+        if cards is None:
+            cards = DEFAULT_CATALOGUE
+        deck = cards.new_deck() if isinstance(cards, CardCatalogue) else Zone(cards)
+        # 卡牌集名称（客户端据此获取卡牌目录），直接传入卡牌序列时为 None
+        self.card_set: Optional[str] = cards.name if isinstance(cards, CardCatalogue) else None
+        self.seed = seed
+        self.state = GameState(deck=deck, rng=random.Random(seed))
+        self.judge = judge if judge is not None else Judge(mode="cli")
+        self.events = EventBus()
+        self._console: Optional[ConsolePrinter] = None
+        self.verbose = verbose
+        self.winner: Optional[str] = None
+
+    @property
+    def verbose(self) -> bool:
+        return self._console is not None
+
+    @verbose.setter
+    def verbose(self, value: bool):
+        if value and self._console is None:
+            self._console = self.events.subscribe(ConsolePrinter())
+        elif not value and self._console is not None:
+            self.events.unsubscribe(self._console)
+            self._console = None
+
+    def subscribe(self, handler: Handler, kinds=None) -> Handler:
+        """订阅本局事件；需要区域移动事件（kinds 为 None 或含 zone_move）时自动开启区域跟踪"""
+        self.events.subscribe(handler, kinds)
+        if self.events.wants("zone_move"):
+            self.state.start_zone_events(self.events)
+        return handler
+
+    def unsubscribe(self, handler: Handler):
+        self.events.unsubscribe(handler)
+        if self.state.moves is not None and not self.events.wants("zone_move"):
+            self.state.stop_zone_events()
+
     def initialize_game_state(self):
         self.state.shuffle_deck()
-    
+
     def run_one_turn(self,
                      main_card: Card,
                      response_card: Optional[Card] = None,
@@ -26,7 +77,7 @@ class GameRoundManager:
         2. 行动阶段（主攻 + 反击 + 连击）
         3. 胜负判断
         """
-        
+
         self.action_phase(main_card, response_card, combo_card)
         self.check_end_conditions()
         self.state.switch_turn()
@@ -36,7 +87,8 @@ class GameRoundManager:
         """准备阶段：当前玩家抽一张牌"""
         player = self.state.get_current_player()
         card = self.state.draw_card(player)
-        print(f"\n[准备阶段] {player.player_id} 抽牌：{card}")
+        if self.events.active:
+            self.events.emit(DrawEvent(self.state.round_count, player.player_id, card))
 
     def action_phase(self,
                      main_card: Card,
@@ -48,30 +100,33 @@ class GameRoundManager:
         attacker = self.state.get_current_player()
         defender = self.state.get_opponent_player()
 
-        print(f"\n[主攻] {attacker.player_id} 打出 📄 {main_card.name}")
+        events = self.events
+        if events.active:
+            events.emit(PlayEvent(self.state.round_count, attacker.player_id, main_card, "main"))
         self.handle_resolution(attacker, defender, main_card)
 
         # 反击处理
         if response_card:
-            print(f"[反击] {defender.player_id} 使用 🛡️ {response_card.name} 进行反击")
+            if events.active:
+                events.emit(PlayEvent(self.state.round_count, defender.player_id, response_card, "counter"))
             self.handle_resolution(defender, attacker, response_card, is_counter=True)
             return  # 反击成功与否都终止连击
 
         # 连击处理（必须主攻成功结算，且对方未反击）
         if combo_card:
-            print(f"[连击] {attacker.player_id} 追加 ⚡ {combo_card.name}")
+            if events.active:
+                events.emit(PlayEvent(self.state.round_count, attacker.player_id, combo_card, "combo"))
             self.handle_resolution(attacker, defender, combo_card)
 
     def deal_phase(self, initial_cards: int = 5):
         """发牌阶段：游戏开始时给双方玩家发放初始手牌"""
-        print(f"\n[发牌阶段] 每位玩家抽取{initial_cards}张初始手牌")
-        
         for _ in range(initial_cards):
             self.state.draw_card(self.state.player1)
             self.state.draw_card(self.state.player2)
-            
-        print(f"[发牌完成] 玩家1手牌数：{self.state.player1.hand_count()}")
-        print(f"[发牌完成] 玩家2手牌数：{self.state.player2.hand_count()}")
+
+        if self.events.active:
+            self.events.emit(DealEvent(self.state.round_count, initial_cards,
+                                       (self.state.player1.hand_count(), self.state.player2.hand_count())))
 
     def handle_resolution(self,
                           attacker: Player,
@@ -84,18 +139,20 @@ class GameRoundManager:
         """
         meaning_success = self.meaning_judgement(defender, card)
         story_success = self.story_judgement(defender, card)
-        
+        events = self.events
+        if events.active:
+            events.emit(VerdictEvent(self.state.round_count, defender.player_id, card,
+                                     meaning_success, story_success))
+
         if not meaning_success or not story_success:
-            print(f"[判定❌] {'释义' if not meaning_success else '典故'}错误 → {card.name} 进入弃牌区并触发效果")
             self.state.move_to_discard(card)
             # 执行卡牌效果
             if card.effects:
-                print(f"[效果🎯] {card.effect_description}")
-                for effect in card.effects:
-                    self.state = effect.execute(self.state)
+                if events.active:
+                    events.emit(EffectEvent(self.state.round_count, card))
+                self.state = execute_card_effects(card, self.state)
             return
 
-        print(f"[判定✅] {card.name} 完全正确 → {defender.player_id}得分")
         defender.add_to_score_zone(card)
 
     def meaning_judgement(self, defender: Player, card: Card) -> bool:
@@ -106,29 +163,37 @@ class GameRoundManager:
         """模拟对典故的判断"""
         return self.judge.judge_story(card, defender.player_id)
 
-    def check_end_conditions(self):
-        """判断是否触发胜负条件"""
-        if not self.state.is_game_over():
-            return
-
-        print("\n🎯 游戏结束！胜负判定中...")
-
+    def determine_winner(self) -> str:
+        """终局裁定：得分多者胜 → 手牌多者胜 → 后手胜"""
         p1_score = self.state.player1.score_count()
         p2_score = self.state.player2.score_count()
         if p1_score > p2_score:
-            winner = "player1"
-        elif p2_score > p1_score:
-            winner = "player2"
-        else:
-            # 比较手牌数
-            p1_hand = self.state.player1.hand_count()
-            p2_hand = self.state.player2.hand_count()
-            if p1_hand > p2_hand:
-                winner = "player1"
-            elif p2_hand > p1_hand:
-                winner = "player2"
-            else:
-                # 平局 → 后手胜
-                winner = "player2" if self.state.current_player_id == "player1" else "player1"
-
-        print(f"🏆 胜者为：{winner}")
+            return "player1"
+        if p2_score > p1_score:
+            return "player2"
+        # 比较手牌数
+        p1_hand = self.state.player1.hand_count()
+        p2_hand = self.state.player2.hand_count()
+        if p1_hand > p2_hand:
+            return "player1"
+        if p2_hand > p1_hand:
+            return "player2"
+        # 平局 → 后手胜
+        return "player2" if self.state.current_player_id == "player1" else "player1"
+
+    def check_end_conditions(self) -> Optional[str]:
+        """判断是否触发胜负条件
+
+        Returns:
+            游戏结束时返回胜者 ID，否则返回 None
+        """
+        if not self.state.is_game_over():
+            return None
+
+        if self.state.journal is not None:
+            self.state.journal.record(setattr, self, "winner", self.winner)
+        self.winner = self.determine_winner()
+        if self.events.active:
+            self.events.emit(GameOverEvent(self.state.round_count, self.winner,
+                                           (self.state.player1.score_count(), self.state.player2.score_count())))
+        return self.winner
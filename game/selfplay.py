@@ -0,0 +1,177 @@
+import hashlib
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from game.simulate import GameResult, simulate_game
+
+
+# ==========================
+# 种子与配置
+# ==========================
+
+def game_seed(base_seed: int, index: int) -> int:
+    """第 index 局的种子。只依赖 (base_seed, index)，与进程数和分块方式无关
+
+    由 (base_seed, index) 的哈希得到 63 位非负整数，不同的 base_seed 不会因 index 增大而
+    用到彼此的种子（只可能发生概率可忽略的哈希碰撞）。
+    """
+    data = f"{base_seed}/{index}".encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little") >> 1
+
+
+@dataclass(frozen=True)
+class SelfPlayConfig:
+    """自对弈参数，只包含可序列化的值以便发送到工作进程"""
+    card_set: str = "v1"
+    policies: Tuple[str, str] = ("random", "random")
+    meaning_rate: float = 0.5
+    story_rate: float = 0.5
+    max_rounds: int = 500
+
+
+def play_seeded(seed: int,
+                config: SelfPlayConfig = SelfPlayConfig(),
+                verbose: bool = False) -> GameResult:
+    """按种子进行一局对局；相同的种子与配置总能复现同一局"""
+    return simulate_game(
+        config.card_set,
+        seed,
+        config.policies,
+        meaning_rate=config.meaning_rate,
+        story_rate=config.story_rate,
+        max_rounds=config.max_rounds,
+        verbose=verbose,
+    )
+
+
+# ==========================
+# 统计结果
+# ==========================
+
+@dataclass
+class SelfPlayReport:
+    """批量自对弈的汇总结果，可跨进程合并"""
+    games: int = 0
+    wins: Counter = field(default_factory=Counter)          # 胜者 -> 局数
+    end_reasons: Counter = field(default_factory=Counter)   # 终局原因 -> 局数
+    rounds: Counter = field(default_factory=Counter)        # 回合数 -> 局数
+    longest: Optional[Tuple[int, int]] = None               # (回合数, 种子)，便于复现异常长局
+    results: List[GameResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def add(self, result: GameResult, keep: bool = False):
+        self.games += 1
+        self.wins[result.winner] += 1
+        self.end_reasons[result.end_reason] += 1
+        self.rounds[result.rounds] += 1
+        if self.longest is None or result.rounds > self.longest[0]:
+            self.longest = (result.rounds, result.seed)
+        if keep:
+            self.results.append(result)
+
+    def merge(self, other: 'SelfPlayReport'):
+        self.games += other.games
+        self.wins.update(other.wins)
+        self.end_reasons.update(other.end_reasons)
+        self.rounds.update(other.rounds)
+        if other.longest is not None and (self.longest is None or other.longest[0] > self.longest[0]):
+            self.longest = other.longest
+        self.results.extend(other.results)
+
+    def win_rate(self, player_id: str) -> float:
+        return self.wins[player_id] / self.games if self.games else 0.0
+
+    def mean_rounds(self) -> float:
+        return sum(r * n for r, n in self.rounds.items()) / self.games if self.games else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"对局数: {self.games}，耗时: {self.elapsed:.2f}s\n"
+            f"胜率: player1 {self.win_rate('player1'):.1%}，player2 {self.win_rate('player2'):.1%}\n"
+            f"终局原因: {dict(self.end_reasons)}\n"
+            f"平均回合数: {self.mean_rounds():.1f}，最长对局(回合数, 种子): {self.longest}"
+        )
+
+
+# ==========================
+# 并行执行
+# ==========================
+
+def _run_chunk(base_seed: int, start: int, stop: int,
+               config: SelfPlayConfig, keep_results: bool) -> SelfPlayReport:
+    """工作进程入口：在进程内汇总，只回传统计结果以减少进程间通信"""
+    report = SelfPlayReport()
+    for index in range(start, stop):
+        report.add(play_seeded(game_seed(base_seed, index), config), keep_results)
+    return report
+
+
+def run_selfplay(n_games: int,
+                 base_seed: int = 0,
+                 config: SelfPlayConfig = SelfPlayConfig(),
+                 workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None,
+                 keep_results: bool = False) -> SelfPlayReport:
+    """将 n_games 局对局分块分发到进程池执行并合并结果
+
+    workers: 进程数，默认等于 CPU 核数；为 1 时在当前进程内直接执行
+    chunk_size: 每个任务的对局数，默认让每个进程分到约 4 个任务
+    keep_results: 是否保留每局的 GameResult（结果按局序号排列）
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-n_games // (workers * 4)))
+    bounds = [(start, min(start + chunk_size, n_games)) for start in range(0, n_games, chunk_size)]
+
+    started = time.perf_counter()
+    report = SelfPlayReport()
+    if workers == 1:
+        for start, stop in bounds:
+            report.merge(_run_chunk(base_seed, start, stop, config, keep_results))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_run_chunk, base_seed, start, stop, config, keep_results)
+                for start, stop in bounds
+            ]
+            # 按提交顺序合并，保证 results 的顺序与进程调度无关
+            for future in futures:
+                report.merge(future.result())
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def benchmark(n_games: int = 50000, card_set: str = "v1", max_workers: Optional[int] = None):
+    """并行扩展性基准：分别用 1, 2, 4 ... 个进程运行同样的对局"""
+    max_workers = max_workers or os.cpu_count() or 1
+    config = SelfPlayConfig(card_set=card_set)
+    counts = sorted({1 << i for i in range(max_workers.bit_length()) if 1 << i <= max_workers} | {max_workers})
+
+    print(f"=== 并行自对弈基准 ({card_set}, {n_games} 局) ===")
+    baseline = None
+    for workers in counts:
+        report = run_selfplay(n_games, base_seed=1, config=config, workers=workers)
+        rate = report.games / report.elapsed
+        baseline = baseline or rate
+        print(f"进程数 {workers:2d}: {rate:10,.0f} 局/秒，加速比 {rate / baseline:.2f}x，"
+              f"player1 胜率 {report.win_rate('player1'):.2%}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="并行自对弈")
+    parser.add_argument("-n", "--games", type=int, default=50000)
+    parser.add_argument("--card-set", default="v1")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None, help="复现指定种子的单局对局并打印完整流程")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        print(play_seeded(args.seed, SelfPlayConfig(card_set=args.card_set), verbose=True))
+    else:
+        benchmark(args.games, args.card_set, args.workers)
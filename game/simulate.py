@@ -0,0 +1,271 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from game.card import Card, CardType
+from game.catalogue import CardCatalogue
+from game.game_state import GameState
+from game.judge import Judge
+from game.player import Player
+from game.rules import GameRoundManager
+from data import v0, v1
+
+
+# 可供模拟的卡牌集
+CARD_SETS: Dict[str, CardCatalogue] = {
+    "v0": v0.CATALOGUE,
+    "v1": v1.CATALOGUE,
+}
+
+# 裁定结果函数：(card, player_id, field) -> 是否正确，field 为 "meaning" 或 "story"
+Outcome = Callable[[Card, str, str], bool]
+
+
+# ==========================
+# 可插拔裁定器
+# ==========================
+
+class HeadlessJudge(Judge):
+    """无控制台交互的裁定器，裁定结果由外部传入的函数决定"""
+
+    def __init__(self, outcome: Outcome):
+        super().__init__(mode="auto")
+        self.outcome = outcome
+
+    def judge_meaning(self, card: Card, player_id: str) -> bool:
+        return self.outcome(card, player_id, "meaning")
+
+    def judge_story(self, card: Card, player_id: str) -> bool:
+        return self.outcome(card, player_id, "story")
+
+
+def constant_outcome(result: bool) -> Outcome:
+    """固定裁定结果"""
+    return lambda card, player_id, field: result
+
+
+def random_outcome(meaning_rate: float = 0.5,
+                   story_rate: float = 0.5,
+                   rng: Optional[random.Random] = None) -> Outcome:
+    """按概率给出裁定结果，模拟答题正确率"""
+    rand = (rng or random).random
+    rates = {"meaning": meaning_rate, "story": story_rate}
+    return lambda card, player_id, field: rand() < rates[field]
+
+
+# ==========================
+# 可插拔玩家策略
+# ==========================
+
+class Policy:
+    """玩家策略：决定主攻、反击与连击所用的卡牌，返回 None 表示放弃"""
+
+    def choose_main(self, state: GameState, player: Player) -> Optional[Card]:
+        raise NotImplementedError
+
+    def choose_counter(self, state: GameState, player: Player, attack_card: Card) -> Optional[Card]:
+        return None
+
+    def choose_combo(self, state: GameState, player: Player) -> Optional[Card]:
+        return None
+
+
+class FirstCardPolicy(Policy):
+    """总是打出第一张可用的卡牌，优先用普通卡主攻，有反击/连击卡就使用"""
+
+    def choose_main(self, state: GameState, player: Player) -> Optional[Card]:
+        fallback = None
+        for card in player.hand:
+            if card.card_type == CardType.NORMAL:
+                return card
+            if fallback is None:
+                fallback = card
+        return fallback
+
+    def choose_counter(self, state: GameState, player: Player, attack_card: Card) -> Optional[Card]:
+        for card in player.hand:
+            if card.card_type == CardType.COUNTER:
+                return card
+        return None
+
+    def choose_combo(self, state: GameState, player: Player) -> Optional[Card]:
+        for card in player.hand:
+            if card.card_type == CardType.COMBO:
+                return card
+        return None
+
+
+class RandomPolicy(Policy):
+    """随机出牌，按给定概率决定是否发动反击/连击"""
+
+    def __init__(self,
+                 counter_rate: float = 0.5,
+                 combo_rate: float = 0.5,
+                 rng: Optional[random.Random] = None):
+        self.counter_rate = counter_rate
+        self.combo_rate = combo_rate
+        self.rng = rng or random.Random()
+
+    def choose_main(self, state: GameState, player: Player) -> Optional[Card]:
+        hand = player.hand
+        count = len(hand)
+        return hand[self.rng.randrange(count)] if count else None
+
+    def choose_counter(self, state: GameState, player: Player, attack_card: Card) -> Optional[Card]:
+        if self.rng.random() >= self.counter_rate:
+            return None
+        counters = player.get_counter_cards()
+        return self.rng.choice(counters) if counters else None
+
+    def choose_combo(self, state: GameState, player: Player) -> Optional[Card]:
+        if self.rng.random() >= self.combo_rate:
+            return None
+        combos = player.get_combo_cards()
+        return self.rng.choice(combos) if combos else None
+
+
+# 按名称构造策略（便于跨进程传递），参数为本局随机数生成器
+POLICIES: Dict[str, Callable[[random.Random], Policy]] = {
+    "first": lambda rng: FirstCardPolicy(),
+    "random": lambda rng: RandomPolicy(rng=rng),
+}
+
+PolicySpec = Union[str, Policy]
+
+
+# ==========================
+# 对局流程
+# ==========================
+
+@dataclass
+class GameResult:
+    """一局模拟对局的结果记录"""
+    winner: str
+    end_reason: str          # "score" / "deck_exhausted" / "round_limit"
+    rounds: int
+    player1_score: int
+    player2_score: int
+    player1_hand: int
+    player2_hand: int
+    deck_left: int
+    discard_count: int
+    seed: Optional[int] = None
+
+
+def play_game(manager: GameRoundManager,
+              policies: Tuple[Policy, Policy],
+              initial_cards: int = 5,
+              max_rounds: int = 500) -> GameResult:
+    """从发牌到终局完整进行一局游戏
+
+    流程与服务器一致：发牌 → (主攻/反击/连击 → 胜负判断 → 换人 → 准备阶段) 循环
+    """
+    state = manager.state
+    by_player = {"player1": policies[0], "player2": policies[1]}
+
+    manager.initialize_game_state()
+    manager.deal_phase(initial_cards)
+
+    is_game_over = state.is_game_over
+    while not is_game_over() and state.round_count <= max_rounds:
+        if state.current_player_id == "player1":
+            attacker, defender = state.player1, state.player2
+        else:
+            attacker, defender = state.player2, state.player1
+
+        main_card = by_player[attacker.player_id].choose_main(state, attacker)
+        if main_card is None:
+            # 无牌可出：跳过本回合
+            state.switch_turn()
+            manager.prepare_phase()
+            continue
+        attacker.play_card(main_card.id)
+
+        response_card = None
+        if defender.has_counter_card():
+            response_card = by_player[defender.player_id].choose_counter(state, defender, main_card)
+            if response_card is not None:
+                defender.play_card(response_card.id)
+
+        combo_card = None
+        if response_card is None and attacker.has_combo_card():
+            combo_card = by_player[attacker.player_id].choose_combo(state, attacker)
+            if combo_card is not None:
+                attacker.play_card(combo_card.id)
+
+        manager.run_one_turn(main_card, response_card, combo_card)
+
+    if state.is_game_over():
+        winner = manager.winner or manager.check_end_conditions()
+        if state.player1.score_count() >= 10 or state.player2.score_count() >= 10:
+            end_reason = "score"
+        else:
+            end_reason = "deck_exhausted"
+    else:
+        winner = manager.determine_winner()
+        end_reason = "round_limit"
+
+    return GameResult(
+        winner=winner,
+        end_reason=end_reason,
+        rounds=state.round_count,
+        player1_score=state.player1.score_count(),
+        player2_score=state.player2.score_count(),
+        player1_hand=state.player1.hand_count(),
+        player2_hand=state.player2.hand_count(),
+        deck_left=len(state.deck),
+        discard_count=len(state.discard_pile),
+        seed=manager.seed,
+    )
+
+
+def simulate_game(card_set: str = "v1",
+                  seed: Optional[int] = None,
+                  policies: Tuple[PolicySpec, PolicySpec] = ("random", "random"),
+                  outcome: Optional[Outcome] = None,
+                  meaning_rate: float = 0.5,
+                  story_rate: float = 0.5,
+                  max_rounds: int = 500,
+                  verbose: bool = False) -> GameResult:
+    """无控制台输出地模拟一局游戏（verbose=True 时打印完整流程，便于排查）
+
+    未指定 outcome 时按 meaning_rate/story_rate 随机裁定。洗牌、随机效果、随机策略
+    与随机裁定共用同一个以 seed 初始化的随机数生成器，因此按名称指定策略时，
+    相同 seed 必然得到相同的对局。
+    """
+    manager = GameRoundManager(cards=CARD_SETS[card_set], verbose=verbose, seed=seed)
+    rng = manager.state.rng
+    manager.judge = HeadlessJudge(outcome or random_outcome(meaning_rate, story_rate, rng))
+    players = tuple(POLICIES[p](rng) if isinstance(p, str) else p for p in policies)
+    return play_game(manager, players, max_rounds=max_rounds)
+
+
+def benchmark(n_games: int = 10000, card_set: str = "v1") -> float:
+    """吞吐量基准：返回每秒模拟的对局数"""
+    wins = {"player1": 0, "player2": 0}
+    total_rounds = 0
+
+    start = time.perf_counter()
+    for seed in range(n_games):
+        result = simulate_game(card_set, seed)
+        wins[result.winner] += 1
+        total_rounds += result.rounds
+    elapsed = time.perf_counter() - start
+
+    rate = n_games / elapsed
+    print(f"=== 模拟基准 ({card_set}) ===")
+    print(f"对局数: {n_games}，耗时: {elapsed:.2f}s，吞吐: {rate:,.0f} 局/秒")
+    print(f"平均回合数: {total_rounds / n_games:.1f}")
+    print(f"胜率: player1 {wins['player1'] / n_games:.1%}，player2 {wins['player2'] / n_games:.1%}")
+    return rate
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="无头模拟吞吐量基准")
+    parser.add_argument("-n", "--games", type=int, default=10000)
+    parser.add_argument("--card-set", choices=sorted(CARD_SETS), default="v1")
+    args = parser.parse_args()
+    benchmark(args.games, args.card_set)
@@ -0,0 +1,344 @@
+import hashlib
+import time
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional
+
+from game.zone import Zone, ZoneListener
+
+if TYPE_CHECKING:
+    from game.card import Card
+    from game.game_state import GameState
+
+
+# ==========================
+# Zobrist 键
+# ==========================
+
+def _derive_key(*parts) -> int:
+    """由参数确定的 64 位随机数，与进程和运行次数无关"""
+    data = ":".join(map(str, parts)).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class _ZoneKeys(dict):
+    """某一区域的 卡牌 ID -> 键，首次使用时生成；区域按卡牌集合计入哈希，与顺序无关"""
+    ordered = False
+
+    def __init__(self, seed: int, zone: int):
+        super().__init__()
+        self.seed = seed
+        self.zone = zone
+
+    def __missing__(self, card_id: int) -> int:
+        key = self[card_id] = _derive_key(self.seed, "card", card_id, self.zone)
+        return key
+
+    def zone_hash(self, cards: Iterable['Card']) -> int:
+        value = 0
+        for card in cards:
+            value ^= self[card.id]
+        return value
+
+
+class _DeckKeys(_ZoneKeys):
+    """牌库的 (卡牌 ID, 位置) -> 键：位置从底部数起，抽牌（取顶部）只改变一个键"""
+    ordered = True
+
+    def __missing__(self, key) -> int:
+        card_id, position = key
+        value = self[key] = _derive_key(self.seed, "card", card_id, self.zone, position)
+        return value
+
+    def zone_hash(self, cards: Iterable['Card']) -> int:
+        """按从顶到底的顺序给出卡牌"""
+        cards = list(cards)
+        bottom = len(cards) - 1
+        value = 0
+        for index, card in enumerate(cards):
+            value ^= self[card.id, bottom - index]
+        return value
+
+
+class ZobristKeys:
+    """Zobrist 键表：牌库每个（卡牌 ID, 位置）一个键，其余区域每个（卡牌 ID, 区域）一个键，
+    另有行动方与回合数的键
+
+    牌库顺序决定之后抽到的牌，按顺序移动卡牌（ORDER）的效果也只从牌库取牌，因此牌库按顺序计入；
+    手牌、得分区与弃牌区只被随机（RANDOM）或选择（SELECT）效果读取，顺序不影响可能的后续，按集合计入。
+    区域编号同 GameZone 顺序（牌库、双方手牌、双方得分区、弃牌区）。
+    键由 seed 确定，同一 seed 在任何进程中得到相同的哈希值。
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.zones: List[_ZoneKeys] = [_DeckKeys(seed, 0)] + [_ZoneKeys(seed, zone) for zone in range(1, 6)]
+        self.player2 = _derive_key(seed, "player2")
+        self._rounds: Dict[int, int] = {}
+
+    def round_key(self, round_count: int) -> int:
+        key = self._rounds.get(round_count)
+        if key is None:
+            key = self._rounds[round_count] = _derive_key(self.seed, "round", round_count)
+        return key
+
+    def hash_state(self, state: 'GameState', include_round: bool = False) -> int:
+        """完整计算一个局面的哈希值（增量维护的值应与之相等）"""
+        value = 0
+        for keys, zone in zip(self.zones, state.zones()):
+            value ^= keys.zone_hash(zone)
+        if state.current_player_id == "player2":
+            value ^= self.player2
+        if include_round:
+            value ^= self.round_key(state.round_count)
+        return value
+
+
+DEFAULT_KEYS = ZobristKeys()
+
+
+# ==========================
+# 增量哈希
+# ==========================
+
+class _ZoneHasher(ZoneListener):
+    """单个区域的监听器：卡牌进出时异或对应的键"""
+    __slots__ = ("owner", "keys")
+
+    def __init__(self, owner: 'ZobristHash', keys: _ZoneKeys):
+        self.owner = owner
+        self.keys = keys
+
+    def on_insert(self, zone: Zone, card: 'Card', index: int):
+        self.owner.value ^= self.keys[card.id]
+
+    def on_remove(self, zone: Zone, card: 'Card', index: int):
+        self.owner.value ^= self.keys[card.id]
+
+
+class _DeckHasher(_ZoneHasher):
+    """牌库的监听器：回调时牌库已完成变化，变化处之上的卡牌离底部的位置随之改变"""
+    __slots__ = ()
+
+    def on_insert(self, zone: Zone, card: 'Card', index: int):
+        keys, count = self.keys, len(zone)
+        value = keys[card.id, count - 1 - index]
+        for i, moved in enumerate(islice(zone, index)):
+            value ^= keys[moved.id, count - 2 - i] ^ keys[moved.id, count - 1 - i]
+        self.owner.value ^= value
+
+    def on_remove(self, zone: Zone, card: 'Card', index: int):
+        keys, count = self.keys, len(zone)
+        value = keys[card.id, count - index]
+        for i, moved in enumerate(islice(zone, index)):
+            value ^= keys[moved.id, count - i] ^ keys[moved.id, count - 1 - i]
+        self.owner.value ^= value
+
+    def on_reorder(self, zone: Zone, previous: List['Card']):
+        self.owner.value ^= self.keys.zone_hash(previous) ^ self.keys.zone_hash(zone)
+
+
+class ZobristHash:
+    """增量维护的局面哈希，通过 GameState.start_hashing() 挂到一局游戏上
+
+    哈希包含牌库顺序、其余各区域中有哪些卡牌与行动方，可选包含回合数；不含随机数生成器的状态。
+    哈希相同的局面（除冲突外）可能的后续完全相同，其余区域的顺序只影响随机效果具体抽到哪张牌。
+    撤销日志回退局面时哈希值随之回退。
+    """
+
+    def __init__(self, keys: ZobristKeys = DEFAULT_KEYS, include_round: bool = False):
+        self.keys = keys
+        self.include_round = include_round
+        self.value = 0
+        self.listeners = [(_DeckHasher if zone_keys.ordered else _ZoneHasher)(self, zone_keys)
+                          for zone_keys in keys.zones]
+
+    def reset(self, state: 'GameState'):
+        self.value = self.keys.hash_state(state, self.include_round)
+
+    def on_turn(self, old_round: int, new_round: int):
+        """行动方切换（GameState.switch_turn 及其撤销时调用）"""
+        self.value ^= self.keys.player2
+        if self.include_round:
+            self.value ^= self.keys.round_key(old_round) ^ self.keys.round_key(new_round)
+
+
+# ==========================
+# 置换表
+# ==========================
+
+class TTEntry(NamedTuple):
+    """置换表条目（只含数值的元组，不被垃圾回收器跟踪）"""
+    key: int                     # 完整哈希值，用于排除下标冲突
+    depth: int                   # 搜索深度（或模拟次数），越大越值得保留
+    value: float
+    move: Optional[int] = None   # 最佳着法（卡牌 ID）
+    generation: int = 0
+
+
+class TranspositionTable:
+    """有界置换表，可在多轮搜索之间（含多线程）复用
+
+    供在 GameState 上做确定性搜索时使用，目前只有本模块的基准搜索（_negamax）使用；
+    MCTS 玩家（game.mcts）在 CompactState 上按信息集抽样搜索，不使用置换表。
+    能省去多少重复展开取决于搜索中不同出牌顺序到达同一局面的频率，以基准测试的结果为准。
+
+    每个下标对应两个槽位：
+    - 深度优先槽：新条目深度不低于旧条目，或旧条目来自之前的搜索轮次时替换，
+      被挤出的旧条目降到第二个槽位
+    - 总是替换槽：其余情况直接覆盖
+    条目是不可变对象，读写都是单次列表赋值，多线程共享时不会读到半写入的条目。
+    """
+
+    def __init__(self, size: int = 1 << 16):
+        buckets = 1
+        while buckets * 2 < size:
+            buckets *= 2
+        self._mask = buckets - 1
+        self._slots: List[Optional[TTEntry]] = [None] * (buckets * 2)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def used(self) -> int:
+        """已占用的槽位数（遍历整张表，只用于统计）"""
+        return sum(entry is not None for entry in self._slots)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._slots)
+
+    def get(self, key: int) -> Optional[TTEntry]:
+        index = (key & self._mask) << 1
+        slots = self._slots
+        entry = slots[index]
+        if entry is None or entry.key != key:
+            entry = slots[index + 1]
+            if entry is None or entry.key != key:
+                self.misses += 1
+                return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: int, value: float, depth: int = 0, move: Optional[int] = None):
+        index = (key & self._mask) << 1
+        slots = self._slots
+        entry = TTEntry(key, depth, value, move, self.generation)
+        first = slots[index]
+        if first is None or depth >= first.depth or first.generation != self.generation:
+            if first is not None and first.key != key:
+                slots[index + 1] = first
+            slots[index] = entry
+        else:
+            slots[index + 1] = entry
+        self.stores += 1
+
+    def new_search(self):
+        """开始新一轮搜索：之前的条目仍可命中，但可被任意新条目替换"""
+        self.generation += 1
+
+    def clear(self):
+        self._slots = [None] * len(self._slots)
+        self.hits = self.misses = self.stores = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# ==========================
+# 基准测试
+# ==========================
+
+def _negamax(manager, depth: int, table: Optional[TranspositionTable], counter: List[int]) -> float:
+    """以当前玩家视角的固定深度搜索（只枚举主攻卡牌），叶子估值为得分差
+
+    撤销日志不回退随机数生成器，每步前按（局面哈希, 着法）重新设定种子，使随机效果只取决于局面，
+    搜索结果与展开顺序、是否命中置换表无关。
+    """
+    state = manager.state
+    if table is not None:
+        entry = table.get(state.zobrist.value)
+        if entry is not None and entry.depth >= depth:
+            return entry.value
+
+    counter[0] += 1
+    best = None
+    player, opponent = state.get_current_player(), state.get_opponent_player()
+    if depth == 0 or state.is_game_over() or not player.hand:
+        value = float(player.score_count() - opponent.score_count())
+    else:
+        journal = state.journal
+        value = float("-inf")
+        for card_id in sorted(player.hand.ids()):
+            mark = journal.mark()
+            state.rng.seed(state.zobrist.value ^ card_id)
+            card = player.play_card(card_id)
+            manager.run_one_turn(card)
+            score = -_negamax(manager, depth - 1, table, counter)
+            journal.undo(mark)
+            if score > value:
+                value, best = score, card_id
+    if table is not None:
+        table.put(state.zobrist.value, value, depth, best)
+    return value
+
+
+def benchmark(n_games: int = 300, depth: int = 5, card_set: str = "v1"):
+    """1. 校验增量哈希与完整计算一致（含撤销）；2. 置换表对固定深度搜索的节点数与耗时的影响"""
+    from game.catalogue import get_catalogue
+    from game.rules import GameRoundManager
+    from game.simulate import HeadlessJudge, RandomPolicy, play_game, random_outcome
+
+    catalogue = get_catalogue(card_set)
+
+    mismatches = 0
+    for seed in range(n_games):
+        manager = GameRoundManager(catalogue, verbose=False, seed=seed)
+        rng = manager.state.rng
+        manager.judge = HeadlessJudge(random_outcome(rng=rng))
+        state = manager.state
+        zobrist = state.start_hashing(include_round=True)
+        journal = state.start_journal()
+        start = zobrist.value
+        play_game(manager, (RandomPolicy(rng=rng), RandomPolicy(rng=rng)))
+        mismatches += zobrist.value != DEFAULT_KEYS.hash_state(state, include_round=True)
+        journal.undo()
+        mismatches += zobrist.value != start
+    print(f"=== Zobrist 哈希 ({card_set}) ===")
+    print(f"{n_games} 局完整对局及撤销后增量哈希与完整计算不一致: {mismatches}")
+
+    # 判定结果只由卡牌决定，使搜索树确定；不同出牌顺序可能到达相同局面
+    outcome = lambda card, player_id, field: card.id % 3 != 0
+    positions = 20
+    # 预先生成本卡牌集的键，避免计入首次生成的开销
+    DEFAULT_KEYS.hash_state(GameRoundManager(catalogue, verbose=False).state)
+    results = {}
+    for label, use_table in (("无置换表", False), ("置换表", True)):
+        table = TranspositionTable(1 << 18) if use_table else None
+        nodes = [0]
+        values = []
+        begin = time.perf_counter()
+        for seed in range(positions):
+            manager = GameRoundManager(catalogue, HeadlessJudge(outcome), verbose=False, seed=seed)
+            manager.initialize_game_state()
+            manager.deal_phase()
+            manager.state.start_journal()
+            manager.state.start_hashing()
+            if table is not None:
+                table.new_search()
+            manager.state.rng.seed(seed)
+            values.append(_negamax(manager, depth, table, nodes))
+        results[label] = (nodes[0], time.perf_counter() - begin, values, table)
+
+    print(f"=== 置换表 (深度 {depth}，{positions} 个局面) ===")
+    base_nodes, base_time, base_values, _ = results["无置换表"]
+    for label, (nodes, elapsed, values, table) in results.items():
+        extra = f"，命中率 {table.hit_rate():.1%}，条目 {table.used()}/{table.capacity}" if table else ""
+        print(f"{label}: 展开 {nodes:8,d} 个节点 ({nodes / base_nodes:.1%})，耗时 {elapsed:.2f}s{extra}")
+    same = sum(a == b for a, b in zip(base_values, results["置换表"][2]))
+    print(f"两种搜索的根节点估值一致: {same}/{positions}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,453 @@
+import random
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from game.card import Card
+
+
+class Zone(list):
+    """有序卡牌区域（牌库、手牌、得分区、弃牌区）
+
+    本身就是卡牌的列表：下标 0 为顶部，len()、迭代、下标与切片、in（按卡牌）和 == 都按卡牌序列；
+    按 ID 查询用 get() / has()，修改只通过本类的方法，列表自带的 pop、sort、下标赋值与 del 被禁用。
+    同一区域内卡牌 ID 唯一。
+
+    内部表示按区域大小切换：
+    - 小区域（不超过 SMALL_LIMIT 张，如手牌、得分区与 20 张的牌库）就是普通列表：读取与追加都是
+      list 的 C 实现，未跟踪时没有额外开销；顶部取牌与按 ID 移除最多移动 SMALL_LIMIT 个指针。
+      与列表一样不检查重复 ID；
+    - 大区域（LargeZone）：带空位的槽位数组加 ID 索引（ID -> 槽位），顶部取牌、按 ID 移除、追加、
+      计数均摊 O(1)，按位置访问、随机抽样和洗牌在有空位时先压缩一次。
+      小区域超过 SMALL_LIMIT 张后在下一次取牌或按 ID 移除时转为大区域，压缩到不超过时转回。
+    """
+    __slots__ = ("_index", "_head", "_listener")
+
+    # 超过该张数时改用 ID 索引
+    SMALL_LIMIT = 64
+    # 大区域中空位数超过该值且多于存活卡牌数时自动压缩
+    COMPACT_THRESHOLD = 16
+
+    def __init__(self, cards: Iterable['Card'] = ()):
+        list.__init__(self, cards)
+        self._index: Optional[Dict[int, int]] = None  # 大区域的 ID -> 槽位，小区域为 None
+        self._head = 0  # 大区域中第一个可能非空的槽位，之前的槽位都是空位
+        self._listener: Optional['ZoneListener'] = None
+
+    # ---------- 序列协议 ----------
+
+    def __contains__(self, card) -> bool:
+        found = self.get(getattr(card, "id", None))
+        return found is not None and found == card
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Zone({list(self)!r})"
+
+    def __reduce__(self):
+        return Zone, (list(self),), self._listener
+
+    def __setstate__(self, listener: Optional['ZoneListener']):
+        if listener is not None:
+            self.track(listener)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Zone 只能通过 append/insert/pop_top/remove 等方法修改")
+
+    pop = sort = reverse = __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+    # ---------- 按 ID 查询 ----------
+
+    def get(self, card_id: int) -> Optional['Card']:
+        """按 ID 查找卡牌"""
+        for card in self:
+            if card.id == card_id:
+                return card
+        return None
+
+    def has(self, card_id: int) -> bool:
+        """区域中是否有该 ID 的卡牌"""
+        return self.get(card_id) is not None
+
+    def ids(self) -> List[int]:
+        return [card.id for card in self]
+
+    def copy(self) -> 'Zone':
+        """浅复制（卡牌对象共享），副本不被跟踪"""
+        return Zone(self)
+
+    def top(self) -> Optional['Card']:
+        """查看顶部的牌（不取出）"""
+        return self[0] if self else None
+
+    # ---------- 修改 ----------
+    # 小区域的 append 与 extend 直接是 list 的实现
+
+    def pop_top(self) -> Optional['Card']:
+        """从顶部取一张牌，区域为空时返回 None"""
+        if len(self) > self.SMALL_LIMIT:
+            return LargeZone.pop_top(self._to_large())
+        return list.pop(self, 0) if self else None
+
+    def insert(self, index: int, card: 'Card'):
+        """插入到第 index 张的位置（index <= 0 时放到顶部，超出末尾时放到底部）"""
+        list.insert(self, max(index, 0), card)
+
+    def take_top(self, n: int) -> List['Card']:
+        """从顶部依次取出至多 n 张牌"""
+        taken = self[:n]
+        list.__delitem__(self, slice(None, n))
+        return taken
+
+    def remove(self, card_id: int) -> Optional['Card']:
+        """按 ID 移除卡牌，未找到时返回 None"""
+        if len(self) > self.SMALL_LIMIT:
+            return LargeZone.remove(self._to_large(), card_id)
+        for index, card in enumerate(self):
+            if card.id == card_id:
+                return list.pop(self, index)
+        return None
+
+    def clear(self) -> List['Card']:
+        """取出全部卡牌"""
+        cards = list(self)
+        list.clear(self)
+        return cards
+
+    def sample(self, rng: random.Random, k: int) -> List['Card']:
+        """随机抽样 k 张（不取出）
+
+        与对列表调用 rng.sample 消耗相同的随机数并选出相同位置的卡牌。
+        """
+        return [self[i] for i in rng.sample(range(len(self)), k)]
+
+    def shuffle(self, rng: random.Random):
+        """原地洗牌，结果与对同序列表调用 rng.shuffle 一致"""
+        cards = list(self)
+        rng.shuffle(cards)
+        list.__setitem__(self, slice(None), cards)
+
+    def reorder(self, cards: List['Card']):
+        """按给定顺序重排（cards 须与区域内卡牌相同）"""
+        list.__setitem__(self, slice(None), cards)
+
+    # ---------- 监听 ----------
+
+    def track(self, listener: 'ZoneListener'):
+        """开始向 listener 报告变化；未跟踪的区域不做任何额外工作"""
+        self._listener = listener
+        self._set_form(isinstance(self, LargeZone))
+
+    def untrack(self):
+        self._listener = None
+        self._set_form(isinstance(self, LargeZone))
+
+    # ---------- 内部 ----------
+
+    def _position(self, card_id: int) -> Optional[int]:
+        """卡牌在区域中的位置（0 为顶部），未找到时为 None"""
+        for index, card in enumerate(self):
+            if card.id == card_id:
+                return index
+        return None
+
+    def _set_form(self, large: bool):
+        if self._listener is None:
+            self.__class__ = LargeZone if large else Zone
+        else:
+            self.__class__ = TrackedLargeZone if large else TrackedZone
+
+    def _to_large(self) -> 'LargeZone':
+        """小区域转为大区域（列表本身即为无空位的槽位数组）"""
+        index = {card.id: slot for slot, card in enumerate(self)}
+        if len(index) != len(self):
+            raise ValueError("区域中有重复的卡牌 ID")
+        self._index = index
+        self._head = 0
+        self._set_form(True)
+        return self
+
+
+def _dense(method: Callable) -> Callable:
+    """大区域上不常用的列表读取：先压缩去掉空位，再调用 list 的实现"""
+    def read(self, *args):
+        if list.__len__(self) != len(self._index):
+            self._compact()
+        return method(self, *args)
+    read.__name__ = method.__name__
+    return read
+
+
+class LargeZone(Zone):
+    """大区域：列表存储为带空位（None）的槽位数组，_head 之前都是空位，_index 为 ID -> 槽位"""
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator['Card']:
+        if list.__len__(self) == len(self._index):
+            return list.__iter__(self)
+        return (card for card in islice(list.__iter__(self), self._head, None) if card is not None)
+
+    def __getitem__(self, index):
+        if list.__len__(self) != len(self._index):
+            if isinstance(index, int) and 0 <= index < len(self._index):
+                # 有空位时顺序跳过，避免为一次读取压缩整个区域
+                return next(islice(iter(self), index, None))
+            self._compact()
+        return list.__getitem__(self, index)
+
+    __reversed__ = _dense(list.__reversed__)
+    __add__ = _dense(list.__add__)
+    __mul__ = __rmul__ = _dense(list.__mul__)
+    __lt__ = _dense(list.__lt__)
+    __le__ = _dense(list.__le__)
+    __gt__ = _dense(list.__gt__)
+    __ge__ = _dense(list.__ge__)
+    count = _dense(list.count)
+    index = _dense(list.index)
+
+    def get(self, card_id: int) -> Optional['Card']:
+        slot = self._index.get(card_id)
+        return None if slot is None else list.__getitem__(self, slot)
+
+    def has(self, card_id: int) -> bool:
+        return card_id in self._index
+
+    def top(self) -> Optional['Card']:
+        if not self._index:
+            return None
+        self._skip_head()
+        return list.__getitem__(self, self._head)
+
+    def append(self, card: 'Card'):
+        index, card_id = self._index, card.id
+        if card_id in index:
+            raise ValueError(f"卡牌 {card_id} 已在该区域中")
+        index[card_id] = list.__len__(self)
+        list.append(self, card)
+
+    def extend(self, cards: Iterable['Card']):
+        for card in cards:
+            LargeZone.append(self, card)
+
+    def pop_top(self) -> Optional['Card']:
+        index = self._index
+        if not index:
+            return None
+        head = self._head
+        card = list.__getitem__(self, head)
+        while card is None:
+            head += 1
+            card = list.__getitem__(self, head)
+        list.__setitem__(self, head, None)
+        self._head = head + 1
+        del index[card.id]
+        if head >= self.COMPACT_THRESHOLD and head >= len(index):
+            self._compact()
+        return card
+
+    def insert(self, index: int, card: 'Card'):
+        ids = self._index
+        if card.id in ids:
+            raise ValueError(f"卡牌 {card.id} 已在该区域中")
+        index = max(index, 0)
+        if index >= len(ids):
+            LargeZone.append(self, card)
+            return
+        if index == 0 and self._head > 0:
+            # 顶部之前的槽位都是空位，直接复用
+            self._head -= 1
+            list.__setitem__(self, self._head, card)
+            ids[card.id] = self._head
+            return
+        if list.__len__(self) - self._head != len(ids):
+            self._compact()
+            if not isinstance(self, LargeZone):
+                # 压缩后回到了小区域
+                Zone.insert(self, index, card)
+                return
+            ids = self._index
+        pos = self._head + index
+        list.insert(self, pos, card)
+        for slot in range(pos, list.__len__(self)):
+            ids[list.__getitem__(self, slot).id] = slot
+
+    def take_top(self, n: int) -> List['Card']:
+        # 取牌中途可能压缩回小区域，每次按当前表示取牌
+        taken = []
+        while n > 0 and self:
+            taken.append(self.pop_top())
+            n -= 1
+        return taken
+
+    def remove(self, card_id: int) -> Optional['Card']:
+        index = self._index
+        slot = index.pop(card_id, None)
+        if slot is None:
+            return None
+        card = list.__getitem__(self, slot)
+        list.__setitem__(self, slot, None)
+        if list.__len__(self) > 2 * len(index) + self.COMPACT_THRESHOLD:
+            self._compact()
+        return card
+
+    def clear(self) -> List['Card']:
+        cards = list(self)
+        list.clear(self)
+        self._to_small()
+        return cards
+
+    def sample(self, rng: random.Random, k: int) -> List['Card']:
+        if list.__len__(self) != len(self._index):
+            self._compact()
+        return Zone.sample(self, rng, k)
+
+    def shuffle(self, rng: random.Random):
+        cards = list(self)
+        rng.shuffle(cards)
+        self._replace(cards)
+
+    def reorder(self, cards: List['Card']):
+        self._replace(list(cards))
+
+    def _position(self, card_id: int) -> Optional[int]:
+        if card_id not in self._index:
+            return None
+        if list.__len__(self) != len(self._index):
+            self._compact()
+            if not isinstance(self, LargeZone):
+                return Zone._position(self, card_id)
+        return self._index[card_id]
+
+    def _skip_head(self):
+        head, end = self._head, list.__len__(self)
+        while head < end and list.__getitem__(self, head) is None:
+            head += 1
+        self._head = head
+
+    def _compact(self):
+        """去掉空位，压缩后 _head 为 0；不超过 SMALL_LIMIT 张时回到小区域"""
+        self._replace([card for card in islice(list.__iter__(self), self._head, None) if card is not None])
+
+    def _replace(self, cards: List['Card']):
+        """以无空位的 cards 替换全部槽位，按张数选择表示"""
+        list.__setitem__(self, slice(None), cards)
+        self._head = 0
+        if len(cards) > self.SMALL_LIMIT:
+            self._index = {card.id: slot for slot, card in enumerate(cards)}
+        else:
+            self._to_small()
+
+    def _to_small(self):
+        self._index = None
+        self._head = 0
+        self._set_form(False)
+
+
+# ==========================
+# 区域变化监听
+# ==========================
+
+class ZoneListener:
+    """区域变化监听器（撤销日志、局面哈希等），index 为变化处在区域中的位置"""
+
+    def on_insert(self, zone: Zone, card: 'Card', index: int):
+        pass
+
+    def on_remove(self, zone: Zone, card: 'Card', index: int):
+        pass
+
+    def on_reorder(self, zone: Zone, previous: List['Card']):
+        pass
+
+
+class ListenerGroup(ZoneListener):
+    """把同一区域的变化依次转发给多个监听器"""
+    __slots__ = ("listeners",)
+
+    def __init__(self, listeners: Iterable[ZoneListener]):
+        self.listeners = tuple(listeners)
+
+    def on_insert(self, zone: Zone, card: 'Card', index: int):
+        for listener in self.listeners:
+            listener.on_insert(zone, card, index)
+
+    def on_remove(self, zone: Zone, card: 'Card', index: int):
+        for listener in self.listeners:
+            listener.on_remove(zone, card, index)
+
+    def on_reorder(self, zone: Zone, previous: List['Card']):
+        for listener in self.listeners:
+            listener.on_reorder(zone, previous)
+
+
+class TrackedZone(Zone):
+    """被跟踪的区域：每次变化后通知监听器。由 Zone.track() 切换得到"""
+    __slots__ = ()
+
+    def append(self, card: 'Card'):
+        super().append(card)
+        self._listener.on_insert(self, card, len(self) - 1)
+
+    def extend(self, cards: Iterable['Card']):
+        for card in cards:
+            self.append(card)
+
+    def insert(self, index: int, card: 'Card'):
+        super().insert(index, card)
+        self._listener.on_insert(self, card, min(max(index, 0), len(self) - 1))
+
+    def pop_top(self) -> Optional['Card']:
+        card = super().pop_top()
+        if card is not None:
+            self._listener.on_remove(self, card, 0)
+        return card
+
+    def take_top(self, n: int) -> List['Card']:
+        taken = []
+        while n > 0 and self:
+            taken.append(self.pop_top())
+            n -= 1
+        return taken
+
+    def remove(self, card_id: int) -> Optional['Card']:
+        index = self._position(card_id)
+        if index is None:
+            return None
+        card = super().remove(card_id)
+        self._listener.on_remove(self, card, index)
+        return card
+
+    def clear(self) -> List['Card']:
+        # 逐张从顶部取出，每次通知时区域都已是对应的中间状态
+        cards = []
+        while self:
+            cards.append(self.pop_top())
+        return cards
+
+    def shuffle(self, rng: random.Random):
+        previous = list(self)
+        super().shuffle(rng)
+        self._listener.on_reorder(self, previous)
+
+    def reorder(self, cards: List['Card']):
+        previous = list(self)
+        super().reorder(cards)
+        self._listener.on_reorder(self, previous)
+
+
+class TrackedLargeZone(TrackedZone, LargeZone):
+    """被跟踪的大区域"""
+    __slots__ = ()
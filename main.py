@@ -1,18 +1,51 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from typing import Dict, Optional
+import asyncio
 import json
 
-from server.api import StartGameRequest, PlayCardRequest
-from server.room import RoomManager
-from game.rules import GameRoundManager
+from server.api import StartGameRequest, PlayCardRequest, AddBotRequest, JudgeBatchRequest
+from server.room import RoomClosed, RoomManager, SERVER_BOT_CONFIG
+from server.sharding import worker_shard
+from server.judging import DEFAULT_PIPELINE
+from server.persistence import EventStore, store_path
+from server.wire import CODECS, negotiate
+from game.catalogue import CARD_SETS, get_catalogue
+from game.judge import Judge
+from dataclasses import replace
 
 app = FastAPI()
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# 全局房间管理器
-room_manager = RoomManager()
+# 全局房间管理器（分片部署时只管理本分片的房间，见 server/cluster.py）
+room_manager = RoomManager(shard=worker_shard())
+# 批量裁定用（不读取命令行，共用进程内的裁定缓存）
+batch_judge = Judge(mode="auto")
+
+@app.on_event("startup")
+async def startup():
+    # 从事件日志恢复上次运行时的房间，之后的房间事件继续记录到同一文件
+    path = store_path(worker_shard())
+    if path:
+        count = room_manager.recover(EventStore(path))
+        print(f"从 {path} 恢复了 {count} 个房间")
+    # 后台回收空闲房间（未开局、已终局、无连接的房间按 RoomTTL 过期）
+    room_manager.start_sweeper()
+
+@app.on_event("shutdown")
+async def shutdown():
+    room_manager.stop_sweeper()
+    for room in room_manager.rooms.values():
+        room.close()
+    if room_manager.store is not None:
+        room_manager.store.close()
+    DEFAULT_PIPELINE.shutdown()
+
+@app.exception_handler(RoomClosed)
+async def room_closed(request: Request, exc: RoomClosed):
+    # 请求处理期间房间被回收：与房间不存在同样处理
+    return JSONResponse(status_code=404, content={"detail": "Room not found"})
 
 @app.get("/")
 async def root():
@@ -20,7 +53,10 @@ async def root():
 
 @app.post("/api/create_room")
 async def create_room():
-    room = room_manager.create_room()
+    try:
+        room = room_manager.create_room()
+    except RuntimeError:
+        raise HTTPException(status_code=503, detail="Room limit reached")
     return {"success": True, "room_id": room.room_id}
 
 @app.post("/api/join_room/{room_id}")
@@ -29,9 +65,10 @@ async def join_room(room_id: str):
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     
-    if room.is_full():
+    try:
+        player_key, player_id = await room.call(room.add_player)
+    except ValueError:
         raise HTTPException(status_code=400, detail="Room is full")
-    player_key, player_id = room.add_player()
     print(len(room.players))
     return {
         "success": True,
@@ -39,6 +76,27 @@ async def join_room(room_id: str):
         "player_count": len(room.players)
     }
 
+@app.post("/api/add_bot/{room_id}")
+async def add_bot(room_id: str, request: AddBotRequest = AddBotRequest()):
+    room = room_manager.get_room(room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    if room.is_full():
+        raise HTTPException(status_code=400, detail="Room is full")
+    try:
+        config = replace(SERVER_BOT_CONFIG, rollouts=request.rollouts, time_limit=request.time_limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Bot needs a positive rollout or time budget")
+    try:
+        player_id = await room.call(room.add_bot, config)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Room is full")
+    return {
+        "success": True,
+        "player_id": player_id,
+        "player_count": len(room.players)
+    }
+
 @app.post("/api/start_game/{room_id}")
 async def start_game(room_id: str, request: StartGameRequest):
     room = room_manager.get_room(room_id)
@@ -46,23 +104,56 @@ async def start_game(room_id: str, request: StartGameRequest):
         raise HTTPException(status_code=404, detail="Room not found")
     if not room.has_player(request.key):
         raise HTTPException(status_code=403, detail="Not a player in this room")
-    if len(room.players) < 2:
-        raise HTTPException(status_code=400, detail="Need two players to start")
-    room.round_manager=GameRoundManager()
-    room.round_manager.initialize_game_state()
-    room.round_manager.deal_phase()
-    await room.broadcast_game_state()
+    # 同一房间的命令按顺序执行，不会与出牌、作答交错
+    error = await room.call(room.start_game)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     return {"success": True,"game_state":room.format_game_state()}
 
 
 
+@app.get("/api/cards/{card_set}")
+async def get_cards(card_set: str, request: Request):
+    """卡牌目录：对局状态中只含卡牌 ID，客户端据此还原卡牌内容；带 ETag，可长期缓存"""
+    if card_set not in CARD_SETS:
+        raise HTTPException(status_code=404, detail="Card set not found")
+    body, etag = get_catalogue(card_set).encoded()
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/game_state/{room_id}")
 async def get_game_state(room_id: str, player_key: Optional[str] = None):
     room = room_manager.get_room(room_id)
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     
-    return {"success": True, "game_state": room.format_game_state(player_key)}
+    # 状态未变化时直接复用已编码的 JSON
+    state = room.encoded_state(player_key)
+    return Response(content=f'{{"success":true,"version":{room.sync.version},"game_state":{state}}}',
+                    media_type="application/json")
+
+@app.get("/api/room_metrics/{room_id}")
+async def get_room_metrics(room_id: str):
+    """房间的生命周期阶段、内存估算，以及各连接发送队列的统计：队列深度与峰值、已发送、丢弃与合并的消息数"""
+    # 监控查询不算房间活动
+    room = room_manager.rooms.get(room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    return {
+        "success": True,
+        "version": room.sync.version,
+        "lifecycle": room.lifecycle,
+        "memory_estimate": room.memory_estimate(),
+        "send_failures": room.send_failures,
+        "connections": room.connection_stats(),
+    }
+
+@app.get("/api/room_stats")
+async def get_room_stats():
+    """本进程的房间数、各生命周期阶段的分布、已回收数与内存估算（分片部署时由路由汇总各工作进程）"""
+    return {"success": True, **room_manager.stats()}
 
 @app.post("/api/play_card/{room_id}")
 async def play_card(room_id: str, request: PlayCardRequest):
@@ -73,38 +164,50 @@ async def play_card(room_id: str, request: PlayCardRequest):
     if not room.has_player(request.key):
         raise HTTPException(status_code=403, detail="Not a player in this room")
     
-    if not room.round_manager:
-        raise HTTPException(status_code=400, detail="Game not started")
-    
-    # 获取玩家ID和游戏状态
-    player_id = room.get_player_id(request.key)
-    game_state = room.round_manager.state
-    
-    # 验证是否轮到该玩家
-    if game_state.current_player_id != player_id:
-        raise HTTPException(status_code=400, detail="Not your turn")
-    
-    # 获取玩家对象
-    player = game_state.get_current_player()
-    
-    # 验证卡牌是否在手牌中
-    if not player.has_card_id(request.card_id):
-        raise HTTPException(status_code=400, detail="Card not in hand")
-    
-    # 从手牌中移除并打出卡牌
-    card = player.play_card(request.card_id)
-    
-    # 使用GameRoundManager处理回合
-    room.round_manager.run_one_turn(card)
+    # 校验与结算作为一条命令在房间邮箱中执行，并发请求不会交错
+    error = await room.call(room.play_card, request.key, request.card_id)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     
-    # 广播游戏状态
-    await room.broadcast_game_state()
-    
-    return {"status": "success"}
+    return {"status": "success", "pending": room.pending is not None}
+
+@app.post("/api/judge_batch")
+async def judge_batch(request: JudgeBatchRequest):
+    """批量裁定一批作答（如全班对同一张卡牌的作答），结果按输入顺序返回
+
+    score 为精确相似度；exact 为 false 时，明显不符而被提前淘汰的作答 ok 为 false、score 为 null。
+    """
+    if request.card_set not in CARD_SETS:
+        raise HTTPException(status_code=404, detail="Card set not found")
+    if request.field not in ("meaning", "story"):
+        raise HTTPException(status_code=400, detail="Field must be meaning or story")
+    catalogue = get_catalogue(request.card_set)
+    items = [(item.card_id, item.answer) for item in request.answers]
+    if any(card_id not in catalogue for card_id, _ in items):
+        raise HTTPException(status_code=400, detail="Unknown card id")
+    # 分组与缓存查询在线程中进行，打分分发到判题进程池
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(
+        None,
+        lambda: batch_judge.judge_batch(items, request.field, request.threshold, catalogue,
+                                        DEFAULT_PIPELINE.executor, request.exact),
+    )
+    return {
+        "success": True,
+        "results": [
+            {"card_id": card_id, "ok": ok, "score": score}
+            for (card_id, _), (ok, score) in zip(items, results)
+        ]
+    }
 
 @app.websocket("/ws/{room_id}")
-async def websocket_endpoint(websocket: WebSocket, room_id: str, player_key: Optional[str] = None):
-    """WebSocket连接用于实时更新"""
+async def websocket_endpoint(websocket: WebSocket, room_id: str, player_key: Optional[str] = None,
+                             encoding: Optional[str] = None):
+    """WebSocket连接用于实时更新
+
+    encoding 为客户端可接受的消息编码（按偏好逗号分隔，如 msgpack,deflate），默认 JSON 文本帧；
+    连接后的第一条消息（总是 JSON 文本）告知选定的编码。
+    """
     room = room_manager.get_room(room_id)
     if not room:
         await websocket.close(code=4000, reason="Room not found")
@@ -115,19 +218,18 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str, player_key: Opt
         return
     
     connection_id = f"{room_id}_{id(websocket)}"
+    # 观战者没有玩家 key，以连接 ID 登记，同样接收状态推送
+    connection_key = player_key or connection_id
+
+    codec = negotiate(encoding)
 
     await websocket.accept()
+    await websocket.send_json({"type": "hello", "encoding": codec.name, "available": list(CODECS)})
     
-    # 更新连接信息
-    if player_key:
-        room.add_connection(player_key, websocket)
-        # 立即发送当前游戏状态
+    # 更新连接信息，并立即发送当前游戏状态
+    room.add_connection(connection_key, websocket, codec)
     try:
-        state = room.format_game_state(player_key)
-        await websocket.send_json({
-            "type": "game_state",
-            "data": state
-        })
+        await room.call(room.resync, connection_key)
     except Exception as e:
         await websocket.send_json({
             "type": "error",
@@ -139,14 +241,19 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str, player_key: Opt
             data = await websocket.receive_text()
             # 处理WebSocket消息
             message = json.loads(data)
-            if message.get("type") == "refresh":
-                await room.broadcast_game_state()
+            if message.get("type") in ("refresh", "resync"):
+                await room.call(room.resync, connection_key)
+            elif message.get("type") == "ack":
+                await room.acknowledge(connection_key, int(message.get("version", 0)))
+            elif message.get("type") == "answer" and player_key:
+                # 防守方作答，打分在进程池中进行
+                error = await room.submit_answer(player_key, message.get("meaning", ""), message.get("story", ""))
+                if error:
+                    await room.send_to_connection(connection_key, {"type": "error", "message": error})
     except WebSocketDisconnect:
-        if player_key:
-            room.remove_connection(player_key)
+        room.remove_connection(connection_key)
     except Exception as e:
-        if player_key:
-            room.remove_connection(player_key)
+        room.remove_connection(connection_key)
         try:
             await websocket.send_json({
                 "type": "error",
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 class StartGameRequest(BaseModel):
@@ -5,4 +7,20 @@ class StartGameRequest(BaseModel):
 
 class PlayCardRequest(BaseModel):
     key: str
-    card_id: int
\ No newline at end of file
+    card_id: int
+
+class AddBotRequest(BaseModel):
+    rollouts: Optional[int] = 1000
+    time_limit: Optional[float] = None
+
+
+class BatchAnswer(BaseModel):
+    card_id: int
+    answer: str
+
+class JudgeBatchRequest(BaseModel):
+    answers: List[BatchAnswer]
+    field: str = "meaning"
+    card_set: str = "v1"
+    threshold: float = 0.6
+    exact: bool = True      # 为 false 时只保证判定结果，被上界提前淘汰的作答 score 为 null
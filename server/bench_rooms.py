@@ -0,0 +1,214 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from game.catalogue import get_catalogue
+from game.mcts import MCTSConfig
+from game.rules import GameRoundManager
+from server.judging import JudgingPipeline
+from server.room import GameRoom, RoomManager
+
+# 房间的并发压力测试与生命周期基准，独立于服务器运行时代码：python -m server.bench_rooms
+
+
+# ==========================
+# 压力测试
+# ==========================
+
+def check_room(room: GameRoom) -> Optional[str]:
+    """检查房间状态的一致性：每张卡牌恰好在一个区域中（或是等待作答的卡牌）"""
+    if room.round_manager is None:
+        return None
+    ids = [card.id for zone in room.round_manager.state.zones() for card in zone]
+    if room.pending is not None:
+        ids.append(room.pending.card.id)
+    if len(ids) != len(set(ids)):
+        return "卡牌重复"
+    if len(ids) != len(get_catalogue(room.round_manager.card_set)):
+        return f"卡牌数 {len(ids)} 不正确"
+    return None
+
+
+def stress(clients: int = 8, seconds: float = 3.0, rooms: int = 1000, seed: int = 0):
+    """并发压力测试
+
+    1. 同一房间：每位玩家 clients 个并发客户端不停地出牌、作答、刷新，偶尔重新开局，
+       另有一个巡检命令不断检查状态一致性；
+    2. 一个事件循环上 rooms 个房间同时对局，统计命令吞吐量。
+    """
+    class NullSocket:
+        async def send_text(self, text: str):
+            await asyncio.sleep(0)
+
+    async def play(room: GameRoom, key: str, rng: random.Random, counts: Dict[str, int]):
+        """一个客户端：按它看到的（可能已过时的）状态发出命令"""
+        state = room.round_manager.state
+        roll = rng.random()
+        if roll < 0.05:
+            counts["refresh"] += 1
+            await room.call(room.resync, key)
+        elif roll < 0.06 and counts["restart"] < 20:
+            counts["restart"] += 1
+            await room.call(room.start_game)
+        elif room.pending is not None:
+            error = await room.submit_answer(key, rng.choice(["", room.pending.card.meaning]),
+                                             rng.choice(["", room.pending.card.story]))
+            counts["answer" if error is None else "rejected"] += 1
+        else:
+            hand = list(state.player1.hand if room.players[key] == "player1" else state.player2.hand)
+            card_id = rng.choice(hand).id if hand else 0
+            error = await room.call(room.play_card, key, card_id)
+            counts["play" if error is None else "rejected"] += 1
+
+    async def hammer(bot: bool) -> Tuple[Dict[str, int], int, int]:
+        rng = random.Random(seed)
+        pipeline = JudgingPipeline(executor=ThreadPoolExecutor(2))
+        room = GameRoom(answer_timeout=0.05, pipeline=pipeline)
+        keys = [room.add_player()[0]]
+        if bot:
+            # 电脑思考期间（线程池中）其他命令只能排队
+            room.add_bot(MCTSConfig(rollouts=20, counter_rate=0.0, combo_rate=0.0))
+        else:
+            keys.append(room.add_player()[0])
+        for key in keys:
+            room.add_connection(key, NullSocket())
+        await room.call(room.start_game)
+        counts = {name: 0 for name in ("play", "answer", "rejected", "refresh", "restart")}
+        violations, checks = [], 0
+        deadline = time.monotonic() + seconds
+
+        async def client(key: str):
+            client_rng = random.Random(rng.random())
+            while time.monotonic() < deadline:
+                if room.round_manager.state.is_game_over():
+                    await room.call(room.start_game)
+                await play(room, key, client_rng, counts)
+
+        async def auditor():
+            nonlocal checks
+            while time.monotonic() < deadline:
+                error = await room.call(check_room, room)
+                checks += 1
+                if error:
+                    violations.append(error)
+                await asyncio.sleep(0)
+
+        await asyncio.gather(auditor(), *(client(key) for key in keys for _ in range(clients)))
+        room.close()
+        pipeline.shutdown()
+        return counts, checks, len(violations)
+
+    async def many() -> Tuple[int, float, int]:
+        rng = random.Random(seed)
+        pipeline = JudgingPipeline(executor=ThreadPoolExecutor(2))
+        all_rooms = []
+        for _ in range(rooms):
+            room = GameRoom(answer_timeout=1.0, pipeline=pipeline)
+            room.add_player()
+            room.add_player()
+            await room.call(room.start_game)
+            all_rooms.append(room)
+        commands = 0
+
+        async def player(room: GameRoom, key: str, player_rng: random.Random):
+            nonlocal commands
+            while not room.round_manager.state.is_game_over():
+                state = room.round_manager.state
+                pending = room.pending
+                if pending is not None and room.players[key] == pending.defender_id and not pending.scoring:
+                    await room.submit_answer(key, pending.card.meaning if player_rng.random() < 0.5 else "", pending.card.story)
+                    commands += 1
+                elif pending is None and state.current_player_id == room.players[key]:
+                    hand = list(state.get_current_player().hand)
+                    await room.call(room.play_card, key, player_rng.choice(hand).id if hand else 0)
+                    commands += 1
+                else:
+                    await asyncio.sleep(0.001)
+
+        begin = time.perf_counter()
+        await asyncio.gather(*(player(room, key, random.Random(rng.random()))
+                               for room in all_rooms for key in room.players))
+        elapsed = time.perf_counter() - begin
+        broken = sum(1 for room in all_rooms if check_room(room))
+        for room in all_rooms:
+            room.close()
+        pipeline.shutdown()
+        return commands, elapsed, broken
+
+    for bot, label in ((False, "两名人类玩家"), (True, "人类 vs 电脑")):
+        counts, checks, violations = asyncio.run(hammer(bot))
+        print(f"=== 单房间并发：{label}，每名人类玩家 {clients} 个客户端, {seconds:.0f} 秒 ===")
+        print("命令: " + ", ".join(f"{name} {count}" for name, count in counts.items()))
+        print(f"一致性检查 {checks} 次，违规 {violations} 次")
+
+    commands, elapsed, broken = asyncio.run(many())
+    print(f"=== {rooms} 个房间同时对局（单事件循环） ===")
+    print(f"{commands} 条命令 / {elapsed:.2f} 秒 = {commands / elapsed:,.0f} 条/秒，状态不一致的房间 {broken} 个")
+
+
+# ==========================
+# 房间回收基准
+# ==========================
+
+def lifecycle_benchmark(rooms: int = 200_000, card_set: str = "v1"):
+    """大量房间时的回收开销（最小堆 vs 全量扫描）与各阶段房间的内存估算"""
+    from game.simulate import HeadlessJudge, RandomPolicy, play_game, random_outcome
+
+    manager = RoomManager(max_rooms=rooms)
+    begin = time.perf_counter()
+    for _ in range(rooms):
+        room = manager.create_room()
+        room.add_player()
+    created = time.perf_counter() - begin
+    now = time.monotonic()
+
+    begin = time.perf_counter()
+    for _ in range(1000):
+        manager.sweep(now)
+    idle_sweep = (time.perf_counter() - begin) / 1000
+    begin = time.perf_counter()
+    expired = sum(1 for room in manager.rooms.values() if room.expires_at(manager.ttl) <= now)
+    full_scan = time.perf_counter() - begin
+
+    # 一半房间在期间有活动：到期时复核后重新入堆，另一半被回收
+    for i, room in enumerate(manager.rooms.values()):
+        if i % 2:
+            room.last_active += 300.0
+    begin = time.perf_counter()
+    evicted = manager.sweep(now + manager.ttl.waiting + 1.0)
+    due_sweep = time.perf_counter() - begin
+
+    print(f"=== 房间回收 ({rooms:,} 个等待中的房间) ===")
+    print(f"创建: {created / rooms * 1e6:6.1f} µs/个")
+    print(f"无到期房间时清理一次: {idle_sweep * 1e6:8.1f} µs  （全量扫描一次 {full_scan * 1e3:7.1f} ms，到期 {expired} 个）")
+    print(f"一半到期：回收 {evicted:,} 个、复核 {rooms - evicted:,} 个，共 {due_sweep * 1e3:7.1f} ms"
+          f"（{due_sweep / rooms * 1e6:.2f} µs/个）")
+
+    # 各阶段单个房间的内存估算
+    rng = random.Random(0)
+    catalogue = get_catalogue(card_set)
+    room = GameRoom()
+    room.add_player()
+    room.add_player()
+    sizes = {"waiting": room.memory_estimate()}
+    room.round_manager = GameRoundManager(catalogue, HeadlessJudge(random_outcome(rng=rng)), verbose=False, seed=0)
+    room.round_manager.subscribe(room.events, kinds=("deal", "draw", "play", "verdict", "effect", "game_over"))
+    room.round_manager.subscribe(room.sync, kinds=("zone_move",))
+    room.round_manager.initialize_game_state()
+    room.round_manager.deal_phase()
+    room._commit_state()
+    room.encoded_state(next(iter(room.players)))
+    sizes["playing"] = room.memory_estimate()
+    play_game(room.round_manager, (RandomPolicy(rng=rng), RandomPolicy(rng=rng)))
+    room._commit_state()
+    room.encoded_state(next(iter(room.players)))
+    sizes["finished"] = room.memory_estimate()
+    print("单个房间内存估算: " + "，".join(f"{name} {size / 1024:.1f} KiB" for name, size in sizes.items()))
+    print(f"{rooms:,} 个对局中的房间约 {sizes['playing'] * rooms / 2 ** 20:,.0f} MiB")
+
+
+if __name__ == "__main__":
+    stress()
+    lifecycle_benchmark()
@@ -0,0 +1,398 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from server.sharding import SHARD_ENV, shard_of
+
+# 路径中带房间号、需要转发到房间所在工作进程的接口：/api/<name>/<room_id>
+ROOM_ROUTES = frozenset(("join_room", "add_bot", "start_game", "game_state", "play_card", "room_metrics"))
+
+# 需要汇总所有工作进程结果的接口（各工作进程只统计自己的分片）
+AGGREGATE_ROUTES = frozenset(("/api/room_stats",))
+
+# 不转发的逐跳头部
+HOP_HEADERS = frozenset((b"connection", b"keep-alive", b"transfer-encoding", b"upgrade", b"host",
+                         b"proxy-connection", b"te", b"trailer"))
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ==========================
+# 路径解析与统计汇总
+# ==========================
+
+def room_of(path: str) -> Optional[str]:
+    """请求路径中的房间号；与房间无关的路径（创建房间、卡牌目录、批量裁定等）为 None"""
+    parts = path.strip("/").split("/")
+    if len(parts) == 2 and parts[0] == "ws":
+        return parts[1]
+    if len(parts) == 3 and parts[0] == "api" and parts[1] in ROOM_ROUTES:
+        return parts[2]
+    return None
+
+
+def merge_room_stats(parts: Sequence[dict]) -> dict:
+    """各工作进程 /api/room_stats 的结果相加为整个部署的统计"""
+    merged = {"success": True, "workers": len(parts)}
+    for key in ("rooms", "max_rooms", "evicted", "scheduled", "memory_estimate_total"):
+        merged[key] = sum(part[key] for part in parts)
+    lifecycles: Dict[str, int] = {}
+    for part in parts:
+        for name, count in part["lifecycles"].items():
+            lifecycles[name] = lifecycles.get(name, 0) + count
+    merged["lifecycles"] = lifecycles
+    merged["memory_estimate_avg"] = round(merged["memory_estimate_total"] / merged["rooms"]) if merged["rooms"] else 0
+    return merged
+
+
+# ==========================
+# 路由
+# ==========================
+
+class Router:
+    """分片部署的前端：按房间号把 REST 请求与 WebSocket 连接转发到房间所在的工作进程
+
+    纯 ASGI 应用，可直接交给 uvicorn 运行。workers[i] 为第 i 个分片的地址（如 http://127.0.0.1:8001）。
+    创建房间等与房间无关的请求轮流分给各工作进程（/api/room_stats 由路由汇总所有工作进程）；新房间号由处理请求的工作进程生成，
+    保证落在它自己的分片，之后同一房间的请求都由路由按哈希送回该进程。
+    """
+
+    def __init__(self, workers: Sequence[str]):
+        if httpx is None:
+            raise RuntimeError("路由需要 httpx：pip install httpx")
+        if not workers:
+            raise ValueError("至少需要一个工作进程")
+        self.workers = [url.rstrip("/") for url in workers]
+        self.client: Optional["httpx.AsyncClient"] = None
+        self._next = 0
+
+    def worker_for(self, path: str) -> str:
+        room_id = room_of(path)
+        if room_id is not None:
+            return self.workers[shard_of(room_id, len(self.workers))]
+        self._next = (self._next + 1) % len(self.workers)
+        return self.workers[self._next]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            await self._proxy_http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._proxy_websocket(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._client()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.client is not None:
+                    await self.client.aclose()
+                    self.client = None
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _client(self) -> "httpx.AsyncClient":
+        if self.client is None:
+            # 到工作进程的长连接池；作答打分可能较慢，不设读超时
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0, read=None),
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=256),
+            )
+        return self.client
+
+    @staticmethod
+    async def _respond(send, status: int, body: bytes, content_type: bytes = b"text/plain; charset=utf-8"):
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", content_type)]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _room_stats(self, send):
+        """房间统计：并发查询所有工作进程并汇总"""
+        client = self._client()
+        try:
+            responses = await asyncio.gather(*(client.get(url + "/api/room_stats") for url in self.workers))
+        except httpx.HTTPError as e:
+            await self._respond(send, 502, f"Worker unavailable: {e!r}".encode("utf-8"))
+            return
+        merged = merge_room_stats([response.json() for response in responses])
+        await self._respond(send, 200, json.dumps(merged).encode("utf-8"), b"application/json")
+
+    async def _proxy_http(self, scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        if scope["path"] in AGGREGATE_ROUTES:
+            await self._room_stats(send)
+            return
+        url = self.worker_for(scope["path"]) + scope["path"]
+        if scope.get("query_string"):
+            url += "?" + scope["query_string"].decode("latin-1")
+        headers = [(name, value) for name, value in scope["headers"] if name.lower() not in HOP_HEADERS]
+        client = self._client()
+        try:
+            request = client.build_request(scope["method"], url, headers=headers, content=body)
+            response = await client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            await self._respond(send, 502, f"Worker unavailable: {e!r}".encode("utf-8"))
+            return
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [(name, value) for name, value in response.headers.raw if name.lower() not in HOP_HEADERS],
+            })
+            # 原样转发（不解压），内容长度与编码头部保持一致
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await response.aclose()
+
+    async def _proxy_websocket(self, scope, receive, send):
+        import websockets
+
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+        url = "ws" + self.worker_for(scope["path"])[len("http"):] + scope["path"]
+        if scope.get("query_string"):
+            url += "?" + scope["query_string"].decode("latin-1")
+        # 先连上工作进程再接受客户端：工作进程拒绝（房间不存在、key 无效）时同样拒绝客户端
+        try:
+            upstream = await websockets.connect(url, max_size=None, ping_interval=None)
+        except Exception:
+            await send({"type": "websocket.close", "code": 4000})
+            return
+        await send({"type": "websocket.accept"})
+
+        async def client_to_worker():
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                data = message.get("text")
+                await upstream.send(data if data is not None else message.get("bytes", b""))
+
+        async def worker_to_client():
+            async for data in upstream:
+                if isinstance(data, bytes):
+                    await send({"type": "websocket.send", "bytes": data})
+                else:
+                    await send({"type": "websocket.send", "text": data})
+
+        upward = asyncio.ensure_future(client_to_worker())
+        downward = asyncio.ensure_future(worker_to_client())
+        try:
+            await asyncio.wait({upward, downward}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            upward.cancel()
+            downward.cancel()
+            await upstream.close()
+        if downward.done() and not downward.cancelled() and downward.exception() is None:
+            # 工作进程一侧先关闭：把关闭码转给客户端
+            code = upstream.close_code
+            await send({"type": "websocket.close", "code": code if code not in (None, 1005, 1006) else 1000})
+
+
+# ==========================
+# 进程管理
+# ==========================
+
+def start_worker(index: int, count: int, host: str, port: int, app: str = "main:app") -> subprocess.Popen:
+    """以分片模式启动一个 uvicorn 工作进程（单进程、单事件循环）"""
+    env = dict(os.environ, **{SHARD_ENV: f"{index}/{count}"})
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", host, "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env,
+    )
+
+
+def wait_ready(url: str, timeout: float = 30.0, process: Optional[subprocess.Popen] = None):
+    """等待服务开始响应"""
+    deadline = time.monotonic() + timeout
+    while True:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{url} 启动失败，退出码 {process.returncode}")
+        try:
+            httpx.get(url + "/", timeout=1.0)
+            return
+        except httpx.HTTPError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} 在 {timeout:.0f} 秒内未响应")
+            time.sleep(0.1)
+
+
+def stop(processes: Sequence[subprocess.Popen]):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def serve(workers: int = 4, host: str = "127.0.0.1", port: int = 8000, app: str = "main:app"):
+    """本机启动 workers 个分片工作进程（端口 port+1 起）与前端路由（端口 port）"""
+    import uvicorn
+
+    urls = [f"http://{host}:{port + 1 + i}" for i in range(workers)]
+    processes = [start_worker(i, workers, host, port + 1 + i, app) for i in range(workers)]
+    try:
+        for url, process in zip(urls, processes):
+            wait_ready(url, process=process)
+        uvicorn.run(Router(urls), host=host, port=port, log_level="warning")
+    finally:
+        stop(processes)
+
+
+# ==========================
+# 负载测试
+# ==========================
+
+async def _play_games(base: str, games: int, concurrency: int, seed: int) -> Tuple[Dict[str, int], List[float]]:
+    """concurrency 个并发客户端经路由完成 games 局对局：建房、两名玩家加入并各开一个 WebSocket、开局，
+    之后轮流查询状态、出牌，防守方经 WebSocket 作答并等待裁定结果。"""
+    import json
+    import random
+    import websockets
+
+    counts = {"requests": 0, "answers": 0, "games": 0, "errors": 0}
+    latencies: List[float] = []
+    ws_base = "ws" + base[len("http"):]
+    remaining = games
+    rng = random.Random(seed)
+
+    async with httpx.AsyncClient(base_url=base, timeout=60.0,
+                                 limits=httpx.Limits(max_connections=None)) as client:
+        catalogue = {card["id"]: card for card in (await client.get("/api/cards/v1")).json()["cards"]}
+
+        async def request(method: str, url: str, **kwargs) -> dict:
+            begin = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - begin)
+            counts["requests"] += 1
+            if response.status_code >= 400:
+                counts["errors"] += 1
+            return response.json()
+
+        async def game(game_rng: random.Random):
+            room_id = (await request("POST", "/api/create_room"))["room_id"]
+            keys = [(await request("POST", f"/api/join_room/{room_id}"))["key"] for _ in range(2)]
+            results: Dict[str, asyncio.Queue] = {key: asyncio.Queue() for key in keys}
+            sockets = [await websockets.connect(f"{ws_base}/ws/{room_id}?player_key={key}", max_size=None)
+                       for key in keys]
+
+            async def drain(key: str, socket):
+                # 不断读取推送，避免积压；裁定结果交给作答方
+                async for data in socket:
+                    message = json.loads(data)
+                    if message.get("type") == "judge_result":
+                        results[key].put_nowait(message)
+
+            readers = [asyncio.ensure_future(drain(key, socket)) for key, socket in zip(keys, sockets)]
+            try:
+                await request("POST", f"/api/start_game/{room_id}", json={"key": keys[0]})
+                for _ in range(500):
+                    state = (await request("GET", f"/api/game_state/{room_id}", params={"player_key": keys[0]}))["game_state"]
+                    if state["state"] != "playing":
+                        break
+                    by_player = {player["player_id"]: key for key, player in state["players"].items()}
+                    pending = state.get("pending_judgement")
+                    if pending is not None:
+                        defender = by_player[pending["defender"]]
+                        card = catalogue[pending["card_id"]]
+                        right = game_rng.random() < 0.5
+                        await sockets[keys.index(defender)].send(json.dumps({
+                            "type": "answer",
+                            "meaning": card["meaning"] if right else "",
+                            "story": card["story"] if right else "",
+                        }))
+                        await results[defender].get()
+                        counts["answers"] += 1
+                        continue
+                    attacker = by_player[state["current_player_id"]]
+                    if attacker != keys[0]:
+                        state = (await request("GET", f"/api/game_state/{room_id}", params={"player_key": attacker}))["game_state"]
+                    hand = state["players"][attacker].get("hand_cards") or []
+                    if not hand:
+                        break
+                    await request("POST", f"/api/play_card/{room_id}",
+                                  json={"key": attacker, "card_id": game_rng.choice(hand)})
+                counts["games"] += 1
+            finally:
+                for reader in readers:
+                    reader.cancel()
+                for socket in sockets:
+                    await socket.close()
+
+        async def player():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await game(random.Random(rng.random()))
+
+        await asyncio.gather(*(player() for _ in range(concurrency)))
+    return counts, latencies
+
+
+def load_test(worker_counts: Sequence[int] = (1, 2, 4), games: int = 200, concurrency: int = 32,
+              host: str = "127.0.0.1", port: int = 8600, app: str = "main:app", seed: int = 0):
+    """对 1、2、4…个分片分别启动路由与工作进程，用同样的对局负载测吞吐量"""
+    if httpx is None:
+        raise RuntimeError("负载测试需要 httpx：pip install httpx")
+    print(f"=== 分片负载测试：{games} 局，{concurrency} 个并发客户端，本机 {os.cpu_count()} 个 CPU ===")
+    baseline = None
+    for workers in worker_counts:
+        router = subprocess.Popen(
+            [sys.executable, "-m", "server.cluster", "serve", "--workers", str(workers),
+             "--host", host, "--port", str(port), "--app", app],
+            cwd=REPO_ROOT, stdout=subprocess.DEVNULL,
+        )
+        base = f"http://{host}:{port}"
+        try:
+            wait_ready(base, timeout=60.0, process=router)
+            begin = time.perf_counter()
+            counts, latencies = asyncio.run(_play_games(base, games, concurrency, seed))
+            elapsed = time.perf_counter() - begin
+        finally:
+            stop([router])
+        latencies.sort()
+        rate = (counts["requests"] + counts["answers"]) / elapsed
+        baseline = baseline or rate
+        print(f"{workers} 个工作进程: {counts['games'] / elapsed:6.1f} 局/秒  {rate:7.0f} 操作/秒 ({rate / baseline:.2f}x)"
+              f"  请求延迟 p50 {latencies[len(latencies) // 2] * 1e3:6.1f} ms  p99 {latencies[int(len(latencies) * 0.99)] * 1e3:6.1f} ms"
+              f"  错误 {counts['errors']}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="多进程分片部署：serve 启动路由与工作进程，load 运行负载测试")
+    parser.add_argument("mode", choices=("serve", "load"))
+    parser.add_argument("--workers", default="4", help="工作进程数；load 模式可逗号分隔多组，如 1,2,4")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    if args.mode == "serve":
+        serve(int(args.workers), args.host, args.port, args.app)
+    else:
+        load_test([int(n) for n in args.workers.split(",")], args.games, args.concurrency,
+                  args.host, args.port, args.app)
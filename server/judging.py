@@ -0,0 +1,206 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from game.card import Card
+from game.judge import match_answer
+from game.matching import DEFAULT_CACHE, VerdictCache, normalize_target
+from game.mcts import BotJudge
+
+
+# ==========================
+# 裁定结果
+# ==========================
+
+@dataclass
+class Verdict:
+    """一次作答的裁定结果"""
+    meaning_score: float = 0.0
+    story_score: float = 0.0
+    meaning_ok: bool = False
+    story_ok: bool = False
+    timed_out: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def score_answers(meaning_target: str, story_target: str,
+                  meaning: str, story: str, threshold: float = 0.6) -> Verdict:
+    """为释义与典故作答打分（在工作进程中执行；启用缓存时传入的是归一化后的文本）"""
+    meaning_ok, meaning_score = match_answer(meaning, meaning_target, threshold) if meaning else (False, 0.0)
+    story_ok, story_score = match_answer(story, story_target, threshold) if story else (False, 0.0)
+    return Verdict(meaning_score, story_score, meaning_ok, story_ok)
+
+
+@dataclass
+class PendingJudgement:
+    """等待防守方作答的卡牌；deadline 为 time.monotonic() 时间"""
+    card: Card
+    attacker_id: str
+    defender_id: str
+    deadline: float
+    timer: Optional[asyncio.Task] = None
+    scoring: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "card_id": self.card.id,
+            "card_name": self.card.name,
+            "attacker": self.attacker_id,
+            "defender": self.defender_id,
+            "remaining": max(0.0, self.deadline - time.monotonic()),
+        }
+
+
+# ==========================
+# 裁定器与判题流水线
+# ==========================
+
+class PresetJudge(BotJudge):
+    """服务器用裁定器：不读取命令行
+
+    人类玩家的裁定结果由判题流水线在结算前写入 preset，电脑玩家按正确率随机作答。
+    写入了 preset 的卡牌总是按 preset 裁定（包括电脑玩家），用于从事件日志重放对局。
+    """
+
+    def __init__(self, bots: Set[str], meaning_rate: float = 0.5, story_rate: float = 0.5):
+        super().__init__(bots, meaning_rate, story_rate, mode="auto")
+        self.preset: Dict[Tuple[int, str], bool] = {}
+
+    def set_verdict(self, card: Card, verdict: Verdict):
+        self.preset[(card.id, "meaning")] = verdict.meaning_ok
+        self.preset[(card.id, "story")] = verdict.story_ok
+
+    def judge_meaning(self, card: Card, player_id: str) -> bool:
+        return self._judge(card, player_id, "meaning")
+
+    def judge_story(self, card: Card, player_id: str) -> bool:
+        return self._judge(card, player_id, "story")
+
+    def _judge(self, card: Card, player_id: str, field: str) -> bool:
+        preset = self.preset.pop((card.id, field), None)
+        if preset is not None:
+            return preset
+        if player_id in self.bots:
+            return self._bot_answer(card, player_id, field)
+        return False
+
+
+class JudgingPipeline:
+    """在进程池中为作答打分，事件循环只等待结果，不做任何计算
+
+    executor: 可传入任意线程池/进程池；默认首次使用时创建进程池。
+    cache: 裁定缓存在事件循环所在进程中查询，两项作答都命中时不提交到进程池。
+    """
+
+    def __init__(self, executor: Optional[Executor] = None,
+                 workers: Optional[int] = None,
+                 threshold: float = 0.6,
+                 cache: Optional[VerdictCache] = DEFAULT_CACHE):
+        self.cache = cache
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.threshold = threshold
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        return self._executor
+
+    async def judge(self, card: Card, meaning: str, story: str) -> Verdict:
+        cache, threshold = self.cache, self.threshold
+        if cache is None:
+            return await self._score(card.meaning, card.story, meaning, story)
+        meaning_key = cache.key(card.id, "meaning", meaning, threshold)
+        story_key = cache.key(card.id, "story", story, threshold)
+        meaning_hit, story_hit = cache.get(meaning_key), cache.get(story_key)
+        if meaning_hit is not None and story_hit is not None:
+            return Verdict(meaning_hit[1], story_hit[1], meaning_hit[0], story_hit[0])
+        verdict = await self._score(normalize_target(card.meaning), normalize_target(card.story),
+                                    meaning_key[2], story_key[2])
+        cache.put(meaning_key, (verdict.meaning_ok, verdict.meaning_score))
+        cache.put(story_key, (verdict.story_ok, verdict.story_score))
+        return verdict
+
+    async def _score(self, meaning_target: str, story_target: str, meaning: str, story: str) -> Verdict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, score_answers, meaning_target, story_target, meaning, story, self.threshold
+        )
+
+    def shutdown(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+# 同一进程内所有房间共用
+DEFAULT_PIPELINE = JudgingPipeline()
+
+
+# ==========================
+# 基准测试
+# ==========================
+
+async def _benchmark(rooms: int, rounds: int, timeout: float):
+    from server.room import GameRoom
+
+    pipeline = JudgingPipeline()
+    players = []
+    for i in range(rooms):
+        room = GameRoom(answer_timeout=timeout, pipeline=pipeline)
+        keys = [room.add_player()[0], room.add_player()[0]]
+        manager = room.new_round_manager()
+        manager.verbose = False
+        manager.initialize_game_state()
+        manager.deal_phase()
+        players.append((room, keys))
+
+    # 预热进程池
+    await pipeline.judge(players[0][0].round_manager.state.player1.hand[0], "", "")
+
+    async def play(room, keys, silent: bool):
+        latencies = []
+        for _ in range(rounds):
+            state = room.round_manager.state
+            if state.is_game_over():
+                break
+            attacker = state.get_current_player()
+            card = attacker.play_card(attacker.hand[0].id)
+            await room.begin_turn(card)
+            if silent:
+                # 不作答，等待截止时间自动结算
+                while room.pending is not None:
+                    await asyncio.sleep(0.01)
+                continue
+            defender_key = next(k for k, pid in room.players.items() if pid == room.pending.defender_id)
+            begin = time.perf_counter()
+            await room.submit_answer(defender_key, card.meaning[:8], card.story[:30])
+            latencies.append(time.perf_counter() - begin)
+        return latencies
+
+    begin = time.perf_counter()
+    results = await asyncio.gather(*(play(room, keys, i == 0) for i, (room, keys) in enumerate(players)))
+    elapsed = time.perf_counter() - begin
+    pipeline.shutdown()
+
+    latencies = sorted(lat for result in results[1:] for lat in result)
+    print(f"=== 异步判题 ({rooms} 个房间，其中 1 个房间从不作答，截止时间 {timeout}s) ===")
+    print(f"其余房间 {len(latencies)} 次作答→结算延迟: P50 {latencies[len(latencies) // 2] * 1e3:.1f} ms, "
+          f"P99 {latencies[int(len(latencies) * 0.99)] * 1e3:.1f} ms, 最大 {latencies[-1] * 1e3:.1f} ms")
+    print(f"总耗时 {elapsed:.2f}s（不作答的房间每回合等待 {timeout}s 后自动判负）")
+
+
+def benchmark(rooms: int = 50, rounds: int = 5, timeout: float = 0.5):
+    """慢作答房间不影响其他房间：比较其余房间的作答→结算延迟与截止时间"""
+    asyncio.run(_benchmark(rooms, rounds, timeout))
+
+
+if __name__ == "__main__":
+    benchmark()
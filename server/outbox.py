@@ -0,0 +1,148 @@
+import asyncio
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Callable, Deque, Optional, Union
+
+from fastapi import WebSocket
+
+from server.wire import JSON_CODEC, Codec, Frame
+
+
+# 每个连接最多排队的消息数（状态推送只占一个位置）
+OUTBOX_SIZE = 32
+
+# 队列中代表“发送最新状态”的标记，真正的内容在轮到它时才生成
+_STATE = object()
+
+
+@dataclass
+class OutboxStats:
+    """单个连接的发送统计"""
+    depth: int = 0           # 当前排队的消息数
+    max_depth: int = 0       # 排队数峰值
+    sent: int = 0            # 已发送的消息数
+    dropped: int = 0         # 队列满时丢弃的旧消息数
+    coalesced: int = 0       # 合并掉的状态推送数（已有状态推送在排队）
+    error: Optional[str] = None  # 发送失败的原因，连接随后被移除
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class Outbox:
+    """单个 WebSocket 连接的有界发送队列，由独立的写任务发送
+
+    广播只是入队，不等待任何连接，慢连接不会拖累其他人。状态推送不入队具体内容：
+    队列中至多一个状态标记，轮到它时调用 render_state() 生成当时最新的消息（增量或完整状态），
+    因此慢连接积压期间的多个版本自然合并成一条。其他消息队列满时丢弃最旧的一条。
+    """
+
+    def __init__(self,
+                 websocket: WebSocket,
+                 render_state: Callable[[], Optional[Frame]],
+                 on_error: Optional[Callable[['Outbox'], None]] = None,
+                 maxsize: int = OUTBOX_SIZE,
+                 codec: Codec = JSON_CODEC):
+        """
+        render_state: 生成已编码的状态消息，无需发送时返回 None（在写任务中、发送前调用）
+        on_error: 发送失败时回调，写任务随后结束
+        codec: 该连接协商的编码；入队的消息须已按它编码（str 为文本帧，bytes 为二进制帧）
+        """
+        self.websocket = websocket
+        self.codec = codec
+        self.render_state = render_state
+        self.on_error = on_error
+        self.maxsize = maxsize
+        self.stats = OutboxStats()
+        self._queue: Deque[Union[Frame, object]] = deque()
+        self._state_queued = False
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def send(self, frame: Frame):
+        """排队一条已编码的普通消息"""
+        if self._task.done():
+            return
+        if len(self._queue) >= self.maxsize:
+            self._drop_oldest()
+        self._queue.append(frame)
+        self._queued()
+
+    def push_state(self):
+        """排队一次状态推送；已有状态推送在排队时合并"""
+        if self._task.done():
+            return
+        if self._state_queued:
+            self.stats.coalesced += 1
+            return
+        if len(self._queue) >= self.maxsize:
+            self._drop_oldest()
+        self._state_queued = True
+        self._queue.append(_STATE)
+        self._queued()
+
+    @property
+    def idle(self) -> bool:
+        return self._task.done() or self._idle.is_set()
+
+    async def flush(self):
+        """等待队列发送完毕（或写任务结束）"""
+        if self.idle:
+            return
+        idle = asyncio.ensure_future(self._idle.wait())
+        try:
+            await asyncio.wait({self._task, idle}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            idle.cancel()
+
+    def close(self):
+        self._task.cancel()
+        self._queue.clear()
+        self.stats.depth = 0
+
+    def _drop_oldest(self):
+        # 状态标记总会生成最新内容，不丢弃，只丢弃最旧的普通消息
+        for index, item in enumerate(self._queue):
+            if item is not _STATE:
+                del self._queue[index]
+                self.stats.dropped += 1
+                return
+
+    def _queued(self):
+        depth = self.stats.depth = len(self._queue)
+        if depth > self.stats.max_depth:
+            self.stats.max_depth = depth
+        self._idle.clear()
+        self._wakeup.set()
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            if not queue:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            item = queue.popleft()
+            self.stats.depth = len(queue)
+            if item is _STATE:
+                self._state_queued = False
+                item = self.render_state()
+                if item is None:
+                    continue
+            try:
+                if isinstance(item, bytes):
+                    await self.websocket.send_bytes(item)
+                else:
+                    await self.websocket.send_text(item)
+            except Exception as e:
+                self.stats.error = repr(e)
+                queue.clear()
+                self.stats.depth = 0
+                self._idle.set()
+                if self.on_error is not None:
+                    self.on_error(self)
+                return
+            self.stats.sent += 1
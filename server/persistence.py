@@ -0,0 +1,365 @@
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from game.catalogue import get_catalogue
+from game.compact import CardTable, CompactState
+
+
+# 事件日志文件的环境变量，设为空字符串时不持久化；分片部署时每个分片一个文件（rooms.0.db、rooms.1.db…）
+DB_ENV = "SUMMERQUEST_DB"
+DEFAULT_DB = "rooms.db"
+
+# 每个房间每记录多少条事件写一次快照（并截掉快照之前的事件）
+SNAPSHOT_EVERY = 32
+# 组提交：写线程收到第一条记录后最多再等待的时间（秒）与每批最多的记录数
+FLUSH_INTERVAL = 0.05
+BATCH_SIZE = 5000
+
+# 房间事件（data 的字段）：
+#   join   {key, player}          玩家加入，key 为玩家密钥
+#   bot    {player, config}       该位置由电脑控制，config 为 MCTSConfig 的字段
+#   leave  {key}                  玩家离开
+#   start  {seed}                 开始新的一局（洗牌与随机效果由 seed 决定）
+#   play   {card}                 人类防守：主攻卡打出，等待作答
+#   turn   {card, ok}             一个回合结算完毕，ok 为防守方的 [释义, 典故] 裁定
+#   skip   {}                     电脑无牌可出，跳过本回合
+#   reseed {seed}                 写快照前以 seed 重置本局随机数生成器（快照只需保存种子）
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    room_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (room_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    room_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def store_path(shard: Optional[Tuple[int, int]] = None) -> Optional[str]:
+    """本进程的事件日志文件路径，未开启持久化时为 None"""
+    path = os.environ.get(DB_ENV, DEFAULT_DB)
+    if not path:
+        return None
+    if shard is not None:
+        root, ext = os.path.splitext(path)
+        path = f"{root}.{shard[0]}{ext}"
+    return path
+
+
+# ==========================
+# 房间快照
+# ==========================
+
+_TABLES: Dict[str, CardTable] = {}
+
+
+def card_table(card_set: str) -> CardTable:
+    table = _TABLES.get(card_set)
+    if table is None:
+        table = _TABLES[card_set] = CardTable(get_catalogue(card_set).cards)
+    return table
+
+
+@dataclass
+class RoomSnapshot:
+    """房间的紧凑快照：玩家、电脑配置与对局状态（各区域为卡牌下标的字节串）"""
+    players: Dict[str, str]                       # player_key -> player_id
+    bots: Dict[str, dict] = field(default_factory=dict)   # player_id -> MCTSConfig 字段
+    card_set: Optional[str] = None
+    state: Optional[CompactState] = None          # None 表示未开局
+    seed: Optional[int] = None                    # 本局随机数生成器的当前种子
+    winner: Optional[str] = None
+    pending: Optional[Tuple[int, str, str]] = None  # 等待作答的 (卡牌 ID, 进攻方, 防守方)
+
+    def encode(self) -> bytes:
+        """JSON 头部 + 换行 + 6 个区域（各以 1 字节长度开头）"""
+        meta: Dict[str, Any] = {"players": self.players}
+        if self.bots:
+            meta["bots"] = self.bots
+        if self.state is not None:
+            meta.update(card_set=self.card_set, seed=self.seed, current=self.state.current,
+                        round=self.state.round_count)
+            if self.winner is not None:
+                meta["winner"] = self.winner
+            if self.pending is not None:
+                meta["pending"] = self.pending
+        head = json.dumps(meta, separators=(",", ":")).encode("utf-8") + b"\n"
+        if self.state is None:
+            return head
+        return head + b"".join(struct.pack("B", len(zone)) + bytes(zone) for zone in self.state.zones)
+
+    @classmethod
+    def decode(cls, blob: bytes) -> 'RoomSnapshot':
+        end = blob.index(b"\n")
+        meta = json.loads(blob[:end])
+        snapshot = cls(meta["players"], meta.get("bots", {}))
+        if "card_set" not in meta:
+            return snapshot
+        zones, offset = [], end + 1
+        for _ in range(6):
+            size = blob[offset]
+            zones.append(bytearray(blob[offset + 1:offset + 1 + size]))
+            offset += 1 + size
+        snapshot.card_set = meta["card_set"]
+        snapshot.state = CompactState(zones, meta["current"], meta["round"])
+        snapshot.seed = meta["seed"]
+        snapshot.winner = meta.get("winner")
+        pending = meta.get("pending")
+        snapshot.pending = tuple(pending) if pending is not None else None
+        return snapshot
+
+
+# ==========================
+# 事件存储
+# ==========================
+
+@dataclass
+class RoomRecord:
+    """启动时读出的单个房间：最近的快照与其后的事件"""
+    room_id: str
+    snapshot_seq: int = 0
+    snapshot: Optional[bytes] = None
+    events: List[Tuple[int, str, dict]] = field(default_factory=list)   # (序号, 类型, 数据)
+
+    @property
+    def seq(self) -> int:
+        return self.events[-1][0] if self.events else self.snapshot_seq
+
+
+class EventStore:
+    """房间事件日志与快照的 SQLite 存储
+
+    append/snapshot/drop 只把记录放入队列（O(1)，不阻塞事件循环）；后台写线程把一段时间内
+    的记录合并成一个事务提交（组提交）。进程崩溃时最多丢失最近 flush_interval 内的记录。
+    """
+
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL, batch_size: int = BATCH_SIZE,
+                 snapshot_every: int = SNAPSHOT_EVERY):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.snapshot_every = snapshot_every
+        self.commits = 0      # 已提交的事务数
+        self.written = 0      # 已写入的记录数
+        db = self._connect()
+        db.executescript(_SCHEMA)
+        db.close()
+        self._queue: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._run, name="event-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # ---------- 写入（任意线程调用，只入队） ----------
+
+    def append(self, room_id: str, seq: int, kind: str, data: dict):
+        self._queue.put(("event", room_id, seq, kind, json.dumps(data, separators=(",", ":"))))
+
+    def snapshot(self, room_id: str, seq: int, blob: bytes):
+        """写入快照并删除其之前的事件"""
+        self._queue.put(("snapshot", room_id, seq, blob))
+
+    def drop(self, room_id: str):
+        """删除房间的全部记录（房间被回收）"""
+        self._queue.put(("drop", room_id))
+
+    async def flush(self):
+        """等待此前入队的记录全部提交"""
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        self._queue.put(("flush", lambda: loop.call_soon_threadsafe(done.set_result, None)))
+        await done
+
+    def close(self):
+        """提交剩余记录并停止写线程"""
+        if self._writer.is_alive():
+            self._queue.put(("close",))
+            self._writer.join()
+
+    def _run(self):
+        db = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] not in ("flush", "close"):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            with db:
+                # 连续的事件合并为一次 executemany；快照与删除前先写入之前的事件，保持顺序
+                rows = []
+                for op in batch:
+                    if op[0] == "event":
+                        rows.append(op[1:])
+                        continue
+                    if rows:
+                        db.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?)", rows)
+                        rows = []
+                    if op[0] == "snapshot":
+                        db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)", op[1:])
+                        db.execute("DELETE FROM events WHERE room_id = ? AND seq <= ?", op[1:3])
+                    elif op[0] == "drop":
+                        db.execute("DELETE FROM events WHERE room_id = ?", op[1:])
+                        db.execute("DELETE FROM snapshots WHERE room_id = ?", op[1:])
+                if rows:
+                    db.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?)", rows)
+            self.commits += 1
+            self.written += len(batch)
+            for op in batch:
+                if op[0] == "flush":
+                    op[1]()
+            if batch[-1][0] == "close":
+                db.close()
+                return
+
+    # ---------- 读取（启动恢复时调用） ----------
+
+    def load(self) -> Iterator[RoomRecord]:
+        """按房间读出快照与其后的事件"""
+        db = self._connect()
+        try:
+            records: Dict[str, RoomRecord] = {
+                room_id: RoomRecord(room_id, seq, bytes(blob))
+                for room_id, seq, blob in db.execute("SELECT room_id, seq, data FROM snapshots")
+            }
+            for room_id, seq, kind, data in db.execute("SELECT room_id, seq, kind, data FROM events ORDER BY room_id, seq"):
+                record = records.get(room_id)
+                if record is None:
+                    record = records[room_id] = RoomRecord(room_id)
+                if seq > record.snapshot_seq:
+                    record.events.append((seq, kind, json.loads(data)))
+        finally:
+            db.close()
+        return iter(records.values())
+
+
+class RoomLog:
+    """单个房间的事件序号与快照节奏"""
+
+    def __init__(self, store: EventStore, room_id: str, seq: int = 0, snapshot_seq: int = 0):
+        self.store = store
+        self.room_id = room_id
+        self.seq = seq
+        self.snapshot_seq = snapshot_seq
+
+    def append(self, kind: str, data: dict):
+        self.seq += 1
+        self.store.append(self.room_id, self.seq, kind, data)
+
+    def snapshot_due(self) -> bool:
+        return self.seq - self.snapshot_seq >= self.store.snapshot_every
+
+    def snapshot(self, blob: bytes):
+        self.snapshot_seq = self.seq
+        self.store.snapshot(self.room_id, self.seq, blob)
+
+    def drop(self):
+        self.store.drop(self.room_id)
+
+
+# ==========================
+# 基准测试
+# ==========================
+
+def benchmark(rooms: int = 20000, turns: int = 20, snapshot_every: int = SNAPSHOT_EVERY, seed: int = 0):
+    """rooms 个对局中的房间各进行若干回合后“重启”：记录开销、组提交与启动恢复速度，并校验恢复结果"""
+    import random
+    import tempfile
+    from server.judging import Verdict
+    from server.room import RoomManager
+
+    def fingerprint(room) -> tuple:
+        manager = room.round_manager
+        state = CompactState.from_game_state(manager.state, card_table(manager.card_set)).key() if manager else None
+        pending = (room.pending.card.id, room.pending.defender_id) if room.pending else None
+        return room.players, state, pending, manager.winner if manager else None
+
+    async def play(manager: RoomManager, rng: random.Random) -> float:
+        begin = time.perf_counter()
+        for _ in range(rooms):
+            room = manager.create_room()
+            keys = [room.add_player()[0], room.add_player()[0]]
+            await room.start_game()
+            for _ in range(rng.randrange(turns)):
+                state = room.round_manager.state
+                if state.is_game_over() or room.pending is not None or not state.get_current_player().hand:
+                    break
+                key = keys[0] if room.players[keys[0]] == state.current_player_id else keys[1]
+                await room.play_card(key, rng.choice(list(state.get_current_player().hand)).id)
+                if room.pending is not None and rng.random() < 0.9:
+                    await room._complete(room.pending, Verdict(meaning_ok=rng.random() < 0.5,
+                                                               story_ok=rng.random() < 0.5))
+        return time.perf_counter() - begin
+
+    async def run(path: str):
+        # 记录调用在事件循环上的开销（编码 + 入队）与写线程的提交吞吐
+        store = EventStore(path + ".append")
+        data = {"card": 12, "ok": [True, False]}
+        begin = time.perf_counter()
+        for i in range(100000):
+            store.append("bench", i, "turn", data)
+        append_cost = (time.perf_counter() - begin) / 100000
+        await store.flush()
+        write_rate = 100000 / (time.perf_counter() - begin)
+        store.close()
+
+        store = EventStore(path, snapshot_every=snapshot_every)
+        manager = RoomManager(store=store, max_rooms=rooms)
+        elapsed = await play(manager, random.Random(seed))
+        events = sum(room.log.seq for room in manager.rooms.values())
+        begin = time.perf_counter()
+        await store.flush()
+        drain = time.perf_counter() - begin
+        store.close()
+        written, commits = store.written, store.commits
+        expected = {room_id: fingerprint(room) for room_id, room in manager.rooms.items()}
+        for room in manager.rooms.values():
+            room.close()
+
+        # 重启：新的管理器从同一个文件恢复
+        store = EventStore(path, snapshot_every=snapshot_every)
+        recovered = RoomManager(max_rooms=rooms)
+        begin = time.perf_counter()
+        count = recovered.recover(store)
+        recovery = time.perf_counter() - begin
+        mismatched = sum(1 for room_id, room in recovered.rooms.items() if fingerprint(room) != expected.get(room_id))
+        for room in recovered.rooms.values():
+            room.close()
+        store.close()
+
+        print(f"=== 事件日志持久化 ({rooms:,} 个房间, 每 {snapshot_every} 条事件一次快照) ===")
+        print(f"记录一条事件: 事件循环上 {append_cost * 1e6:.1f} µs，写线程提交 {write_rate:,.0f} 条/秒")
+        print(f"对局: {elapsed:.2f} 秒，{events:,} 条事件")
+        print(f"组提交: {written:,} 条记录 / {commits:,} 个事务（平均每个事务 {written / commits:,.0f} 条），"
+              f"结束时写线程积压 {drain * 1e3:.0f} ms，数据库 {os.path.getsize(path) / 2 ** 20:.1f} MiB")
+        print(f"启动恢复: {count:,} 个房间 {recovery:.2f} 秒 = {count / recovery:,.0f} 个/秒，与重启前不一致 {mismatched} 个")
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(os.path.join(directory, "rooms.db")))
+
+
+if __name__ == "__main__":
+    benchmark()
+    benchmark(snapshot_every=1 << 30)
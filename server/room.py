@@ -1,23 +1,111 @@
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass
+from enum import Enum
 from fastapi import WebSocket
+import asyncio
+import gc
+import heapq
+import inspect
+import random
+import sys
+import time
+import types
 import uuid
 
 from data.v1 import get_all_cards
 from game.game_state import GameState
 from game.player import Player
 from game.card import Card
+from game.catalogue import CardCatalogue, get_catalogue
+from game.compact import CompactState
 from game.judge import Judge
+from game.mcts import MCTSConfig, MCTSPlayer
+from game.events import RingBuffer
 from game.rules import GameRoundManager
+from server.judging import DEFAULT_PIPELINE, JudgingPipeline, PendingJudgement, PresetJudge, Verdict
+from server.sharding import shard_of
+from server.outbox import Outbox
+from server.persistence import EventStore, RoomLog, RoomSnapshot, card_table
+from server.sync import StateSync
+from server.wire import JSON_CODEC, Codec, Frame, encode_json
+
+# 服务器只支持主攻出牌，电脑玩家模拟时也不考虑反击与连击
+SERVER_BOT_CONFIG = MCTSConfig(rollouts=1000, counter_rate=0.0, combo_rate=0.0)
+
+# 单个进程最多同时存在的房间数
+MAX_ROOMS = 100_000
+# 清理任务的检查间隔（秒）
+SWEEP_INTERVAL = 1.0
+# 清理任务每次最多回收的房间数，大批房间同时到期时分多次进行，不长时间占用事件循环
+SWEEP_BATCH = 5000
+
+
+@dataclass(frozen=True)
+class RoomTTL:
+    """各生命周期阶段的房间在无活动多久后被回收（秒）"""
+    waiting: float = 600.0      # 未开局
+    finished: float = 300.0     # 已终局
+    abandoned: float = 900.0    # 对局中但没有任何 WebSocket 连接
+    connected: float = 7200.0   # 对局中且有连接（兜底，防止失效连接让房间永远存在）
+
+    def of(self, lifecycle: str) -> float:
+        return getattr(self, lifecycle)
+
+
+class RoomClosed(RuntimeError):
+    """房间已关闭（被回收或服务器关闭），命令不再执行"""
+
 
 class GameRoom:
     """游戏房间类，管理房间内的玩家、连接和游戏状态"""
     
-    def __init__(self):
-        self.room_id: str = str(uuid.uuid4())[:8]
+    def __init__(self, answer_timeout: float = 60.0, pipeline: Optional[JudgingPipeline] = None,
+                 room_id: Optional[str] = None):
+        self.room_id: str = room_id or str(uuid.uuid4())[:8]
+        self.last_active = time.monotonic()  # 最近一次命令或请求的时间
+        # 生命周期可能缩短时（终局、最后一个连接断开）的回调，由 RoomManager 设置以重新安排回收时间
+        self.on_lifecycle: Optional[Callable[['GameRoom'], None]] = None
         self.players: Dict[str, str] = {}  # player_key -> player_id mapping
         self.connections: Dict[str, WebSocket] = {}  # player_key -> websocket
+        self.outboxes: Dict[str, Outbox] = {}  # player_key -> 该连接的发送队列
+        self.send_failures = 0  # 因发送失败而移除的连接数
         self.round_manager:Optional[GameRoundManager]=None
+        self.bots: Dict[str, MCTSPlayer] = {}  # player_id -> 电脑玩家
+        self.answer_timeout = answer_timeout  # 防守方作答的时限（秒）
+        self.pipeline = pipeline or DEFAULT_PIPELINE
+        self._pending: Optional[PendingJudgement] = None  # 等待作答的卡牌
+        self.events = RingBuffer(256)  # 本局最近的游戏事件（不再输出到服务器控制台）
+        self.sync = StateSync()  # 状态版本与增量推送
+        # 自上次提交以来状态可能有变化：由本局事件、pending 与玩家变动置位，_commit_state 只在置位时比较字段
+        self._dirty = True
+        self._synced_pending: Optional[PendingJudgement] = None
+        self._pending_view: Optional[dict] = None
+        # 当前版本已编码的状态：观看者（玩家 ID，观战者为 None）-> JSON 文本
+        self._views: Dict[Optional[str], str] = {}
+        # 当前版本已编码的非 JSON 完整状态帧：(观看者, 编码) -> 帧内容
+        self._frames: Dict[Tuple[Optional[str], str], Frame] = {}
+        self._views_version: Optional[int] = None
+        # 命令邮箱：同一房间的命令由 _actor 任务按顺序逐个执行（首次 call() 时创建）
+        self._mailbox: Optional[asyncio.Queue] = None
+        self._actor: Optional[asyncio.Task] = None
+        self._running: Optional[asyncio.Future] = None  # 正在执行的命令的结果
+        self._closed = False  # close() 之后不再接受命令
+        # 事件日志（未开启持久化时为 None），见 server/persistence.py
+        self.log: Optional[RoomLog] = None
+        self._seed: Optional[int] = None  # 本局随机数生成器当前的种子（开局或最近一次快照时设置）
     
+    @property
+    def pending(self) -> Optional[PendingJudgement]:
+        """等待作答的卡牌"""
+        return self._pending
+
+    @pending.setter
+    def pending(self, pending: Optional[PendingJudgement]):
+        self._pending = pending
+        self._dirty = True
+
     @property
     def game_state(self) -> Optional[GameState]:
         """获取游戏状态，用于兼容性"""
@@ -35,8 +123,410 @@ class GameRoom:
         player_key = str(uuid.uuid4())
         player_id = f"player{len(self.players) + 1}"
         self.players[player_key] = player_id
+        self._reset_sync()
+        self._record("join", key=player_key, player=player_id)
         return player_key, player_id
     
+    def add_bot(self, config: MCTSConfig = SERVER_BOT_CONFIG) -> str:
+        """添加一个 MCTS 电脑玩家占据空位
+
+        Returns:
+            str: 电脑玩家的 player_id
+        """
+        player_key, player_id = self.add_player()
+        self.bots[player_id] = MCTSPlayer(config)
+        self._record("bot", player=player_id, config=asdict(config))
+        return player_id
+
+    def is_bot(self, player_id: str) -> bool:
+        """检查该位置是否由电脑控制"""
+        return player_id in self.bots
+
+    def new_round_manager(self, seed: Optional[int] = None, state: Optional[GameState] = None,
+                          subscribe: bool = True) -> GameRoundManager:
+        """开始新的一局；人类玩家经判题流水线作答，电脑玩家自动作答
+
+        seed: 本局随机种子；state: 从快照恢复时直接使用的对局状态
+        subscribe: 是否订阅本局事件（事件缓冲、增量同步）；重放事件日志时关闭，恢复完成后由 resume() 订阅
+        """
+        if self.pending is not None and self.pending.timer is not None:
+            self.pending.timer.cancel()
+        self.pending = None
+        config = next(iter(self.bots.values())).config if self.bots else SERVER_BOT_CONFIG
+        judge = PresetJudge(set(self.bots), config.meaning_rate, config.story_rate)
+        self.round_manager = GameRoundManager(judge=judge, verbose=False, seed=seed)
+        self._seed = seed
+        if state is not None:
+            self.round_manager.state = state
+        if subscribe:
+            self._subscribe()
+        return self.round_manager
+
+    def _subscribe(self):
+        self.events.clear()
+        self.round_manager.subscribe(self.events, kinds=("deal", "draw", "play", "verdict", "effect", "game_over"))
+        self.round_manager.subscribe(self.sync, kinds=("zone_move",))
+        self.round_manager.subscribe(self._lifecycle_changed, kinds=("game_over",))
+        # 抽牌事件标志回合切换（轮换后的准备阶段）
+        self.round_manager.subscribe(self._mark_dirty, kinds=("zone_move", "draw", "verdict", "game_over"))
+        self._reset_sync()
+
+    def _mark_dirty(self, event=None):
+        self._dirty = True
+
+    def _reset_sync(self):
+        # 状态整体替换（新对局、玩家变动）
+        self.sync.reset()
+        self._dirty = True
+
+    # ---------- 生命周期 ----------
+
+    def touch(self):
+        """记录一次活动"""
+        self.last_active = time.monotonic()
+
+    @property
+    def lifecycle(self) -> str:
+        """waiting（未开局）、finished（已终局）、abandoned（对局中无连接）或 connected（对局中有连接）"""
+        if self.round_manager is None:
+            return "waiting"
+        if self.round_manager.state.is_game_over():
+            return "finished"
+        return "connected" if self.connections else "abandoned"
+
+    @property
+    def busy(self) -> bool:
+        """邮箱中有正在执行或排队的命令"""
+        return self._running is not None or (self._mailbox is not None and not self._mailbox.empty())
+
+    def expires_at(self, ttl: RoomTTL) -> float:
+        """按当前生命周期阶段，无新活动时房间应被回收的时间（time.monotonic()）"""
+        return self.last_active + ttl.of(self.lifecycle)
+
+    def memory_estimate(self) -> int:
+        """房间占用内存的估算（字节），不含所有房间共享的卡牌、判题流水线等"""
+        return estimate_size(self)
+
+    def _lifecycle_changed(self, event=None):
+        if self.on_lifecycle is not None:
+            self.on_lifecycle(self)
+
+    # ---------- 命令邮箱 ----------
+
+    async def call(self, command: Callable[..., Any], *args) -> Any:
+        """在房间的命令邮箱中执行 command(*args)（普通函数或协程函数）并返回结果
+
+        同一房间的命令由单个任务按提交顺序逐个执行，命令内部的 await（电脑思考、广播）
+        期间其他命令不会插入；不同房间互不等待。命令抛出的异常原样传给调用方。
+        在命令内部再次调用时直接执行，不会死锁。房间关闭后调用抛出 RoomClosed。
+        """
+        if self._closed:
+            raise RoomClosed(self.room_id)
+        self.last_active = time.monotonic()
+        if asyncio.current_task() is self._actor:
+            result = command(*args)
+            return await result if inspect.isawaitable(result) else result
+        loop = asyncio.get_running_loop()
+        if self._actor is None or self._actor.done():
+            self._mailbox = asyncio.Queue()
+            self._actor = loop.create_task(self._run_mailbox(self._mailbox))
+        future = loop.create_future()
+        self._mailbox.put_nowait((command, args, future))
+        return await future
+
+    async def _run_mailbox(self, mailbox: asyncio.Queue):
+        while True:
+            command, args, future = await mailbox.get()
+            if future.cancelled():
+                # 调用方在命令开始前已放弃
+                continue
+            self._running = future
+            try:
+                result = command(*args)
+                if inspect.isawaitable(result):
+                    result = await result
+            except asyncio.CancelledError:
+                # 房间关闭：正在执行的命令的调用方收到 RoomClosed
+                if not future.done():
+                    future.set_exception(RoomClosed(self.room_id))
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._running = None
+
+    def close(self):
+        """停止房间的后台任务：命令邮箱、作答计时与各连接的发送队列
+
+        正在执行与排队中的命令的调用方都收到 RoomClosed，之后的 call() 也直接抛出 RoomClosed。
+        """
+        self._closed = True
+        pending = [self._running] if self._running is not None else []
+        if self._mailbox is not None:
+            while not self._mailbox.empty():
+                pending.append(self._mailbox.get_nowait()[2])
+        for future in pending:
+            if not future.done():
+                future.set_exception(RoomClosed(self.room_id))
+        if self._actor is not None:
+            self._actor.cancel()
+            self._actor = None
+        if self.pending is not None and self.pending.timer is not None:
+            self.pending.timer.cancel()
+        for player_key in list(self.outboxes):
+            self.remove_connection(player_key)
+
+    # ---------- 命令（经 call() 提交） ----------
+
+    async def start_game(self) -> Optional[str]:
+        """开始新的一局并发牌，返回错误信息（成功时为 None）"""
+        if len(self.players) < 2:
+            return "Need two players to start"
+        seed = random.getrandbits(63)
+        self.new_round_manager(seed)
+        self.round_manager.initialize_game_state()
+        self.round_manager.deal_phase()
+        self._record("start", seed=seed)
+        await self.broadcast_game_state()
+        await self.run_bot_turns()
+        return None
+
+    async def play_card(self, player_key: str, card_id: int) -> Optional[str]:
+        """人类玩家打出主攻卡，返回错误信息（成功时为 None）"""
+        if not self.round_manager:
+            return "Game not started"
+        state = self.round_manager.state
+        if state.is_game_over():
+            return "Game over"
+        # 验证是否轮到该玩家
+        if state.current_player_id != self.players.get(player_key):
+            return "Not your turn"
+        # 上一张牌仍在等待作答
+        if self.pending is not None:
+            return "Waiting for judgement"
+        player = state.get_current_player()
+        if not player.has_card_id(card_id):
+            return "Card not in hand"
+        card = player.play_card(card_id)
+        # 进入结算：防守方为人类时等待其通过 WebSocket 作答
+        await self.begin_turn(card)
+        # 轮到电脑玩家时自动出牌
+        await self.run_bot_turns()
+        return None
+
+    # ---------- 回合结算 ----------
+
+    async def begin_turn(self, card: Card):
+        """主攻卡已打出：防守方为电脑时立即结算，否则进入等待作答状态
+
+        等待期间不占用事件循环；作答通过 WebSocket 到达后在进程池中打分，
+        超过 answer_timeout 未作答则按答错结算。
+        """
+        state = self.round_manager.state
+        defender_id = state.get_opponent_player().player_id
+        if defender_id in self.bots:
+            self.round_manager.run_one_turn(card)
+            self._record_turn(card)
+            await self.broadcast_game_state()
+            return
+        pending = PendingJudgement(card, state.current_player_id, defender_id,
+                                   time.monotonic() + self.answer_timeout)
+        pending.timer = asyncio.create_task(self._expire(pending))
+        self.pending = pending
+        self._record("play", card=card.id)
+        await self.broadcast_game_state()
+        await self.send_to_player(defender_id, {
+            "type": "judge_request",
+            "data": pending.to_dict(),
+        })
+
+    async def submit_answer(self, player_key: str, meaning: str, story: str) -> Optional[str]:
+        """防守方提交作答，返回错误信息（成功时为 None）
+
+        校验与结算作为命令在邮箱中执行；打分在判题进程池中进行，期间不占用邮箱。
+        """
+        claim = await self.call(self._claim_answer, player_key)
+        if isinstance(claim, str):
+            return claim
+        verdict = await self.pipeline.judge(claim.card, meaning, story)
+        await self.call(self._settle, claim, verdict)
+        return None
+
+    def _claim_answer(self, player_key: str) -> Union[str, PendingJudgement]:
+        pending = self.pending
+        if pending is None:
+            return "No pending judgement"
+        if self.players.get(player_key) != pending.defender_id:
+            return "Not the defending player"
+        if pending.scoring:
+            return "Answer already submitted"
+        pending.scoring = True
+        return pending
+
+    async def _settle(self, pending: PendingJudgement, verdict: Verdict):
+        if self.pending is pending:
+            await self._complete(pending, verdict)
+
+    async def _expire(self, pending: PendingJudgement):
+        await asyncio.sleep(max(0.0, pending.deadline - time.monotonic()))
+        await self.call(self._expire_now, pending)
+
+    async def _expire_now(self, pending: PendingJudgement):
+        # 截止前已提交的作答照常打分结算
+        if self.pending is pending and not pending.scoring:
+            pending.timer = None
+            await self._complete(pending, Verdict(timed_out=True))
+
+    async def _complete(self, pending: PendingJudgement, verdict: Verdict):
+        self.pending = None
+        if pending.timer is not None:
+            pending.timer.cancel()
+        self.round_manager.judge.set_verdict(pending.card, verdict)
+        self.round_manager.run_one_turn(pending.card)
+        self._record_turn(pending.card)
+        await self.broadcast({
+            "type": "judge_result",
+            "data": {"card_id": pending.card.id, "defender": pending.defender_id, **verdict.to_dict()},
+        })
+        await self.broadcast_game_state()
+        await self.run_bot_turns()
+
+    async def run_bot_turns(self):
+        """轮到电脑玩家时自动出牌，直到轮到人类玩家、等待作答或游戏结束
+
+        搜索在线程池中进行，不阻塞事件循环。
+        """
+        loop = asyncio.get_running_loop()
+        while (self.round_manager and self.pending is None
+               and not self.round_manager.state.is_game_over()):
+            bot = self.bots.get(self.round_manager.state.current_player_id)
+            if bot is None:
+                return
+            # 搜索只读取状态；出牌回到事件循环中进行
+            card = await loop.run_in_executor(None, self._bot_choose, bot)
+            if card is None:
+                # 无牌可出：跳过本回合
+                self.round_manager.state.switch_turn()
+                self.round_manager.prepare_phase()
+                self._record("skip")
+                await self.broadcast_game_state()
+                continue
+            self.round_manager.state.get_current_player().play_card(card.id)
+            await self.begin_turn(card)
+
+    def _bot_choose(self, bot: MCTSPlayer) -> Optional[Card]:
+        state = self.round_manager.state
+        return bot.choose_main(state, state.get_current_player())
+
+    # ---------- 事件日志与恢复 ----------
+
+    def _record(self, kind: str, **data):
+        """状态变化完成后记录一条事件，累计到快照间隔时写快照"""
+        if self.log is None:
+            return
+        self.log.append(kind, data)
+        if self.log.snapshot_due():
+            self._write_snapshot()
+
+    def _record_turn(self, card: Card):
+        # 本回合防守方的裁定取自事件缓冲区中最近的裁定事件（电脑玩家的随机作答也由此记录）
+        if self.log is None:
+            return
+        for event in reversed(self.events.events):
+            if event.kind == "verdict":
+                self._record("turn", card=card.id, ok=[event.meaning_ok, event.story_ok])
+                return
+
+    def _write_snapshot(self):
+        if self.round_manager is not None:
+            # 以新种子重置随机数生成器，快照只需保存种子；重放事件时由 reseed 事件得到同样的结果
+            seed = random.getrandbits(63)
+            self.round_manager.state.rng.seed(seed)
+            self.log.append("reseed", {"seed": seed})
+            self._seed = seed
+        self.log.snapshot(self.snapshot().encode())
+
+    def snapshot(self) -> RoomSnapshot:
+        """房间的紧凑快照（进行中的对局需已由 _write_snapshot 重置种子）"""
+        snapshot = RoomSnapshot(dict(self.players),
+                                {player_id: asdict(bot.config) for player_id, bot in self.bots.items()})
+        manager = self.round_manager
+        if manager is not None:
+            snapshot.card_set = manager.card_set
+            snapshot.state = CompactState.from_game_state(manager.state, card_table(manager.card_set))
+            snapshot.seed = self._seed
+            snapshot.winner = manager.winner
+            if self.pending is not None:
+                snapshot.pending = (self.pending.card.id, self.pending.attacker_id, self.pending.defender_id)
+        return snapshot
+
+    def restore(self, snapshot: RoomSnapshot):
+        """从快照恢复（之后再按顺序 apply 快照之后的事件，最后调用 resume()）"""
+        self.players = dict(snapshot.players)
+        self.bots = {player_id: MCTSPlayer(MCTSConfig(**config)) for player_id, config in snapshot.bots.items()}
+        self._reset_sync()
+        if snapshot.state is None:
+            return
+        state = snapshot.state.to_game_state(card_table(snapshot.card_set), random.Random(snapshot.seed))
+        self.new_round_manager(snapshot.seed, state, subscribe=False)
+        self.round_manager.winner = snapshot.winner
+        if snapshot.pending is not None:
+            card_id, attacker_id, defender_id = snapshot.pending
+            self.pending = PendingJudgement(get_catalogue(snapshot.card_set).get(card_id), attacker_id, defender_id,
+                                            time.monotonic() + self.answer_timeout)
+
+    def apply(self, kind: str, data: dict):
+        """重放一条事件（不广播、不记录、不发布本局事件）"""
+        if kind == "join":
+            self.players[data["key"]] = data["player"]
+            self._reset_sync()
+        elif kind == "bot":
+            self.bots[data["player"]] = MCTSPlayer(MCTSConfig(**data["config"]))
+        elif kind == "leave":
+            self.players.pop(data["key"], None)
+            self._reset_sync()
+        elif kind == "start":
+            self.new_round_manager(data["seed"], subscribe=False)
+            self.round_manager.initialize_game_state()
+            self.round_manager.deal_phase()
+        elif kind == "play":
+            state = self.round_manager.state
+            card = state.get_current_player().play_card(data["card"])
+            self.pending = PendingJudgement(card, state.current_player_id, state.get_opponent_player().player_id,
+                                            time.monotonic() + self.answer_timeout)
+        elif kind == "turn":
+            pending = self.pending
+            if pending is not None and pending.card.id == data["card"]:
+                card = pending.card
+                self.pending = None
+            else:
+                card = self.round_manager.state.get_current_player().play_card(data["card"])
+            meaning_ok, story_ok = data["ok"]
+            self.round_manager.judge.set_verdict(card, Verdict(meaning_ok=meaning_ok, story_ok=story_ok))
+            self.round_manager.run_one_turn(card)
+        elif kind == "skip":
+            self.round_manager.state.switch_turn()
+            self.round_manager.prepare_phase()
+        elif kind == "reseed":
+            self._seed = data["seed"]
+            self.round_manager.state.rng.seed(data["seed"])
+        else:
+            raise ValueError(f"未知的房间事件: {kind}")
+
+    def resume(self):
+        """恢复后在事件循环中调用：订阅本局事件，重新开始作答计时；轮到电脑玩家时继续出牌"""
+        if self.round_manager is not None:
+            self._subscribe()
+        if self.pending is not None:
+            self.pending.deadline = time.monotonic() + self.answer_timeout
+            self.pending.timer = asyncio.get_running_loop().create_task(self._expire(self.pending))
+        elif self.round_manager is not None and self.round_manager.state.current_player_id in self.bots:
+            asyncio.ensure_future(self.call(self.run_bot_turns))
+
     def get_player_id(self, player_key: str) -> Optional[str]:
         """获取玩家ID"""
         return self.players.get(player_key)
@@ -53,17 +543,45 @@ class GameRoom:
         """从房间中移除玩家"""
         if player_key in self.players:
             del self.players[player_key]
-        if player_key in self.connections:
-            del self.connections[player_key]
+            self._reset_sync()
+            self._record("leave", key=player_key)
+        self.remove_connection(player_key)
     
-    def add_connection(self, player_key: str, websocket: WebSocket):
-        """添加WebSocket连接"""
+    def add_connection(self, player_key: str, websocket: WebSocket, codec: Codec = JSON_CODEC):
+        """添加WebSocket连接（观战者以连接 ID 作为 key），需在事件循环中调用
+
+        codec 为连接时协商的消息编码，默认 JSON 文本帧。
+        """
+        self.remove_connection(player_key)
         self.connections[player_key] = websocket
+        self.sync.connect(player_key, self.players.get(player_key))
+        self.outboxes[player_key] = Outbox(
+            websocket,
+            render_state=lambda: self._render_state(player_key, codec),
+            on_error=lambda outbox: self._connection_failed(player_key, outbox),
+            codec=codec,
+        )
     
     def remove_connection(self, player_key: str):
         """移除WebSocket连接"""
         if player_key in self.connections:
             del self.connections[player_key]
+        outbox = self.outboxes.pop(player_key, None)
+        if outbox is not None:
+            outbox.close()
+        self.sync.disconnect(player_key)
+        if outbox is not None and not self.connections:
+            self._lifecycle_changed()
+
+    def _connection_failed(self, player_key: str, outbox: Outbox):
+        # 发送失败：原因记录在 outbox.stats.error，连接已被替换时不影响新连接
+        if self.outboxes.get(player_key) is outbox:
+            self.send_failures += 1
+            self.remove_connection(player_key)
+
+    def connection_stats(self) -> Dict[str, dict]:
+        """各连接发送队列的统计（队列深度、峰值、已发送、丢弃、合并数）"""
+        return {player_key: outbox.stats.to_dict() for player_key, outbox in self.outboxes.items()}
     
     def get_connection(self, player_key: str) -> Optional[WebSocket]:
         """获取玩家的WebSocket连接"""
@@ -76,7 +594,7 @@ class GameRoom:
                 "room_id": self.room_id,
                 "state": "waiting",
                 "players": {
-                    key: {"key": key, "ready": True, "player_id": player_id} 
+                    key: {"key": key, "ready": True, "player_id": player_id, "is_bot": player_id in self.bots}
                     for key, player_id in self.players.items()
                 }
             }
@@ -84,7 +602,10 @@ class GameRoom:
         # 获取基础游戏状态
         state = self.round_manager.state.to_dict()
         state["room_id"] = self.room_id
+        state["card_set"] = self.round_manager.card_set
         state["state"] = "finished" if state.pop("is_over") else "playing"
+        # 原始的双方玩家数据含对手手牌，只保留下面按观看者过滤后的 players
+        del state["player1"], state["player2"]
         
         # 转换玩家信息格式
         players_state = {}
@@ -94,6 +615,7 @@ class GameRoom:
                 "key": key,
                 "ready": True,
                 "player_id": player_id,
+                "is_bot": player_id in self.bots,
                 "hand_count": player_data["hand_count"],
                 "score_count": player_data["score_count"],
                 "score_cards": player_data["score_zone"]
@@ -106,40 +628,395 @@ class GameRoom:
             players_state[key] = player_state
         
         state["players"] = players_state
+        if self.pending is not None:
+            state["pending_judgement"] = self._pending_dict()
         return state
 
+    def encoded_state(self, requesting_player_key: Optional[str] = None) -> str:
+        """format_game_state 的 JSON 文本，按 (状态版本, 观看者) 缓存
+
+        状态没有变化时不产生新版本，轮询与广播都直接复用已编码的文本。
+        """
+        self._commit_state()
+        self._check_views()
+        viewer = self.players.get(requesting_player_key)
+        text = self._views.get(viewer)
+        if text is None:
+            text = self._views[viewer] = encode_json(self.format_game_state(requesting_player_key))
+        return text
+
+    def snapshot_frame(self, requesting_player_key: Optional[str] = None, codec: Codec = JSON_CODEC) -> Frame:
+        """完整状态消息的帧内容，按 (状态版本, 观看者, 编码) 缓存"""
+        if codec is JSON_CODEC:
+            state = self.encoded_state(requesting_player_key)
+            return f'{{"type":"game_state","version":{self.sync.version},"data":{state}}}'
+        self._commit_state()
+        self._check_views()
+        key = (self.players.get(requesting_player_key), codec.name)
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = codec.encode({
+                "type": "game_state",
+                "version": self.sync.version,
+                "data": self.format_game_state(requesting_player_key),
+            })
+        return frame
+
+    def _check_views(self):
+        if self._views_version != self.sync.version:
+            self._views = {}
+            self._frames = {}
+            self._views_version = self.sync.version
+
+    async def send_to_player(self, player_id: str, message: dict):
+        """向指定玩家的连接发送消息（入队，不等待发送）"""
+        frames: Dict[str, Frame] = {}
+        for player_key, pid in self.players.items():
+            outbox = self.outboxes.get(player_key)
+            if pid == player_id and outbox is not None:
+                outbox.send(self._encode(message, outbox.codec, frames))
+
+    async def send_to_connection(self, player_key: str, message: dict):
+        """向单个连接发送消息（入队，不等待发送）"""
+        outbox = self.outboxes.get(player_key)
+        if outbox is not None:
+            outbox.send(outbox.codec.encode(message))
+
+    async def broadcast(self, message: dict):
+        """向所有连接发送同一条消息：每种编码只编码一次，各连接并发发送"""
+        frames: Dict[str, Frame] = {}
+        for outbox in self.outboxes.values():
+            outbox.send(self._encode(message, outbox.codec, frames))
+
+    @staticmethod
+    def _encode(message: dict, codec: Codec, frames: Dict[str, Frame]) -> Frame:
+        frame = frames.get(codec.name)
+        if frame is None:
+            frame = frames[codec.name] = codec.encode(message)
+        return frame
+
     async def broadcast_game_state(self):
-        """广播游戏状态到所有连接的客户端"""
-        # 创建连接列表的副本进行迭代
-        connections = list(self.connections.items())
-        for player_key, websocket in connections:
-            try:
-                state = self.format_game_state(player_key)
-                await websocket.send_json({
-                    "type": "game_state",
-                    "data": state
-                })
-            except Exception as e:
-                # 如果发送失败，移除连接
-                self.remove_connection(player_key)
+        """提交新的状态版本，通知各连接推送增量（需要时推送完整状态）
+
+        各连接的写任务在发送时才生成消息，慢连接积压的多个版本合并为一条。
+        """
+        self._commit_state()
+        for player_key, outbox in self.outboxes.items():
+            conn = self.sync.connections.get(player_key)
+            if conn is not None and self.sync.due(conn):
+                outbox.push_state()
+
+    async def resync(self, player_key: str):
+        """客户端发现版本断档或主动刷新：向其发送完整状态"""
+        outbox = self.outboxes.get(player_key)
+        if outbox is not None:
+            # 先提交尚未广播的变化，保证完整状态与其版本号一致
+            self._commit_state()
+            self.sync.request_snapshot(player_key)
+            outbox.push_state()
+
+    async def acknowledge(self, player_key: str, version: int):
+        """客户端确认已应用 version；之前因未确认而暂停的推送在此补发"""
+        self.sync.ack(player_key, version)
+        outbox = self.outboxes.get(player_key)
+        if outbox is not None:
+            outbox.push_state()
+
+    async def flush(self):
+        """等待所有连接的发送队列清空"""
+        busy = [outbox.flush() for outbox in self.outboxes.values() if not outbox.idle]
+        if busy:
+            await asyncio.gather(*busy)
+
+    def _render_state(self, player_key: str, codec: Codec = JSON_CODEC) -> Optional[Frame]:
+        """该连接当前应收到的状态消息（合并增量或完整状态），无新版本时为 None"""
+        conn = self.sync.connections.get(player_key)
+        if conn is None or not self.sync.due(conn):
+            return None
+        frame = self.sync.encoded_delta(conn, codec)
+        is_snapshot = frame is None
+        if is_snapshot:
+            frame = self.snapshot_frame(player_key, codec)
+        # 发送失败时连接随即被移除，这里直接记为已发送
+        self.sync.mark_sent(conn, snapshot=is_snapshot)
+        return frame
+
+    def _commit_state(self):
+        # 等待中的房间只有玩家变动，已由 add_player/remove_player 重置版本；
+        # 自上次提交以来没有本局事件、pending 或玩家变动时状态不变，跳过字段比较
+        if self._dirty and self.round_manager is not None:
+            self._dirty = False
+            self.sync.commit(self._sync_fields())
+
+    def _pending_dict(self) -> Optional[dict]:
+        if self.pending is not self._synced_pending:
+            # 剩余时间只在开始等待时取一次，避免状态每次都不同
+            self._synced_pending = self.pending
+            self._pending_view = self.pending.to_dict() if self.pending is not None else None
+        return self._pending_view
+
+    def _sync_fields(self) -> dict:
+        """参与增量比较的字段（点分路径 -> 值），卡牌列表的变化由区域移动表达"""
+        state = self.round_manager.state
+        fields = {
+            "deck_count": len(state.deck),
+            "discard_count": len(state.discard_pile),
+            "turn_count": state.round_count,
+            "current_player_id": state.current_player_id,
+            "state": "finished" if state.is_game_over() else "playing",
+            "pending_judgement": self._pending_dict(),
+        }
+        for key, player_id in self.players.items():
+            player = state.player1 if player_id == "player1" else state.player2
+            fields[f"players.{key}.hand_count"] = player.hand_count()
+            fields[f"players.{key}.score_count"] = player.score_count()
+        return fields
 
 class RoomManager:
-    """房间管理器，管理所有游戏房间"""
+    """房间管理器，管理所有游戏房间
+
+    房间按生命周期阶段（见 RoomTTL）在无活动一段时间后回收。回收时间记在最小堆中，
+    清理任务每次只弹出已到期的条目并按房间当前的阶段与最近活动时间复核：未到期的重新入堆，
+    不扫描全部房间。活动只更新房间的时间戳（O(1)），延后的到期时间在复核时才生效；
+    会缩短回收时间的变化（终局、最后一个连接断开）由房间回调立即重新入堆。
+    """
     
-    def __init__(self):
+    def __init__(self, answer_timeout: float = 60.0, pipeline: Optional[JudgingPipeline] = None,
+                 shard: Optional[Tuple[int, int]] = None, ttl: RoomTTL = RoomTTL(),
+                 max_rooms: int = MAX_ROOMS, store: Optional[EventStore] = None):
+        """
+        shard: 分片部署时本进程的 (编号, 分片总数)，只创建 shard_of(room_id) 等于本分片的房间
+        ttl: 各阶段房间的无活动回收时间
+        max_rooms: 房间数上限，达到上限时先回收最接近到期的空闲房间，仍无空位则拒绝创建
+        store: 事件日志存储，新房间的事件都记录到这里；也可以之后由 recover() 设置
+        """
         self.rooms: Dict[str, GameRoom] = {}
+        self.answer_timeout = answer_timeout
+        self.pipeline = pipeline
+        self.shard = shard
+        self.ttl = ttl
+        self.max_rooms = max_rooms
+        self.store = store
+        self.evicted = 0  # 已回收的房间数
+        # (回收时间, 房间号)；每个房间有效的条目只有一条，其时间记在 _deadlines 中，其余为过期条目
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._sweeper: Optional[asyncio.Task] = None
     
     def create_room(self) -> GameRoom:
-        """创建新房间"""
-        room = GameRoom()
-        self.rooms[room.room_id] = room
+        """创建新房间；房间数达到上限且没有可回收的空闲房间时抛出 RuntimeError"""
+        if len(self.rooms) >= self.max_rooms:
+            self.sweep()
+            if len(self.rooms) >= self.max_rooms and not self._evict_for_space():
+                raise RuntimeError("Room limit reached")
+        room = GameRoom(self.answer_timeout, self.pipeline, self._new_room_id())
+        if self.store is not None:
+            room.log = RoomLog(self.store, room.room_id)
+        self._register(room)
         return room
+
+    def _register(self, room: GameRoom):
+        room.on_lifecycle = self._schedule
+        self.rooms[room.room_id] = room
+        self._schedule(room)
+
+    def recover(self, store: EventStore) -> int:
+        """从事件存储重建全部房间（快照 + 其后的事件），之后的事件继续记录到 store，返回房间数
+
+        需在事件循环中调用：恢复的房间重新开始作答计时，轮到电脑玩家的房间继续出牌。
+        """
+        self.store = store
+        count = 0
+        # 一次性创建大量长期存活的对象，期间反复触发的分代回收会扫描整个堆，恢复完成前暂停
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for record in store.load():
+                room = GameRoom(self.answer_timeout, self.pipeline, record.room_id)
+                if record.snapshot is not None:
+                    room.restore(RoomSnapshot.decode(record.snapshot))
+                for _, kind, data in record.events:
+                    room.apply(kind, data)
+                room.log = RoomLog(store, room.room_id, record.seq, record.snapshot_seq)
+                self._register(room)
+                room.resume()
+                count += 1
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return count
+
+    def _new_room_id(self) -> str:
+        # 分片部署时重新生成，直到房间号落在本分片（平均尝试次数等于分片数）
+        while True:
+            room_id = str(uuid.uuid4())[:8]
+            if room_id in self.rooms:
+                continue
+            if self.shard is None or shard_of(room_id, self.shard[1]) == self.shard[0]:
+                return room_id
     
     def get_room(self, room_id: str) -> Optional[GameRoom]:
-        """获取房间"""
-        return self.rooms.get(room_id)
+        """获取房间（记为一次活动）"""
+        room = self.rooms.get(room_id)
+        if room is not None:
+            room.last_active = time.monotonic()
+        return room
     
     def remove_room(self, room_id: str):
-        """移除房间"""
-        if room_id in self.rooms:
-            del self.rooms[room_id]
\ No newline at end of file
+        """移除房间并停止其后台任务"""
+        room = self.rooms.pop(room_id, None)
+        self._deadlines.pop(room_id, None)
+        if room is not None:
+            room.on_lifecycle = None
+            room.close()
+            if room.log is not None:
+                room.log.drop()
+                room.log = None
+
+    # ---------- 回收 ----------
+
+    def _schedule(self, room: GameRoom):
+        """按房间当前阶段重新计算回收时间；只有提前时才入堆，推迟的留到复核时处理"""
+        if self.rooms.get(room.room_id) is not room:
+            return
+        deadline = room.expires_at(self.ttl)
+        scheduled = self._deadlines.get(room.room_id)
+        if scheduled is None or deadline < scheduled:
+            self._deadlines[room.room_id] = deadline
+            heapq.heappush(self._heap, (deadline, room.room_id))
+
+    def _pop_due(self, now: float) -> Optional[GameRoom]:
+        """弹出下一个到期条目对应的房间（跳过过期条目），没有到期的返回 None"""
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, room_id = heapq.heappop(heap)
+            if self._deadlines.get(room_id) == deadline:
+                del self._deadlines[room_id]
+                return self.rooms[room_id]
+        return None
+
+    def sweep(self, now: Optional[float] = None, limit: Optional[int] = None) -> int:
+        """回收已到期的房间（最多 limit 个），返回回收数；耗时只与到期条目数有关"""
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        while limit is None or evicted < limit:
+            room = self._pop_due(now)
+            if room is None:
+                break
+            if room.busy:
+                # 命令执行时间超过了 TTL（如等待电脑思考）：执行中的命令算作活动
+                room.touch()
+            deadline = room.expires_at(self.ttl)
+            if deadline <= now:
+                self.evict(room)
+                evicted += 1
+            else:
+                # 期间有活动或阶段变化：按新的时间重新入堆
+                self._deadlines[room.room_id] = deadline
+                heapq.heappush(self._heap, (deadline, room.room_id))
+        return evicted
+
+    def _evict_for_space(self, candidates: int = 64) -> bool:
+        """房间数达到上限时，回收最接近到期的一个空闲房间（非 connected 阶段、邮箱中没有命令）"""
+        skipped = []
+        victim = None
+        while self._heap and len(skipped) < candidates:
+            room = self._pop_due(float("inf"))
+            if room is None:
+                break
+            if room.lifecycle != "connected" and not room.busy:
+                victim = room
+                break
+            skipped.append(room)
+        for room in skipped:
+            self._schedule(room)
+        if victim is None:
+            return False
+        self.evict(victim)
+        return True
+
+    def evict(self, room: GameRoom):
+        """回收房间：关闭其 WebSocket 连接（4002）并移除"""
+        sockets = list(room.connections.values())
+        self.remove_room(room.room_id)
+        self.evicted += 1
+        for websocket in sockets:
+            asyncio.ensure_future(_close_quietly(websocket, 4002))
+
+    async def run_sweeper(self, interval: float = SWEEP_INTERVAL):
+        """后台清理任务：每 interval 秒回收一次到期房间"""
+        while True:
+            await asyncio.sleep(interval)
+            while self.sweep(limit=SWEEP_BATCH) == SWEEP_BATCH:
+                await asyncio.sleep(0)
+
+    def start_sweeper(self, interval: float = SWEEP_INTERVAL):
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self.run_sweeper(interval))
+
+    def stop_sweeper(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    def stats(self, sample: int = 200) -> dict:
+        """房间数、各阶段分布，以及按随机抽样估算的平均/总内存占用"""
+        lifecycles: Dict[str, int] = {"waiting": 0, "finished": 0, "abandoned": 0, "connected": 0}
+        for room in self.rooms.values():
+            lifecycles[room.lifecycle] += 1
+        rooms = list(self.rooms.values())
+        picked = random.sample(rooms, min(sample, len(rooms)))
+        average = sum(room.memory_estimate() for room in picked) / len(picked) if picked else 0
+        return {
+            "rooms": len(self.rooms),
+            "max_rooms": self.max_rooms,
+            "lifecycles": lifecycles,
+            "evicted": self.evicted,
+            "scheduled": len(self._heap),
+            "memory_estimate_avg": round(average),
+            "memory_estimate_total": round(average * len(rooms)),
+        }
+
+
+async def _close_quietly(websocket: WebSocket, code: int):
+    try:
+        await websocket.close(code=code)
+    except Exception:
+        pass
+
+
+# ==========================
+# 内存估算
+# ==========================
+
+# 不计入房间内存的对象：所有房间共享的卡牌与目录、判题流水线，以及代码与事件循环相关的对象
+_SHARED_TYPES = (Card, CardCatalogue, Enum, JudgingPipeline, Executor, WebSocket, type,
+                 types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+                 asyncio.Future, asyncio.AbstractEventLoop)
+
+
+def estimate_size(obj: Any) -> int:
+    """对象图的内存估算：逐个对象 sys.getsizeof 求和，每个对象只计一次，不进入共享对象"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SHARED_TYPES):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        if hasattr(item, "__dict__"):
+            stack.append(item.__dict__)
+        for cls in type(item).__mro__:
+            slots = cls.__dict__.get("__slots__", ())
+            for name in ((slots,) if isinstance(slots, str) else slots):
+                value = getattr(item, name, None)
+                if value is not None:
+                    stack.append(value)
+    return total
@@ -0,0 +1,24 @@
+import os
+import zlib
+from typing import Optional, Tuple
+
+# 房间分片：路由（server.cluster）与工作进程（server.room、main）共用，不依赖其他模块
+
+# 分片部署时每个工作进程的环境变量，值为 "编号/分片总数"，如 "1/4"
+SHARD_ENV = "SUMMERQUEST_SHARD"
+
+
+def shard_of(room_id: str, count: int) -> int:
+    """房间所在的分片编号；路由与工作进程用同一个哈希，各自独立算出相同结果"""
+    return zlib.crc32(room_id.encode("utf-8")) % count
+
+
+def worker_shard() -> Optional[Tuple[int, int]]:
+    """本进程的 (分片编号, 分片总数)，未以分片模式启动时为 None"""
+    value = os.environ.get(SHARD_ENV)
+    if not value:
+        return None
+    index, count = (int(part) for part in value.split("/"))
+    if not 0 <= index < count:
+        raise ValueError(f"{SHARD_ENV}={value}: 分片编号超出范围")
+    return index, count
@@ -0,0 +1,154 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from game.events import GameEvent, ZoneMoveEvent
+from server.wire import JSON_CODEC, Codec, Frame
+
+
+# 所有人可见的区域：双方得分区与弃牌区（牌库与对手手牌不可见）
+PUBLIC_ZONES = frozenset(("S1", "S2", "A"))
+# 玩家自己的手牌区
+HAND_ZONES = {"player1": "P1", "player2": "P2"}
+
+# 每隔多少个版本向连接补发一次完整状态，纠正客户端可能的累积误差
+SNAPSHOT_INTERVAL = 50
+# 保留的增量条数，落后更多的连接改发完整状态
+HISTORY_SIZE = 64
+# 已发送未确认的版本数达到此值时暂停推送，待客户端确认后合并补发
+MAX_UNACKED = 8
+
+# (卡牌 ID, 来源区域, 目标区域)
+Move = Tuple[int, Optional[str], str]
+
+
+@dataclass
+class Delta:
+    """version - 1 → version 的变化：区域移动与变化的字段（字段名为状态中的点分路径）"""
+    version: int
+    moves: List[Move]
+    changes: Dict[str, Any]
+
+
+@dataclass
+class ConnectionSync:
+    """单个连接的同步进度；viewer 为玩家 ID，观战者为 None"""
+    viewer: Optional[str]
+    sent: Optional[int] = None      # 最后发送的版本，None 表示需要完整状态
+    acked: Optional[int] = None     # 客户端确认的版本，从不确认的客户端不限流
+    snapshot: int = 0               # 最后一次完整状态的版本
+
+    def throttled(self) -> bool:
+        return self.acked is not None and self.sent is not None and self.sent - self.acked >= MAX_UNACKED
+
+
+class StateSync:
+    """房间状态的版本与增量记录
+
+    每次状态推送前调用 commit()：自上次提交以来的区域移动（订阅 zone_move 事件收集）
+    与变化的字段构成一个新版本。向各连接发送从其已发送版本到当前版本的合并增量，
+    并按 viewer 过滤掉看不到的卡牌；版本断档、落后太多或到达快照间隔时改发完整状态。
+    """
+
+    def __init__(self, history: int = HISTORY_SIZE, snapshot_interval: int = SNAPSHOT_INTERVAL):
+        self.version = 0
+        self.snapshot_interval = snapshot_interval
+        self.history: Deque[Delta] = deque(maxlen=history)
+        self.connections: Dict[str, ConnectionSync] = {}
+        self._moves: List[Move] = []
+        self._fields: Dict[str, Any] = {}
+        # 当前版本已编码的增量消息：(起始版本, 可见手牌区, 编码) -> 帧内容，同一类连接共用
+        self._encoded: Dict[Tuple[int, Optional[str], str], Frame] = {}
+
+    # ---------- 记录 ----------
+
+    def __call__(self, event: GameEvent):
+        """作为 zone_move 事件的订阅者"""
+        if isinstance(event, ZoneMoveEvent):
+            self._moves.append((event.card.id, event.source, event.target))
+
+    def commit(self, fields: Dict[str, Any]) -> bool:
+        """以当前字段值提交一个新版本；无任何变化时不产生新版本，返回 False"""
+        changes = {key: value for key, value in fields.items()
+                   if key not in self._fields or self._fields[key] != value}
+        if not changes and not self._moves and self.version > 0:
+            return False
+        self.version += 1
+        self.history.append(Delta(self.version, self._moves, changes))
+        self._moves = []
+        self._fields = dict(fields)
+        self._encoded.clear()
+        return True
+
+    def reset(self):
+        """状态整体替换（新对局、玩家变动）：丢弃增量记录，所有连接下次收到完整状态"""
+        self.version += 1
+        self.history.clear()
+        self._moves = []
+        self._fields = {}
+        self._encoded.clear()
+        for conn in self.connections.values():
+            conn.sent = None
+
+    # ---------- 连接 ----------
+
+    def connect(self, key: str, viewer: Optional[str]) -> ConnectionSync:
+        conn = self.connections[key] = ConnectionSync(viewer)
+        return conn
+
+    def disconnect(self, key: str):
+        self.connections.pop(key, None)
+
+    def ack(self, key: str, version: int):
+        conn = self.connections.get(key)
+        if conn is not None and conn.sent is not None and version <= conn.sent:
+            conn.acked = max(conn.acked or 0, version)
+
+    def request_snapshot(self, key: str):
+        """该连接下次收到完整状态"""
+        conn = self.connections.get(key)
+        if conn is not None:
+            conn.sent = None
+
+    def due(self, conn: ConnectionSync) -> bool:
+        """该连接是否有新版本需要发送"""
+        return conn.sent != self.version and not conn.throttled()
+
+    def needs_snapshot(self, conn: ConnectionSync) -> bool:
+        base = conn.sent
+        return (base is None or not self.history or base < self.history[0].version - 1
+                or self.version - conn.snapshot >= self.snapshot_interval)
+
+    def delta_for(self, conn: ConnectionSync) -> Optional[dict]:
+        """conn.sent → 当前版本的合并增量消息；需要发送完整状态时返回 None"""
+        if self.needs_snapshot(conn):
+            return None
+        base = conn.sent
+        hand = HAND_ZONES.get(conn.viewer)
+        moves: List[Move] = []
+        changes: Dict[str, Any] = {}
+        for delta in self.history:
+            if delta.version <= base:
+                continue
+            # 只发送来源或目标对该连接可见的移动，其余的数量变化体现在字段中
+            moves.extend(move for move in delta.moves
+                         if move[1] in PUBLIC_ZONES or move[2] in PUBLIC_ZONES
+                         or (hand is not None and (move[1] == hand or move[2] == hand)))
+            changes.update(delta.changes)
+        return {"type": "game_delta", "base": base, "version": self.version, "moves": moves, "set": changes}
+
+    def encoded_delta(self, conn: ConnectionSync, codec: Codec = JSON_CODEC) -> Optional[Frame]:
+        """按 codec 编码的 delta_for，起始版本、可见手牌与编码都相同的连接只编码一次"""
+        if self.needs_snapshot(conn):
+            return None
+        key = (conn.sent, HAND_ZONES.get(conn.viewer), codec.name)
+        frame = self._encoded.get(key)
+        if frame is None:
+            frame = self._encoded[key] = codec.encode(self.delta_for(conn))
+        return frame
+
+    def mark_sent(self, conn: ConnectionSync, snapshot: bool = False):
+        conn.sent = self.version
+        if snapshot:
+            conn.snapshot = self.version
+            conn.acked = None if conn.acked is None else self.version
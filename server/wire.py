@@ -0,0 +1,258 @@
+import json
+import zlib
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from game.events import GameEvent
+from game.rules import GameRoundManager
+
+# WebSocket 帧内容：文本帧为 str，二进制帧为 bytes
+Frame = Union[str, bytes]
+
+
+# ==========================
+# 编码
+# ==========================
+
+def encode_json(payload: Any) -> str:
+    """服务器推送消息的 JSON 编码（紧凑分隔符，中文不转义）"""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def _encode_deflate(payload: Any) -> bytes:
+    return zlib.compress(encode_json(payload).encode("utf-8"), 6)
+
+
+def _decode_deflate(frame: bytes) -> Any:
+    return json.loads(zlib.decompress(frame))
+
+
+@dataclass(frozen=True)
+class Codec:
+    """WebSocket 消息编码；binary 为 True 时以二进制帧发送"""
+    name: str
+    binary: bool
+    encode: Callable[[Any], Frame]
+    decode: Callable[[Frame], Any]
+
+
+JSON_CODEC = Codec("json", False, encode_json, json.loads)
+
+# 可协商的编码：JSON 文本为默认；deflate 为 zlib 压缩的 JSON（浏览器可用 DecompressionStream('deflate') 解码）；
+# 安装了 msgpack 时另提供 msgpack
+CODECS: Dict[str, Codec] = {
+    "json": JSON_CODEC,
+    "deflate": Codec("deflate", True, _encode_deflate, _decode_deflate),
+}
+if msgpack is not None:
+    CODECS["msgpack"] = Codec("msgpack", True, partial(msgpack.packb, use_bin_type=True),
+                              partial(msgpack.unpackb, raw=False))
+
+
+def negotiate(requested: Optional[str]) -> Codec:
+    """按客户端给出的偏好顺序（逗号分隔，如 "msgpack,deflate"）选择第一个可用的编码，都不可用时为 JSON"""
+    for name in (requested or "").split(","):
+        codec = CODECS.get(name.strip().lower())
+        if codec is not None:
+            return codec
+    return JSON_CODEC
+
+
+def legacy_game_state(manager: GameRoundManager, viewer: Optional[str] = None) -> dict:
+    """旧版状态格式：每张卡牌都带完整内容（卡牌 __dict__），仅用于对比负载大小"""
+    state = manager.state
+
+    def cards(zone):
+        return [card.__dict__ for card in zone]
+
+    players = {}
+    for player in (state.player1, state.player2):
+        data = {
+            "player_id": player.player_id,
+            "hand_count": player.hand_count(),
+            "score_count": player.score_count(),
+            "score_cards": cards(player.score_zone),
+        }
+        if player.player_id == viewer:
+            data["hand_cards"] = cards(player.hand)
+        players[player.player_id] = data
+    return {
+        "deck_count": len(state.deck),
+        "discard_count": len(state.discard_pile),
+        "discard_pile": cards(state.discard_pile),
+        "turn_count": state.round_count,
+        "current_player_id": state.current_player_id,
+        "players": players,
+    }
+
+
+# ==========================
+# 基准测试
+# ==========================
+
+def benchmark(n_games: int = 200, card_set: str = "v1"):
+    """对局中每次出牌后的状态推送大小：完整卡牌内容 vs 只含卡牌 ID（+ 一次性的卡牌目录）"""
+    import random
+    from game.catalogue import get_catalogue
+    from game.simulate import HeadlessJudge, RandomPolicy, play_game, random_outcome
+    from server.room import GameRoom
+
+    catalogue = get_catalogue(card_set)
+    legacy_sizes, compact_sizes = [], []
+
+    for seed in range(n_games):
+        rng = random.Random(seed)
+        room = GameRoom()
+        key, _ = room.add_player()
+        room.add_player()
+        room.round_manager = GameRoundManager(catalogue, HeadlessJudge(random_outcome(rng=rng)), verbose=False, seed=seed)
+
+        def sample(event: GameEvent):
+            legacy = legacy_game_state(room.round_manager, "player1")
+            legacy_sizes.append(len(json.dumps({"type": "game_state", "data": legacy}, default=str).encode("utf-8")))
+            compact_sizes.append(len(encode_json({"type": "game_state", "data": room.format_game_state(key)}).encode("utf-8")))
+
+        room.round_manager.subscribe(sample, kinds=("play",))
+        play_game(room.round_manager, (RandomPolicy(rng=rng), RandomPolicy(rng=rng)))
+
+    catalogue_size = len(catalogue.encoded()[0])
+    legacy_total, compact_total = sum(legacy_sizes), sum(compact_sizes)
+    print(f"=== 状态推送负载 ({card_set}, {n_games} 局, {len(legacy_sizes)} 次推送) ===")
+    print(f"完整卡牌内容: 平均 {legacy_total / len(legacy_sizes):8,.0f} B  最大 {max(legacy_sizes):8,} B")
+    print(f"只含卡牌 ID:  平均 {compact_total / len(compact_sizes):8,.0f} B  最大 {max(compact_sizes):8,} B")
+    print(f"卡牌目录（每个客户端获取一次，之后走 ETag 缓存）: {catalogue_size:,} B")
+    print(f"单局平均缩减: {legacy_total / compact_total:.1f}x"
+          f"（计入每局一次目录: {legacy_total / (compact_total + catalogue_size * n_games):.1f}x）")
+
+
+def state_cache_benchmark(spectators: int = 50, polls: int = 20000, card_set: str = "v1"):
+    """对局中的房间：每次轮询/广播都重新序列化 vs 按 (版本, 观看者) 缓存的 JSON"""
+    import asyncio
+    import random
+    import time
+    from game.catalogue import get_catalogue
+    from game.simulate import HeadlessJudge, RandomPolicy, random_outcome
+    from server.room import GameRoom
+
+    class NullSocket:
+        async def send_text(self, text: str):
+            pass
+
+    rng = random.Random(0)
+    room = GameRoom()
+    key, _ = room.add_player()
+    room.add_player()
+    room.round_manager = GameRoundManager(get_catalogue(card_set), HeadlessJudge(random_outcome(rng=rng)),
+                                          verbose=False, seed=0)
+    room.round_manager.initialize_game_state()
+    room.round_manager.deal_phase()
+    policy = RandomPolicy(rng=rng)
+    for _ in range(4):
+        state = room.round_manager.state
+        card = policy.choose_main(state, state.get_current_player())
+        state.get_current_player().play_card(card.id)
+        room.round_manager.run_one_turn(card)
+
+    begin = time.perf_counter()
+    for _ in range(polls):
+        encode_json(room.format_game_state(key))
+    uncached = (time.perf_counter() - begin) / polls
+    begin = time.perf_counter()
+    for _ in range(polls):
+        room.encoded_state(key)
+    cached = (time.perf_counter() - begin) / polls
+
+    async def broadcasts(n: int, snapshot: bool) -> float:
+        begin = time.perf_counter()
+        for _ in range(n):
+            if snapshot:
+                # 强制所有连接接收完整状态
+                for conn in room.sync.connections.values():
+                    conn.sent = None
+            await room.broadcast_game_state()
+            await room.flush()
+        return (time.perf_counter() - begin) / n
+
+    async def run() -> Tuple[float, float]:
+        for i in range(spectators):
+            room.add_connection(f"spectator{i}", NullSocket())
+        try:
+            return await broadcasts(200, True), await broadcasts(2000, False)
+        finally:
+            for i in range(spectators):
+                room.remove_connection(f"spectator{i}")
+
+    snapshot, quiet = asyncio.run(run())
+
+    print(f"=== 状态序列化缓存 ({card_set}, 对局中, {spectators} 名观战者) ===")
+    print(f"轮询（每次重新序列化）: {uncached * 1e6:8.1f} µs")
+    print(f"轮询（版本缓存）:       {cached * 1e6:8.1f} µs  ({uncached / cached:.0f}x)")
+    print(f"完整状态广播: 逐连接序列化约 {uncached * spectators * 1e3:6.2f} ms，版本缓存 {snapshot * 1e3:6.2f} ms")
+    print(f"无变化的广播（不产生新版本，不发送）: {quiet * 1e6:8.1f} µs")
+
+
+def encoding_benchmark(n_games: int = 200, recipients: int = 50, card_set: str = "v1"):
+    """对局中的完整状态与增量消息：各编码的大小与编解码耗时，以及按版本只编码一次的收益"""
+    import random
+    import time
+    from game.catalogue import get_catalogue
+    from game.simulate import HeadlessJudge, RandomPolicy, play_game, random_outcome
+    from server.room import GameRoom
+    from server.sync import ConnectionSync
+
+    catalogue = get_catalogue(card_set)
+    snapshots, deltas = [], []
+    for seed in range(n_games):
+        rng = random.Random(seed)
+        room = GameRoom()
+        key, player_id = room.add_player()
+        room.add_player()
+        room.round_manager = GameRoundManager(catalogue, HeadlessJudge(random_outcome(rng=rng)), verbose=False, seed=seed)
+        room.round_manager.subscribe(room.sync, kinds=("zone_move",))
+        viewer = ConnectionSync(player_id)
+
+        def sample(event: GameEvent):
+            # 每回合的准备阶段结束时采样：提交一个版本，记录该版本的增量与完整状态
+            viewer.sent = room.sync.version
+            viewer.snapshot = room.sync.version
+            room._commit_state()
+            delta = room.sync.delta_for(viewer)
+            if delta is not None:
+                deltas.append(delta)
+            snapshots.append({"type": "game_state", "version": room.sync.version,
+                              "data": room.format_game_state(key)})
+
+        room.round_manager.subscribe(sample, kinds=("draw",))
+        play_game(room.round_manager, (RandomPolicy(rng=rng), RandomPolicy(rng=rng)))
+
+    def measure(codec: Codec, messages) -> Tuple[float, float, float]:
+        begin = time.perf_counter()
+        frames = [codec.encode(message) for message in messages]
+        encode_cost = (time.perf_counter() - begin) / len(messages)
+        begin = time.perf_counter()
+        for frame in frames:
+            codec.decode(frame)
+        decode_cost = (time.perf_counter() - begin) / len(messages)
+        size = sum(len(frame.encode("utf-8") if isinstance(frame, str) else frame) for frame in frames) / len(frames)
+        return size, encode_cost, decode_cost
+
+    print(f"=== WebSocket 消息编码 ({card_set}, {n_games} 局, {len(snapshots)} 个完整状态, {len(deltas)} 个增量) ===")
+    if msgpack is None:
+        print("（未安装 msgpack，跳过；pip install msgpack 后可协商 msgpack 编码）")
+    for label, messages in (("完整状态", snapshots), ("增量", deltas)):
+        for codec in CODECS.values():
+            size, encode_cost, decode_cost = measure(codec, messages)
+            print(f"{label:<6} {codec.name:<8} 平均 {size:7.0f} B  编码 {encode_cost * 1e6:6.1f} µs  解码 {decode_cost * 1e6:6.1f} µs"
+                  f"  {recipients} 个接收者逐个编码 {encode_cost * recipients * 1e6:7.1f} µs → 按版本编码一次 {encode_cost * 1e6:6.1f} µs")
+
+
+if __name__ == "__main__":
+    benchmark()
+    state_cache_benchmark()
+    encoding_benchmark()
@@ -1,7 +1,10 @@
+import argparse
+
 from game.card import Card, CardType
 from game.player import Player
 from game.game_state import GameState
 from game.judge import Judge
+from game.mcts import BotJudge, MCTSConfig, MCTSPlayer
 from game.rules import GameRoundManager
 from data.v1 import get_all_cards, get_card_by_id
 
@@ -37,9 +40,27 @@ def get_card_choice(player: Player, valid_types: list[CardType] = None) -> Card:
         print("❌ 无效的选择，请重试")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="成语卡牌对战（终端版）")
+    parser.add_argument("--bot", choices=["player1", "player2"], action="append", default=[],
+                        help="由 MCTS 电脑玩家控制的一方，可重复指定")
+    parser.add_argument("--rollouts", type=int, default=1000, help="电脑每次决策的模拟次数")
+    parser.add_argument("--time-limit", type=float, default=None, help="电脑每次决策的时间上限（秒）")
+    args = parser.parse_args()
+    try:
+        MCTSConfig(rollouts=args.rollouts, time_limit=args.time_limit)
+    except ValueError as exc:
+        parser.error(str(exc))
+    return args
+
+
 def main():
+    args = parse_args()
+    config = MCTSConfig(rollouts=args.rollouts, time_limit=args.time_limit)
+    bots = {player_id: MCTSPlayer(config) for player_id in args.bot}
+
     # 初始化游戏
-    game = GameRoundManager()
+    game = GameRoundManager(judge=BotJudge(set(bots), config.meaning_rate, config.story_rate, verbose=True))
     game.initialize_game_state()
     game.deal_phase()
     
@@ -58,7 +79,10 @@ def main():
         
         # 出牌阶段
         print(f"\n[主攻] {current_player.player_id} 的回合")
-        main_card = get_card_choice(current_player)
+        if current_player.player_id in bots:
+            main_card = bots[current_player.player_id].choose_main(game.state, current_player)
+        else:
+            main_card = get_card_choice(current_player)
         if not main_card:
             print("放弃出牌")
             game.state.switch_turn()
@@ -71,7 +95,10 @@ def main():
         response_card = None
         if opponent.has_counter_card():
             print(f"\n[反击] {opponent.player_id} 可以使用反击卡")
-            response_card = get_card_choice(opponent, [CardType.COUNTER])
+            if opponent.player_id in bots:
+                response_card = bots[opponent.player_id].choose_counter(game.state, opponent, main_card)
+            else:
+                response_card = get_card_choice(opponent, [CardType.COUNTER])
             if response_card:
                 opponent.play_card(response_card.id)
                 print(f"[反击] {opponent.player_id} 使用 {response_card} 进行反击")
@@ -80,7 +107,10 @@ def main():
         combo_card = None
         if not response_card and current_player.has_combo_card():
             print(f"\n[连击] {current_player.player_id} 可以使用连击卡")
-            combo_card = get_card_choice(current_player, [CardType.COMBO])
+            if current_player.player_id in bots:
+                combo_card = bots[current_player.player_id].choose_combo(game.state, current_player)
+            else:
+                combo_card = get_card_choice(current_player, [CardType.COMBO])
             if combo_card:
                 current_player.play_card(combo_card.id)
                 print(f"[连击] {current_player.player_id} 追加 {combo_card}")